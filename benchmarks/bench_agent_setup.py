@@ -0,0 +1,39 @@
+"""
+    Per-request agent setup cost: building a crewai Agent for every request (the old
+    behaviour) versus borrowing a prebuilt one from the agent registry.
+
+    Run from the repository root (needs the same .env as the bot, no network calls are made):
+        python -m benchmarks.bench_agent_setup
+"""
+
+import time
+from utils.manage_multi_service import SERVICE_TOOLS, _build_agent, agent_registry
+
+
+ITERATIONS = 200
+
+
+def bench(label: str, func, iterations: int = ITERATIONS):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed / iterations * 1000:8.3f} ms/request")
+
+
+def main():
+    for services in [["calendar"], ["gmail"], list(SERVICE_TOOLS)]:
+        name = "+".join(services)
+
+        bench(f"build per request ({name})", lambda: _build_agent(tuple(services)))
+
+        def checkout():
+            with agent_registry.checkout(services):
+                pass
+
+        checkout()  # First checkout builds the agent, like the first request after startup
+        bench(f"registry checkout ({name})", checkout)
+
+
+if __name__ == "__main__":
+    main()
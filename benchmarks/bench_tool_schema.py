@@ -0,0 +1,22 @@
+"""
+    Size of the tool descriptions the agent sends with every reasoning step, per service,
+    with the full docstrings versus the compact descriptions (TOOL_DESCRIPTIONS=compact).
+    Token counts are estimated at ~4 characters per token.
+
+    Run from the repository root (needs the same .env as the bot, no network calls are made):
+        python -m benchmarks.bench_tool_schema
+"""
+
+from utils.manage_multi_service import SERVICE_TOOLS
+from utils.tool_schema import description_report
+
+
+def main():
+    print(f"{'service':<10} {'tools':>5} {'full':>8} {'compact':>8} {'saved':>6}")
+    for row in description_report(SERVICE_TOOLS):
+        saved = 1 - row["compact_tokens"] / row["full_tokens"] if row["full_tokens"] else 0
+        print(f"{row['service']:<10} {row['tools']:>5} {row['full_tokens']:>8} {row['compact_tokens']:>8} {saved:>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
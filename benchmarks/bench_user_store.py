@@ -0,0 +1,71 @@
+"""
+    Account lookups and writes at 100k users: the old TinyDB files versus the SQLite-backed
+    UserStore with its in-memory index.
+
+    Run from the repository root:
+        python -m benchmarks.bench_user_store
+"""
+
+import os
+import random
+import tempfile
+import time
+from utils.user_store import UserStore
+
+
+USERS = 100_000
+LOOKUPS = 10_000
+WRITES = 1_000
+
+
+def timed(label: str, func, count: int):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<36} {elapsed / count * 1e6:12.2f} µs/op  ({count} ops)")
+
+
+def bench_user_store(directory: str, user_ids: list[int]):
+    store = UserStore(os.path.join(directory, "users.sqlite3"))
+
+    timed("UserStore bulk load", lambda: [store.create_pending(user_id, f"ca_{user_id}") for user_id in user_ids], len(user_ids))
+
+    sample = random.sample(user_ids, LOOKUPS)
+    timed("UserStore promote", lambda: [store.promote(user_id) for user_id in sample[:WRITES]], WRITES)
+    timed("UserStore lookup", lambda: [store.resolve(user_id) for user_id in sample[:WRITES]], WRITES)
+    timed("UserStore re-auth", lambda: [store.start_reauth(user_id, "ca_new") for user_id in sample[WRITES:2 * WRITES]], WRITES)
+    timed("UserStore expire pending", lambda: store.expire_pending(0), 1)
+
+    store.close()
+    start = time.perf_counter()
+    UserStore(os.path.join(directory, "users.sqlite3")).close()
+    print(f"{'UserStore reopen (index rebuild)':<36} {(time.perf_counter() - start) * 1000:12.2f} ms")
+
+
+def bench_tinydb(directory: str, user_ids: list[int]):
+    try:
+        from tinydb import TinyDB, Query
+    except ImportError:
+        print("tinydb is not installed, skipping the TinyDB baseline")
+        return
+
+    db = TinyDB(os.path.join(directory, "user.json"))
+    db.insert_multiple({"user_id": user_id, "connected_account_id": f"ca_{user_id}"} for user_id in user_ids)
+    Account = Query()
+
+    # TinyDB is far slower, so it gets a smaller sample
+    sample = random.sample(user_ids, 100)
+    timed("TinyDB search", lambda: [db.search(Account.user_id == user_id) for user_id in sample], len(sample))
+    timed("TinyDB update", lambda: [db.update({"connected_account_id": "ca_new"}, Account.user_id == user_id) for user_id in sample[:10]], 10)
+
+
+def main():
+    user_ids = random.sample(range(10**17, 10**18), USERS)  # Discord snowflake sized ids
+
+    with tempfile.TemporaryDirectory() as directory:
+        bench_user_store(directory, user_ids)
+        bench_tinydb(directory, user_ids)
+
+
+if __name__ == "__main__":
+    main()
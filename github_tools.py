@@ -1,11 +1,5 @@
 from crewai_tools import tool
-import requests
-import dotenv
-import os
-
-
-dotenv.load_dotenv()
-COMPOSIO_API_KEY = os.environ["COMPOSIO_API_KEY"]
+from utils.composio_client import composio_client, async_composio_client
 
 
 @tool("Create GitHub Issue")
@@ -23,8 +17,6 @@ def create_github_issue(connectedAccountId: str, owner: str, repo: str, title: s
 
     print("\n\nCreating GitHub issue\n\n")
 
-    url = "https://backend.composio.dev/api/v1/actions/github_create_issue/execute"
-
     input_data = {
         "owner": owner,
         "repo": repo,
@@ -36,19 +28,7 @@ def create_github_issue(connectedAccountId: str, owner: str, repo: str, title: s
     if labels is not None:
         input_data["labels"] = labels
 
-    payload = {
-        "connectedAccountId": connectedAccountId,
-        "appName": "github",
-        "input": input_data
-    }
-
-    headers = {
-        "X-API-Key": COMPOSIO_API_KEY,
-        "Content-Type": "application/json"
-    }
-
-    response = requests.post(url, json=payload, headers=headers)
-    response_json = response.json()
+    response_json = composio_client.execute_action("github_create_issue", connectedAccountId, "github", input_data)
 
     if response_json.get("executed"):
         issue_data = response_json.get("response", {})
@@ -75,8 +55,24 @@ def list_github_issues(connectedAccountId: str, owner: str, repo: str, state: st
 
     print("\n\nListing GitHub issues\n\n")
 
-    url = "https://backend.composio.dev/api/v1/actions/github_list_issues/execute"
+    input_data = _list_github_issues_input(owner, repo, state, max_results)
+    response_json = composio_client.execute_action("github_list_issues", connectedAccountId, "github", input_data)
+
+    return _format_list_github_issues(response_json, owner, repo, state, max_results)
+
+
+async def list_github_issues_async(connectedAccountId: str, owner: str, repo: str, state: str = "open", max_results: int = 10) -> str:
+    """
+        Awaitable version of the `List GitHub Issues` tool for use from the bot's coroutines.
+    """
+
+    input_data = _list_github_issues_input(owner, repo, state, max_results)
+    response_json = await async_composio_client.execute_action("github_list_issues", connectedAccountId, "github", input_data)
+
+    return _format_list_github_issues(response_json, owner, repo, state, max_results)
+
 
+def _list_github_issues_input(owner: str, repo: str, state: str, max_results: int) -> dict:
     input_data = {
         "owner": owner,
         "repo": repo,
@@ -84,20 +80,10 @@ def list_github_issues(connectedAccountId: str, owner: str, repo: str, state: st
         "per_page": max_results
     }
 
-    payload = {
-        "connectedAccountId": connectedAccountId,
-        "appName": "github",
-        "input": input_data
-    }
-
-    headers = {
-        "X-API-Key": COMPOSIO_API_KEY,
-        "Content-Type": "application/json"
-    }
+    return input_data
 
-    response = requests.post(url, json=payload, headers=headers)
-    response_json = response.json()
 
+def _format_list_github_issues(response_json: dict, owner: str, repo: str, state: str, max_results: int) -> str:
     if response_json.get("executed"):
         issues = response_json.get("response", [])
         if issues:
@@ -128,27 +114,33 @@ def search_github_repos(connectedAccountId: str, query: str, max_results: int =
 
     print("\n\nSearching GitHub repositories\n\n")
 
-    url = "https://backend.composio.dev/api/v1/actions/github_search_repositories/execute"
+    input_data = _search_github_repos_input(query, max_results)
+    response_json = composio_client.execute_action("github_search_repositories", connectedAccountId, "github", input_data)
+
+    return _format_search_github_repos(response_json, max_results)
+
 
+async def search_github_repos_async(connectedAccountId: str, query: str, max_results: int = 10) -> str:
+    """
+        Awaitable version of the `Search GitHub Repositories` tool for use from the bot's coroutines.
+    """
+
+    input_data = _search_github_repos_input(query, max_results)
+    response_json = await async_composio_client.execute_action("github_search_repositories", connectedAccountId, "github", input_data)
+
+    return _format_search_github_repos(response_json, max_results)
+
+
+def _search_github_repos_input(query: str, max_results: int) -> dict:
     input_data = {
         "q": query,
         "per_page": max_results
     }
 
-    payload = {
-        "connectedAccountId": connectedAccountId,
-        "appName": "github",
-        "input": input_data
-    }
+    return input_data
 
-    headers = {
-        "X-API-Key": COMPOSIO_API_KEY,
-        "Content-Type": "application/json"
-    }
-
-    response = requests.post(url, json=payload, headers=headers)
-    response_json = response.json()
 
+def _format_search_github_repos(response_json: dict, max_results: int) -> str:
     if response_json.get("executed"):
         repos = response_json.get("response", {}).get("items", [])
         if repos:
@@ -183,8 +175,6 @@ def create_pull_request(connectedAccountId: str, owner: str, repo: str, title: s
 
     print("\n\nCreating pull request\n\n")
 
-    url = "https://backend.composio.dev/api/v1/actions/github_create_pull_request/execute"
-
     input_data = {
         "owner": owner,
         "repo": repo,
@@ -196,19 +186,7 @@ def create_pull_request(connectedAccountId: str, owner: str, repo: str, title: s
     if body is not None:
         input_data["body"] = body
 
-    payload = {
-        "connectedAccountId": connectedAccountId,
-        "appName": "github",
-        "input": input_data
-    }
-
-    headers = {
-        "X-API-Key": COMPOSIO_API_KEY,
-        "Content-Type": "application/json"
-    }
-
-    response = requests.post(url, json=payload, headers=headers)
-    response_json = response.json()
+    response_json = composio_client.execute_action("github_create_pull_request", connectedAccountId, "github", input_data)
 
     if response_json.get("executed"):
         pr_data = response_json.get("response", {})
@@ -233,26 +211,12 @@ def star_repository(connectedAccountId: str, owner: str, repo: str) -> str:
 
     print("\n\nStarring repository\n\n")
 
-    url = "https://backend.composio.dev/api/v1/actions/github_star_repository/execute"
-
     input_data = {
         "owner": owner,
         "repo": repo
     }
 
-    payload = {
-        "connectedAccountId": connectedAccountId,
-        "appName": "github",
-        "input": input_data
-    }
-
-    headers = {
-        "X-API-Key": COMPOSIO_API_KEY,
-        "Content-Type": "application/json"
-    }
-
-    response = requests.post(url, json=payload, headers=headers)
-    response_json = response.json()
+    response_json = composio_client.execute_action("github_star_repository", connectedAccountId, "github", input_data)
 
     if response_json.get("executed"):
         return f"⭐ Successfully starred {owner}/{repo}!"
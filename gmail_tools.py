@@ -1,11 +1,10 @@
 from crewai_tools import tool
-import requests
-import dotenv
-import os
+from utils.composio_client import composio_client, async_composio_client
 
 
-dotenv.load_dotenv()
-COMPOSIO_API_KEY = os.environ["COMPOSIO_API_KEY"]
+# Configuration
+EMAIL_PAGE_SIZE = 5  # Emails per page of `!emails` results
+EMAIL_SNIPPET_LENGTH = 300  # Characters of the preview shown per email on a page
 
 
 @tool("Send Email")
@@ -23,8 +22,6 @@ def send_email(connectedAccountId: str, to_email: str, subject: str, body: str,
 
     print("\n\nSending email\n\n")
 
-    url = "https://backend.composio.dev/api/v1/actions/gmail_send_email/execute"
-
     input_data = {
         "to_email": to_email,
         "subject": subject,
@@ -36,19 +33,7 @@ def send_email(connectedAccountId: str, to_email: str, subject: str, body: str,
     if bcc is not None:
         input_data["bcc"] = bcc
 
-    payload = {
-        "connectedAccountId": connectedAccountId,
-        "appName": "gmail",
-        "input": input_data
-    }
-
-    headers = {
-        "X-API-Key": COMPOSIO_API_KEY,
-        "Content-Type": "application/json"
-    }
-
-    response = requests.post(url, json=payload, headers=headers)
-    response_json = response.json()
+    response_json = composio_client.execute_action("gmail_send_email", connectedAccountId, "gmail", input_data)
 
     if response_json.get("executed"):
         return f"✅ Email sent successfully to {to_email}!"
@@ -70,27 +55,33 @@ def search_emails(connectedAccountId: str, query: str, max_results: int = 10) ->
 
     print("\n\nSearching emails\n\n")
 
-    url = "https://backend.composio.dev/api/v1/actions/gmail_search_emails/execute"
+    input_data = _search_emails_input(query, max_results)
+    response_json = composio_client.execute_action("gmail_search_emails", connectedAccountId, "gmail", input_data)
+
+    return _format_search_emails(response_json, max_results)
+
+
+async def search_emails_async(connectedAccountId: str, query: str, max_results: int = 10) -> str:
+    """
+        Awaitable version of the `Search Emails` tool for use from the bot's coroutines.
+    """
+
+    input_data = _search_emails_input(query, max_results)
+    response_json = await async_composio_client.execute_action("gmail_search_emails", connectedAccountId, "gmail", input_data)
+
+    return _format_search_emails(response_json, max_results)
 
+
+def _search_emails_input(query: str, max_results: int) -> dict:
     input_data = {
         "query": query,
         "max_results": max_results
     }
 
-    payload = {
-        "connectedAccountId": connectedAccountId,
-        "appName": "gmail",
-        "input": input_data
-    }
-
-    headers = {
-        "X-API-Key": COMPOSIO_API_KEY,
-        "Content-Type": "application/json"
-    }
+    return input_data
 
-    response = requests.post(url, json=payload, headers=headers)
-    response_json = response.json()
 
+def _format_search_emails(response_json: dict, max_results: int) -> str:
     if response_json.get("executed"):
         emails = response_json.get("response", {}).get("messages", [])
         if emails:
@@ -109,6 +100,64 @@ def search_emails(connectedAccountId: str, query: str, max_results: int = 10) ->
         return "❌ Something went wrong while searching emails."
 
 
+async def iter_email_pages_async(connectedAccountId: str, query: str, page_size: int = EMAIL_PAGE_SIZE):
+    """
+        Async generator over the pages of a Gmail search, as raw `gmail_search_emails` responses.
+        A page is only fetched when the consumer asks for it, by following the previous page's
+        `nextPageToken`, so only one page is held in memory however large the inbox is.
+
+        :param required connectedAccountId: The ID of the connected account.
+        :param required query: Search query (e.g., "from:someone@example.com", "is:unread").
+        :param optional page_size: Emails per page.
+    """
+
+    page_token = None
+    while True:
+        input_data = _search_emails_input(query, page_size)
+        if page_token is not None:
+            input_data["page_token"] = page_token
+
+        response_json = await async_composio_client.execute_action("gmail_search_emails", connectedAccountId, "gmail", input_data)
+        yield response_json
+
+        page_token = response_json.get("response", {}).get("nextPageToken") if response_json.get("executed") else None
+        if not page_token:
+            return
+
+
+def has_next_email_page(response_json: dict) -> bool:
+    return bool(response_json.get("executed") and response_json.get("response", {}).get("nextPageToken"))
+
+
+def format_email_page(response_json: dict, page_number: int, page_size: int = EMAIL_PAGE_SIZE) -> str:
+    """
+        Render one page of `iter_email_pages_async` for a Discord embed (at most 4096 characters).
+
+        :param required response_json: The page's response.
+        :param required page_number: 1-based number of the page, used to number the emails.
+        :param optional page_size: Emails per page.
+    """
+
+    if not response_json.get("executed"):
+        return _format_search_emails(response_json, page_size)
+
+    emails = response_json.get("response", {}).get("messages", [])
+    if not emails:
+        return "No emails found matching your search." if page_number == 1 else "No more emails."
+
+    email_list = []
+    first = (page_number - 1) * page_size + 1
+    for i, email in enumerate(emails[:page_size], start=first):
+        subject = email.get("subject", "No Subject")
+        sender = email.get("from", "Unknown")
+        snippet = email.get("snippet", "")
+        if len(snippet) > EMAIL_SNIPPET_LENGTH:
+            snippet = snippet[:EMAIL_SNIPPET_LENGTH] + "..."
+        email_list.append(f"**{i}. {subject}**\n**From:** {sender}\n{snippet}")
+
+    return "\n\n".join(email_list)[:4096]
+
+
 @tool("Get Unread Email Count")
 def get_unread_count(connectedAccountId: str) -> str:
     """
@@ -119,22 +168,22 @@ def get_unread_count(connectedAccountId: str) -> str:
 
     print("\n\nGetting unread email count\n\n")
 
-    url = "https://backend.composio.dev/api/v1/actions/gmail_get_profile/execute"
+    response_json = composio_client.execute_action("gmail_get_profile", connectedAccountId, "gmail", {})
 
-    payload = {
-        "connectedAccountId": connectedAccountId,
-        "appName": "gmail",
-        "input": {}
-    }
+    return _format_get_unread_count(response_json)
 
-    headers = {
-        "X-API-Key": COMPOSIO_API_KEY,
-        "Content-Type": "application/json"
-    }
 
-    response = requests.post(url, json=payload, headers=headers)
-    response_json = response.json()
+async def get_unread_count_async(connectedAccountId: str) -> str:
+    """
+        Awaitable version of the `Get Unread Email Count` tool for use from the bot's coroutines.
+    """
+
+    response_json = await async_composio_client.execute_action("gmail_get_profile", connectedAccountId, "gmail", {})
+
+    return _format_get_unread_count(response_json)
 
+
+def _format_get_unread_count(response_json: dict) -> str:
     if response_json.get("executed"):
         profile = response_json.get("response", {})
         email = profile.get("emailAddress", "your account")
@@ -158,27 +207,13 @@ def create_draft(connectedAccountId: str, to_email: str, subject: str, body: str
 
     print("\n\nCreating draft email\n\n")
 
-    url = "https://backend.composio.dev/api/v1/actions/gmail_create_draft/execute"
-
     input_data = {
         "to_email": to_email,
         "subject": subject,
         "body": body
     }
 
-    payload = {
-        "connectedAccountId": connectedAccountId,
-        "appName": "gmail",
-        "input": input_data
-    }
-
-    headers = {
-        "X-API-Key": COMPOSIO_API_KEY,
-        "Content-Type": "application/json"
-    }
-
-    response = requests.post(url, json=payload, headers=headers)
-    response_json = response.json()
+    response_json = composio_client.execute_action("gmail_create_draft", connectedAccountId, "gmail", input_data)
 
     if response_json.get("executed"):
         return f"📝 Draft email created successfully! You can review and send it from your Gmail."
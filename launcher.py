@@ -0,0 +1,143 @@
+"""
+    Run the bot sharded across several processes.
+
+    The launcher asks Discord how many shards the bot needs (or uses SHARD_COUNT), splits them
+    over BOT_PROCESSES bot processes, and starts `main.py` once per process with the shards it
+    owns. Agent runs go through the job queue to WORKER_PROCESSES `worker.py` processes, so the
+    gateway and the LLM workers scale separately. All processes share the account store, the
+    caches and the job queue through SQLite files under ./db.
+    A process that exits is restarted; Ctrl+C / SIGTERM stops all of them.
+
+    Usage: python launcher.py
+"""
+
+import math
+import os
+import signal
+import subprocess
+import sys
+import time
+import requests
+from dotenv import load_dotenv
+from utils.user_store import UserStore, USER_DB_PATH
+
+
+load_dotenv()
+DISCORD_BOT_TOKEN = os.getenv("DISCORD_BOT_TOKEN")
+SHARD_COUNT = os.getenv("SHARD_COUNT", "auto")  # Total number of shards, "auto" uses the count recommended by Discord
+BOT_PROCESSES = os.getenv("BOT_PROCESSES", "auto")  # Number of bot processes, "auto" uses one per CPU core
+SHARED_CACHE_PATH = os.getenv("SHARED_CACHE_PATH", "./db/cache.sqlite3")  # SQLite file the processes share cached responses through
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", "1"))  # Number of agent worker processes
+AGENT_WORKERS = int(os.getenv("AGENT_WORKERS", "4"))  # Agent runs executed concurrently, split over the worker processes
+RESTART_DELAY = 5  # Seconds before a process that exited is started again
+IDENTIFY_INTERVAL = 5  # Seconds Discord requires between two shard logins per concurrency bucket
+
+GATEWAY_BOT_URL = "https://discord.com/api/v10/gateway/bot"
+
+
+def gateway_info(token: str) -> tuple[int, int]:
+    """
+        The recommended shard count and the number of shards that may log in at the same time.
+
+        :param required token: The Discord bot token.
+    """
+
+    response = requests.get(GATEWAY_BOT_URL, headers={"Authorization": f"Bot {token}"}, timeout=10)
+    response.raise_for_status()
+    data = response.json()
+    return data["shards"], data.get("session_start_limit", {}).get("max_concurrency", 1)
+
+
+def plan_processes(shard_count: int, processes: int) -> list[list[int]]:
+    """
+        Split the shards over the processes, round-robin, so every process owns a similar number.
+
+        :param required shard_count: Total number of shards.
+        :param required processes: Number of bot processes. Capped at the number of shards.
+    """
+
+    processes = max(1, min(processes, shard_count))
+    return [list(range(shard_count))[index::processes] for index in range(processes)]
+
+
+def _prepare_shared_state():
+    """Create the databases and run the one-shot TinyDB import once, before the processes race for it."""
+
+    os.makedirs("./db", exist_ok=True)
+    user_store = UserStore(USER_DB_PATH)
+    if os.path.exists('./db/user.json') or os.path.exists('./db/temp_user.json'):
+        migrated_users, migrated_pending = user_store.migrate_from_tinydb('./db/user.json', './db/temp_user.json')
+        print(f"Migrated {migrated_users} users and {migrated_pending} pending users from TinyDB.")
+    user_store.close()
+
+
+def _start(name: str, script: str, env: dict) -> subprocess.Popen:
+    print(f"Starting {name}")
+    return subprocess.Popen([sys.executable, script], env=dict(os.environ, SHARED_CACHE_PATH=SHARED_CACHE_PATH, **env))
+
+
+def main():
+    if SHARD_COUNT == "auto":
+        shard_count, max_concurrency = gateway_info(DISCORD_BOT_TOKEN)
+    else:
+        shard_count, max_concurrency = int(SHARD_COUNT), 1
+    processes = (os.cpu_count() or 1) if BOT_PROCESSES == "auto" else int(BOT_PROCESSES)
+
+    plan = plan_processes(shard_count, processes)
+    agent_workers = math.ceil(AGENT_WORKERS / WORKER_PROCESSES)
+    print(f"Running {shard_count} shards in {len(plan)} bot processes, and {WORKER_PROCESSES} worker processes with {agent_workers} agent workers each.")
+
+    # name -> (script, environment) of every process to keep running
+    specs = {}
+    for shard_ids in plan:
+        shards = ",".join(str(shard_id) for shard_id in shard_ids)
+        specs[f"bot process for shards {shards} of {shard_count}"] = ("main.py", {"SHARD_COUNT": str(shard_count), "SHARD_IDS": shards, "AGENT_MODE": "queue"})
+    for index in range(WORKER_PROCESSES):
+        # Stable worker IDs let a restarted worker requeue the jobs it was running right away
+        specs[f"worker process {index}"] = ("worker.py", {"WORKER_ID": f"worker-{index}", "AGENT_WORKERS": str(agent_workers)})
+
+    _prepare_shared_state()
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    children = {}
+    for name, (script, env) in specs.items():
+        if stopping:
+            break
+        children[name] = _start(name, script, env)
+        # Stagger the bot processes so their shard logins do not exceed Discord's identify rate
+        if "SHARD_IDS" in env:
+            time.sleep(IDENTIFY_INTERVAL * math.ceil(len(env["SHARD_IDS"].split(",")) / max_concurrency))
+
+    # name -> monotonic time at which an exited process is started again, so one crash does not delay noticing the others
+    restart_at = {}
+    while not stopping:
+        time.sleep(1)
+        now = time.monotonic()
+        for name, child in list(children.items()):
+            if stopping:
+                break
+            if name in restart_at:
+                if now >= restart_at[name]:
+                    del restart_at[name]
+                    children[name] = _start(name, *specs[name])
+            elif child.poll() is not None:
+                print(f"{name} exited with code {child.returncode}, restarting in {RESTART_DELAY}s")
+                restart_at[name] = now + RESTART_DELAY
+
+    for child in children.values():
+        if child.poll() is None:
+            child.terminate()
+    for child in children.values():
+        child.wait()
+
+
+if __name__ == "__main__":
+    main()
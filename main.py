@@ -1,19 +1,38 @@
+import asyncio
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord.ui import Button, Select, View, Modal, TextInput
 import os
 from dotenv import load_dotenv
-from tinydb import TinyDB, Query
-import requests 
-import json
 from utils.manage_events import manage_events
-from utils.manage_multi_service import manage_multi_service
+from utils.manage_multi_service import manage_multi_service, agent_registry, SERVICE_TOOLS
+from tools import list_upcoming_events_async, list_todays_events_async
+from gmail_tools import iter_email_pages_async, format_email_page, has_next_email_page, get_unread_count_async
+from utils.job_executor import JobExecutor, AdmissionRejected
+from utils.composio_client import composio_client, async_composio_client
+from utils.resilience import resilience_metrics
+from utils.rate_limit import rate_limiter
+from utils.response_cache import response_cache
+from utils.intent_router import intent_router
+from utils.intent_cache import intent_cache
+from utils.progress import ProgressReporter, StatusEditCoalescer, STATUS_EDIT_INTERVAL
+from utils.calendar import calendar_clients, invalidate_calendar
+from utils.calendar_mirror import calendar_mirror
+from utils.slack_directory import slack_directory
+from utils.shared_cache import shared_cache, SHARED_CACHE_SWEEP_INTERVAL
+from utils.user_store import UserStore, USER_DB_PATH, PENDING_ACCOUNT_TTL
+from utils.job_queue import JobQueue
 
 
 load_dotenv()
 DISCORD_BOT_TOKEN = os.getenv("DISCORD_BOT_TOKEN")
 INTEGRATION_ID = os.getenv("INTEGRATION_ID")
-COMPOSIO_API_KEY = os.getenv("COMPOSIO_API_KEY")
+AGENT_WORKERS = int(os.getenv("AGENT_WORKERS", "4")) # Number of agent runs executed concurrently
+AGENT_PREWARM = os.getenv("AGENT_PREWARM", "true").lower() == "true" # Build the service agents at startup instead of on first use
+PENDING_SWEEP_INTERVAL = float(os.getenv("PENDING_SWEEP_INTERVAL", "600")) # Seconds between two sweeps of expired pending accounts
+SHARD_COUNT = os.getenv("SHARD_COUNT") # Total number of shards, set by launcher.py when the bot runs as several processes
+SHARD_IDS = os.getenv("SHARD_IDS") # Comma separated shards this process runs, set by launcher.py
+AGENT_MODE = os.getenv("AGENT_MODE", "inline").lower() # "inline" runs agents in this process, "queue" hands them to worker.py processes
 
 
 # Create a database to store user data
@@ -21,21 +40,128 @@ COMPOSIO_API_KEY = os.getenv("COMPOSIO_API_KEY")
 if not os.path.exists('./db'):
     os.makedirs('./db')
 
-if not os.path.exists('./db/temp_user.json'):
-    with open('./db/temp_user.json', 'w') as f:
-        f.close()
+user_store = UserStore(USER_DB_PATH)
 
-if not os.path.exists('./db/user.json'):
-    with open('./db/user.json', 'w') as f:
-        f.close()
+# Durable queue the agent jobs go through when they are run by separate worker processes
+job_queue = JobQueue() if AGENT_MODE == "queue" else None
 
+# The workers invalidate the dashboard results of the users they ran jobs for through the shared cache
+if AGENT_MODE == "queue" and shared_cache is None:
+    raise SystemExit("AGENT_MODE=queue needs SHARED_CACHE_PATH, set to the same file as for worker.py.")
 
-temp_user_db = TinyDB('./db/temp_user.json') # Temporary database to store user data for the current session
-user_db = TinyDB('./db/user.json')
+# One-shot import of the TinyDB files used by earlier versions
+if os.path.exists('./db/user.json') or os.path.exists('./db/temp_user.json'):
+    migrated_users, migrated_pending = user_store.migrate_from_tinydb('./db/user.json', './db/temp_user.json')
+    print(f"Migrated {migrated_users} users and {migrated_pending} pending users from TinyDB.")
 
 intents = discord.Intents.default()
 intents.message_content = True
-bot = commands.Bot(command_prefix='!', intents=intents)
+if SHARD_COUNT:
+    # Sharded deployment (see launcher.py): this process runs only its own shards
+    shard_ids = [int(shard_id) for shard_id in SHARD_IDS.split(",")] if SHARD_IDS else None
+    bot = commands.AutoShardedBot(command_prefix='!', intents=intents, shard_count=int(SHARD_COUNT), shard_ids=shard_ids)
+else:
+    bot = commands.Bot(command_prefix='!', intents=intents)
+
+# Agent runs are blocking, so they are executed on a worker pool instead of the event loop
+job_executor = JobExecutor(max_workers=AGENT_WORKERS)
+agents_warmed = False
+
+
+async def run_agent_with_progress(user_id, status_msg, processing_embed, func, *args, **kwargs):
+    """
+        Run an agent job on the worker pool while streaming its step events into `status_msg`.
+        Edits are coalesced so the message is updated at most once every `STATUS_EDIT_INTERVAL` seconds.
+    """
+
+    def progress_embed(lines):
+        embed = processing_embed.copy()
+        embed.description = f"{processing_embed.description}\n\n" + "\n".join(lines)
+        return embed
+
+    coalescer = StatusEditCoalescer(status_msg, progress_embed)
+    reporter = ProgressReporter(coalescer.push_threadsafe)
+
+    try:
+        job = job_executor.enqueue(user_id, func, *args, progress=reporter, **kwargs)
+    except AdmissionRejected:
+        await coalescer.close()
+        raise
+
+    watcher = asyncio.create_task(show_queue_position(job, coalescer))
+    try:
+        return await job.future
+    finally:
+        watcher.cancel()
+        await coalescer.close()
+        # The agent may have written, so the user's dashboard results are stale
+        await asyncio.to_thread(intent_cache.invalidate, user_id)
+
+
+def queue_position_line(position, eta):
+    line = f"🕒 You are #{position} in queue"
+    if eta is None:
+        return line
+    return line + (", starting now" if eta < 1 else f", about {eta:.0f}s until it starts")
+
+
+async def show_queue_position(job, coalescer):
+    """Keep the status message's queue position up to date until the job starts."""
+
+    while True:
+        position = job_executor.position(job)
+        if position is None:
+            coalescer.set_status(None)
+            return
+        coalescer.set_status(queue_position_line(*position))
+        await asyncio.sleep(STATUS_EDIT_INTERVAL)
+
+
+def rejected_embed(reason):
+    return discord.Embed(
+        title="🚦 Request Not Accepted",
+        description=reason,
+        color=discord.Color.red()
+    )
+
+
+async def run_agent(user_id, status_msg, processing_embed, result_embed, service, connected_account_id, message):
+    """
+        Run the agent of a service command and show its reply in `status_msg` using `result_embed`.
+        With `AGENT_MODE=queue` the job is put in the job queue instead, and the worker running it
+        posts progress and reply into `status_msg` itself, even if this process restarts meanwhile.
+    """
+
+    if AGENT_MODE == "queue":
+        # Edit before enqueuing, so this edit can never overwrite the worker's first progress update
+        position = await asyncio.to_thread(job_queue.wait_estimate, AGENT_WORKERS)
+        queued_embed = processing_embed.copy()
+        queued_embed.description = f"{processing_embed.description}\n\n{queue_position_line(*position)}"
+        await status_msg.edit(embed=queued_embed)
+
+        reply = {
+            "channel_id": status_msg.channel.id,
+            "message_id": status_msg.id,
+            "processing": processing_embed.to_dict(),
+            "result": result_embed.to_dict(),
+        }
+        try:
+            await asyncio.to_thread(job_queue.enqueue, user_id, service, connected_account_id, message, reply)
+        except AdmissionRejected as e:
+            await status_msg.edit(embed=rejected_embed(str(e)))
+        return
+
+    try:
+        if service == "calendar":
+            response = await run_agent_with_progress(user_id, status_msg, processing_embed, manage_events, connected_account_id, message)
+        else:
+            response = await run_agent_with_progress(user_id, status_msg, processing_embed, manage_multi_service, connected_account_id, message, service=service)
+    except AdmissionRejected as e:
+        await status_msg.edit(embed=rejected_embed(str(e)))
+        return
+
+    result_embed.description = response
+    await status_msg.edit(embed=result_embed)
 
 
 # ===== Interactive UI Components =====
@@ -85,7 +211,7 @@ class CalendarActionView(View):
             return
         
         await interaction.response.defer()
-        response = manage_events(self.connected_account_id, "List my next 10 upcoming events")
+        response = await intent_cache.get_or_fetch(self.user_id, "upcoming", lambda: list_upcoming_events_async(self.connected_account_id, max_results=10))
         
         embed = discord.Embed(
             title="📅 Your Upcoming Events",
@@ -101,7 +227,7 @@ class CalendarActionView(View):
             return
         
         await interaction.response.defer()
-        response = manage_events(self.connected_account_id, "Show me all events today")
+        response = await intent_cache.get_or_fetch(self.user_id, "today", lambda: list_todays_events_async(self.connected_account_id))
         
         embed = discord.Embed(
             title="📆 Today's Events",
@@ -164,14 +290,18 @@ class CreateEventModal(Modal, title="Create Calendar Event"):
         if self.attendees.value:
             prompt += f" with attendees {self.attendees.value}"
         
-        response = manage_events(self.connected_account_id, prompt)
-        
-        embed = discord.Embed(
+        processing_embed = discord.Embed(
+            title="⏳ Processing...",
+            description="Creating your event...",
+            color=discord.Color.orange()
+        )
+        status_msg = await interaction.followup.send(embed=processing_embed, wait=True)
+
+        result_embed = discord.Embed(
             title="✅ Event Creation",
-            description=response,
             color=discord.Color.green()
         )
-        await interaction.followup.send(embed=embed)
+        await run_agent(interaction.user.id, status_msg, processing_embed, result_embed, "calendar", self.connected_account_id, prompt)
 
 
 class QuickActionsView(View):
@@ -202,7 +332,7 @@ class QuickActionsView(View):
             return
         
         await interaction.response.defer()
-        response = manage_multi_service(self.connected_account_id, "Check my unread emails count", service="gmail")
+        response = await intent_cache.get_or_fetch(self.user_id, "unread", lambda: get_unread_count_async(self.connected_account_id))
         
         embed = discord.Embed(
             title="📧 Gmail Status",
@@ -308,7 +438,8 @@ class HelpView(View):
                 title="📧 Gmail Commands",
                 description=(
                     "**Command:**\n"
-                    "• `!gmail <message>` - Manage your Gmail\n\n"
+                    "• `!gmail <message>` - Manage your Gmail\n"
+                    "• `!emails <query>` - Search your inbox page by page\n\n"
                     "**Examples:**\n"
                     "• Send an email to john@example.com with subject 'Meeting'\n"
                     "• Search for emails from sarah@example.com\n"
@@ -389,10 +520,93 @@ class ConfirmView(View):
         self.stop()
 
 
+class EmailSearchView(View):
+    """Pages through `!emails` results, fetching the next page only when "Next" is clicked"""
+    def __init__(self, user_id, query, pages):
+        super().__init__(timeout=300)
+        self.user_id = user_id
+        self.query = query
+        self.pages = pages
+        self.page_number = 0
+        # The page generator must not be resumed while it is fetching, e.g. on a double click
+        self.pages_lock = asyncio.Lock()
+
+    async def next_page_embed(self) -> discord.Embed:
+        """Fetch the next page and render it, disabling "Next" on the last page."""
+
+        response_json = await anext(self.pages)
+        self.page_number += 1
+        self.next_button.disabled = not has_next_email_page(response_json)
+
+        return discord.Embed(
+            title=f"📧 Emails matching `{self.query}`",
+            description=format_email_page(response_json, self.page_number),
+            color=discord.Color.red()
+        ).set_footer(text=f"Page {self.page_number}")
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.primary, emoji="➡️")
+    async def next_button(self, interaction: discord.Interaction, button: Button):
+        if interaction.user.id != self.user_id:
+            await interaction.response.send_message("These are not your search results!", ephemeral=True)
+            return
+
+        await interaction.response.defer()
+        async with self.pages_lock:
+            # A click queued behind the last page or the timeout finds the generator closed
+            if self.is_finished():
+                return
+            embed = await self.next_page_embed()
+            await interaction.edit_original_response(embed=embed, view=self if not self.next_button.disabled else None)
+            if self.next_button.disabled:
+                self.stop()
+                await self.pages.aclose()
+
+    async def on_timeout(self):
+        async with self.pages_lock:
+            await self.pages.aclose()
+
+
+@tasks.loop(seconds=PENDING_SWEEP_INTERVAL)
+async def expire_pending_accounts():
+    """
+        Drop `!create_account` attempts that were never used within `PENDING_ACCOUNT_TTL` seconds.
+    """
+
+    expired = await asyncio.to_thread(user_store.expire_pending, PENDING_ACCOUNT_TTL)
+    if expired:
+        print(f"Expired {expired} pending accounts.")
+
+
+@tasks.loop(seconds=SHARED_CACHE_SWEEP_INTERVAL)
+async def purge_shared_cache():
+    """
+        Delete expired entries of the cache shared between bot processes.
+    """
+
+    await asyncio.to_thread(shared_cache.purge)
+
+
 # ===== Bot Events =====
 
 @bot.event
 async def on_ready():
+    global agents_warmed
+
+    # Build the single-service agents once, off the event loop, so the first requests don't pay for it
+    # In queue mode the agents run in the worker processes, which build them there
+    if AGENT_PREWARM and AGENT_MODE != "queue" and not agents_warmed:
+        agents_warmed = True
+        await asyncio.to_thread(agent_registry.warm, [[service] for service in SERVICE_TOOLS])
+
+    if not expire_pending_accounts.is_running():
+        expire_pending_accounts.start()
+
+    if shared_cache is not None and not purge_shared_cache.is_running():
+        purge_shared_cache.start()
+
+    if SHARD_COUNT:
+        print(f"Running shards {bot.shard_ids} of {bot.shard_count}.")
+
     # keeps track of how many guilds / servers the bot is associated with.
     guild_count = 0
 
@@ -416,24 +630,15 @@ async def _create_account(ctx):
         Create an account and save `user_id` and `connected_account_id` in the database.
     """
 
-    url = "https://backend.composio.dev/api/v1/connectedAccounts"
     user_id = ctx.author.id
 
     # Check if the user already has an account
-    Account = Query()
-    is_account = user_db.search(Account.user_id == user_id)
-
-    if not is_account:
-        payload = {"integrationId": INTEGRATION_ID}
-        headers = {
-            "X-API-Key": COMPOSIO_API_KEY,
-            "Content-Type": "application/json"
-        }
+    connected_account_id = await asyncio.to_thread(user_store.get, user_id)
 
-        response = requests.post(url, headers=headers, data=json.dumps(payload))
-        response_data = json.loads(response.text)
+    if connected_account_id is None:
+        response_data = await async_composio_client.create_connected_account(INTEGRATION_ID)
 
-        temp_user_db.insert({"user_id": user_id, "connected_account_id": response_data["connectedAccountId"]})
+        await asyncio.to_thread(user_store.create_pending, user_id, response_data["connectedAccountId"])
 
         embed = discord.Embed(
             title="🎉 Account Creation",
@@ -473,24 +678,19 @@ async def _authenticate(ctx):
         Create an new account again (because authentication credentials might be expired) and save `user_id` and `connected_account_id` in the database.
     """
 
-    url = "https://backend.composio.dev/api/v1/connectedAccounts"
     user_id = ctx.author.id
 
     # Check if the user already has an account
-    Account = Query()
-    is_account = user_db.search(Account.user_id == user_id)
-
-    if is_account:
-        payload = {"integrationId": INTEGRATION_ID}
-        headers = {
-            "X-API-Key": COMPOSIO_API_KEY,
-            "Content-Type": "application/json"
-        }
+    connected_account_id = await asyncio.to_thread(user_store.get, user_id)
 
-        response = requests.post(url, headers=headers, data=json.dumps(payload))
-        response_data = json.loads(response.text)
+    if connected_account_id is not None:
+        response_data = await async_composio_client.create_connected_account(INTEGRATION_ID)
 
-        user_db.update({"connected_account_id": response_data["connectedAccountId"]}, Account.user_id == user_id)
+        await asyncio.to_thread(user_store.start_reauth, user_id, response_data["connectedAccountId"])
+        # The old connection's credentials are about to be replaced
+        invalidate_calendar(connected_account_id)
+        calendar_mirror.invalidate(connected_account_id)
+        slack_directory.invalidate(connected_account_id)
 
         embed = discord.Embed(
             title="🔄 Re-authentication",
@@ -530,25 +730,16 @@ async def _calendar(ctx, *, message: str):
     user_id = ctx.author.id
 
     # Check if the user has an account
-    Account = Query()
-    is_account = user_db.search(Account.user_id == user_id)
-
-    if not is_account:
-        is_temp_account = temp_user_db.search(Account.user_id == user_id)
-
-        if not is_temp_account:
-            embed = discord.Embed(
-                title="❌ No Account",
-                description="You don't have an account yet. Please create one using `!create_account`.",
-                color=discord.Color.red()
-            )
-            await ctx.send(embed=embed)
-            return
+    connected_account_id = await asyncio.to_thread(user_store.resolve, user_id)
 
-        else:
-            # Move the temporary account to the main database
-            user_db.insert(is_temp_account[0])
-            temp_user_db.remove(Account.user_id == user_id)
+    if connected_account_id is None:
+        embed = discord.Embed(
+            title="❌ No Account",
+            description="You don't have an account yet. Please create one using `!create_account`.",
+            color=discord.Color.red()
+        )
+        await ctx.send(embed=embed)
+        return
 
     processing_embed = discord.Embed(
         title="⏳ Processing...",
@@ -557,16 +748,11 @@ async def _calendar(ctx, *, message: str):
     )
     status_msg = await ctx.send(embed=processing_embed)
 
-    connected_account_id = user_db.search(Account.user_id == user_id)[0]["connected_account_id"]
-
-    response = manage_events(connected_account_id, message)
-    
     result_embed = discord.Embed(
         title="📅 Calendar Result",
-        description=response,
         color=discord.Color.green()
     )
-    await status_msg.edit(embed=result_embed)
+    await run_agent(user_id, status_msg, processing_embed, result_embed, "calendar", connected_account_id, message)
 
 
 @bot.command(name='upcoming')
@@ -578,10 +764,9 @@ async def _upcoming(ctx, count: int = 10):
     user_id = ctx.author.id
 
     # Check if the user has an account
-    Account = Query()
-    is_account = user_db.search(Account.user_id == user_id)
+    connected_account_id = await asyncio.to_thread(user_store.resolve, user_id)
 
-    if not is_account:
+    if connected_account_id is None:
         embed = discord.Embed(
             title="❌ No Account",
             description="You don't have an account yet. Please create one using `!create_account`.",
@@ -597,9 +782,7 @@ async def _upcoming(ctx, count: int = 10):
     )
     status_msg = await ctx.send(embed=processing_embed)
 
-    connected_account_id = user_db.search(Account.user_id == user_id)[0]["connected_account_id"]
-
-    response = manage_events(connected_account_id, f"List my next {count} upcoming events")
+    response = await list_upcoming_events_async(connected_account_id, max_results=count)
     
     result_embed = discord.Embed(
         title=f"📅 Your Next {count} Events",
@@ -625,10 +808,13 @@ async def _help(ctx):
             "• `!service_menu` - Choose service with dropdown\n\n"
             "**Account Management:**\n"
             "• `!create_account` - Create and connect services\n"
-            "• `!authenticate` - Re-authenticate services\n\n"
+            "• `!authenticate` - Re-authenticate services\n"
+            "• `!queue` - Show agent queue status\n"
+            "• `!health` - Show connected service health\n\n"
             "**Services:**\n"
             "📅 `!calendar <msg>` - Calendar management\n"
             "📧 `!gmail <msg>` - Email management\n"
+            "🔎 `!emails <query>` - Paged inbox search\n"
             "🐙 `!github <msg>` - GitHub operations\n"
             "💬 `!slack <msg>` - Slack messaging\n"
             "🤖 `!ai <msg>` - AI multi-service\n\n"
@@ -650,10 +836,9 @@ async def _gmail(ctx, *, message: str):
     user_id = ctx.author.id
 
     # Check if the user has an account
-    Account = Query()
-    is_account = user_db.search(Account.user_id == user_id)
+    connected_account_id = await asyncio.to_thread(user_store.resolve, user_id)
 
-    if not is_account:
+    if connected_account_id is None:
         embed = discord.Embed(
             title="❌ No Account",
             description="You don't have an account yet. Please create one using `!create_account` and authenticate with Gmail.",
@@ -669,16 +854,41 @@ async def _gmail(ctx, *, message: str):
     )
     status_msg = await ctx.send(embed=processing_embed)
 
-    connected_account_id = user_db.search(Account.user_id == user_id)[0]["connected_account_id"]
-
-    response = manage_multi_service(connected_account_id, message, service="gmail")
-    
     result_embed = discord.Embed(
         title="📧 Gmail Result",
-        description=response,
         color=discord.Color.red()
     )
-    await status_msg.edit(embed=result_embed)
+    await run_agent(user_id, status_msg, processing_embed, result_embed, "gmail", connected_account_id, message)
+
+
+@bot.command(name='emails')
+async def _emails(ctx, *, query: str):
+    """
+        Search Gmail and page through the results without going through the agent.
+    """
+
+    user_id = ctx.author.id
+
+    # Check if the user has an account
+    connected_account_id = await asyncio.to_thread(user_store.resolve, user_id)
+
+    if connected_account_id is None:
+        embed = discord.Embed(
+            title="❌ No Account",
+            description="You don't have an account yet. Please create one using `!create_account` and authenticate with Gmail.",
+            color=discord.Color.red()
+        )
+        await ctx.send(embed=embed)
+        return
+
+    view = EmailSearchView(user_id, query, iter_email_pages_async(connected_account_id, query))
+    embed = await view.next_page_embed()
+    if view.next_button.disabled:
+        view.stop()
+        await view.pages.aclose()
+        await ctx.send(embed=embed)
+    else:
+        await ctx.send(embed=embed, view=view)
 
 
 @bot.command(name='github')
@@ -690,10 +900,9 @@ async def _github(ctx, *, message: str):
     user_id = ctx.author.id
 
     # Check if the user has an account
-    Account = Query()
-    is_account = user_db.search(Account.user_id == user_id)
+    connected_account_id = await asyncio.to_thread(user_store.resolve, user_id)
 
-    if not is_account:
+    if connected_account_id is None:
         embed = discord.Embed(
             title="❌ No Account",
             description="You don't have an account yet. Please create one using `!create_account` and authenticate with GitHub.",
@@ -709,16 +918,11 @@ async def _github(ctx, *, message: str):
     )
     status_msg = await ctx.send(embed=processing_embed)
 
-    connected_account_id = user_db.search(Account.user_id == user_id)[0]["connected_account_id"]
-
-    response = manage_multi_service(connected_account_id, message, service="github")
-    
     result_embed = discord.Embed(
         title="🐙 GitHub Result",
-        description=response,
         color=discord.Color.dark_gray()
     )
-    await status_msg.edit(embed=result_embed)
+    await run_agent(user_id, status_msg, processing_embed, result_embed, "github", connected_account_id, message)
 
 
 @bot.command(name='slack')
@@ -730,10 +934,9 @@ async def _slack(ctx, *, message: str):
     user_id = ctx.author.id
 
     # Check if the user has an account
-    Account = Query()
-    is_account = user_db.search(Account.user_id == user_id)
+    connected_account_id = await asyncio.to_thread(user_store.resolve, user_id)
 
-    if not is_account:
+    if connected_account_id is None:
         embed = discord.Embed(
             title="❌ No Account",
             description="You don't have an account yet. Please create one using `!create_account` and authenticate with Slack.",
@@ -749,16 +952,11 @@ async def _slack(ctx, *, message: str):
     )
     status_msg = await ctx.send(embed=processing_embed)
 
-    connected_account_id = user_db.search(Account.user_id == user_id)[0]["connected_account_id"]
-
-    response = manage_multi_service(connected_account_id, message, service="slack")
-    
     result_embed = discord.Embed(
         title="💬 Slack Result",
-        description=response,
         color=discord.Color.purple()
     )
-    await status_msg.edit(embed=result_embed)
+    await run_agent(user_id, status_msg, processing_embed, result_embed, "slack", connected_account_id, message)
 
 
 @bot.command(name='ai')
@@ -770,10 +968,9 @@ async def _ai(ctx, *, message: str):
     user_id = ctx.author.id
 
     # Check if the user has an account
-    Account = Query()
-    is_account = user_db.search(Account.user_id == user_id)
+    connected_account_id = await asyncio.to_thread(user_store.resolve, user_id)
 
-    if not is_account:
+    if connected_account_id is None:
         embed = discord.Embed(
             title="❌ No Account",
             description="You don't have an account yet. Please create one using `!create_account`.",
@@ -789,16 +986,11 @@ async def _ai(ctx, *, message: str):
     )
     status_msg = await ctx.send(embed=processing_embed)
 
-    connected_account_id = user_db.search(Account.user_id == user_id)[0]["connected_account_id"]
-
-    response = manage_multi_service(connected_account_id, message, service="all")
-    
     result_embed = discord.Embed(
         title="🤖 AI Result",
-        description=response,
         color=discord.Color.gold()
     )
-    await status_msg.edit(embed=result_embed)
+    await run_agent(user_id, status_msg, processing_embed, result_embed, "all", connected_account_id, message)
 
 
 @bot.command(name='dashboard')
@@ -808,10 +1000,9 @@ async def _dashboard(ctx):
     """
     
     user_id = ctx.author.id
-    Account = Query()
-    is_account = user_db.search(Account.user_id == user_id)
+    connected_account_id = await asyncio.to_thread(user_store.resolve, user_id)
     
-    if not is_account:
+    if connected_account_id is None:
         embed = discord.Embed(
             title="❌ No Account",
             description="You need to create an account first!\nUse `!create_account` to get started.",
@@ -820,8 +1011,6 @@ async def _dashboard(ctx):
         await ctx.send(embed=embed)
         return
     
-    connected_account_id = user_db.search(Account.user_id == user_id)[0]["connected_account_id"]
-    
     embed = discord.Embed(
         title="🎛️ Your Dashboard",
         description=(
@@ -846,10 +1035,9 @@ async def _calendar_menu(ctx):
     """
     
     user_id = ctx.author.id
-    Account = Query()
-    is_account = user_db.search(Account.user_id == user_id)
+    connected_account_id = await asyncio.to_thread(user_store.resolve, user_id)
     
-    if not is_account:
+    if connected_account_id is None:
         embed = discord.Embed(
             title="❌ No Account",
             description="You need to create an account first!\nUse `!create_account` to get started.",
@@ -858,8 +1046,6 @@ async def _calendar_menu(ctx):
         await ctx.send(embed=embed)
         return
     
-    connected_account_id = user_db.search(Account.user_id == user_id)[0]["connected_account_id"]
-    
     embed = discord.Embed(
         title="📅 Calendar Quick Actions",
         description=(
@@ -883,10 +1069,9 @@ async def _service_menu(ctx):
     """
     
     user_id = ctx.author.id
-    Account = Query()
-    is_account = user_db.search(Account.user_id == user_id)
+    connected_account_id = await asyncio.to_thread(user_store.resolve, user_id)
     
-    if not is_account:
+    if connected_account_id is None:
         embed = discord.Embed(
             title="❌ No Account",
             description="You need to create an account first!\nUse `!create_account` to get started.",
@@ -912,4 +1097,97 @@ async def _service_menu(ctx):
     await ctx.send(embed=embed, view=view)
 
 
+@bot.command(name='queue')
+async def _queue(ctx):
+    """
+        Show how busy the agent worker pool is.
+    """
+
+    routes = ", ".join(f"{route} ×{count}" for route, count in sorted(intent_router.stats().items())) or "none yet"
+
+    if AGENT_MODE == "queue":
+        stats = await asyncio.to_thread(job_queue.stats)
+        depth = await asyncio.to_thread(job_queue.queue_depth, ctx.author.id)
+        embed = discord.Embed(
+            title="📊 Agent Queue",
+            description=(
+                f"**Running:** {stats['running']} jobs on the worker processes\n"
+                f"**Waiting:** {stats['queued']} jobs from {stats['queued_users']} users\n"
+                f"**Your waiting jobs:** {depth}\n"
+                f"**Rejected here:** {job_queue.rejected}\n"
+                f"**`!ai` routes:** {routes}"
+            ),
+            color=discord.Color.blurple()
+        )
+        await ctx.send(embed=embed)
+        return
+
+    stats = job_executor.stats()
+
+    embed = discord.Embed(
+        title="📊 Agent Queue",
+        description=(
+            f"**Running:** {stats['running']}/{stats['workers']} workers\n"
+            f"**Waiting:** {stats['queued']} jobs from {stats['queued_users']} users\n"
+            f"**Your waiting jobs:** {job_executor.queue_depth(ctx.author.id)}\n"
+            f"**Average wait:** {stats['avg_wait']:.1f}s (max {stats['max_wait']:.1f}s)\n"
+            f"**Average run:** {stats['avg_run']:.1f}s\n"
+            f"**Completed:** {stats['completed']} ({stats['rejected']} rejected)\n"
+            f"**`!ai` routes:** {routes}"
+        ),
+        color=discord.Color.blurple()
+    )
+    await ctx.send(embed=embed)
+
+
+@bot.command(name='health')
+async def _health(ctx):
+    """
+        Show the state of the connected services (circuit breakers and retry counters).
+    """
+
+    metrics = resilience_metrics.snapshot()
+    state_emoji = {"closed": "🟢", "half_open": "🟡", "open": "🔴"}
+
+    breakers = "\n".join(
+        f"{state_emoji.get(state, '⚪')} **{app}** - {state.replace('_', ' ')}"
+        for app, state in sorted(metrics["breakers"].items())
+    ) or "No service has been called yet."
+    retries = sum(metrics["retries"].values())
+    failures = sum(metrics["failures"].values())
+    short_circuits = sum(metrics["short_circuits"].values())
+    throttling = rate_limiter.snapshot()
+    throttled = ", ".join(
+        f"{app} {count} ({throttling['throttle_time'][app]:.1f}s)" for app, count in sorted(throttling["throttled"].items())
+    ) or "none"
+    coalesced = composio_client.single_flight.shared + async_composio_client.single_flight.shared
+    clients = calendar_clients.stats()
+    mirror = calendar_mirror.stats()
+    responses = response_cache.stats()
+    intents = intent_cache.stats()
+
+    embed = discord.Embed(
+        title="🩺 Service Health",
+        description=(
+            f"{breakers}\n\n"
+            f"**Retries:** {retries}\n"
+            f"**Failed requests:** {failures}\n"
+            f"**Rejected while unavailable:** {short_circuits}\n"
+            f"**Paced by rate limits:** {throttled}\n"
+            f"**Coalesced duplicate requests:** {coalesced}\n"
+            f"**Calendar clients cached:** {clients['size']} ({clients['hits']} hits, {clients['misses']} misses)\n"
+            f"**Calendar mirror:** {mirror['accounts']} accounts, {mirror['hits']} local reads, {mirror['fallbacks']} live fallbacks\n"
+            f"**Cached responses:** {responses['size']} ({responses['hits']} hits, {responses['misses']} misses, {responses['invalidated']} invalidations)\n"
+            f"**Dashboard results reused:** {intents['hits']} of {intents['hits'] + intents['misses']}"
+        ),
+        color=discord.Color.blurple()
+    )
+    if shared_cache is not None:
+        shared = await asyncio.to_thread(shared_cache.stats)
+        embed.description += f"\n**Shared cache:** {shared['size']} entries ({shared['hits']} hits, {shared['misses']} misses in this process)"
+    if SHARD_COUNT:
+        embed.description += f"\n**Shards:** {', '.join(str(shard_id) for shard_id in bot.shard_ids)} of {bot.shard_count}"
+    await ctx.send(embed=embed)
+
+
 bot.run(DISCORD_BOT_TOKEN)
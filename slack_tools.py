@@ -1,12 +1,9 @@
+import asyncio
 from crewai_tools import tool
-import requests
-import dotenv
-import os
+from utils.composio_client import composio_client
+from utils.slack_directory import slack_directory
 
 
-dotenv.load_dotenv()
-COMPOSIO_API_KEY = os.environ["COMPOSIO_API_KEY"]
-
 # Configuration
 MAX_CHANNELS_TO_LIST = 20  # Maximum number of channels to display
 
@@ -19,30 +16,18 @@ def send_slack_message(connectedAccountId: str, channel: str, text: str) -> str:
         :param required connectedAccountId: The ID of the connected account.
         :param required channel: Channel ID or name (e.g., "#general" or "C1234567890").
         :param required text: Message text to send.
+
+        Channel names are resolved to IDs automatically, there is no need to list the channels first.
     """
 
     print("\n\nSending Slack message\n\n")
 
-    url = "https://backend.composio.dev/api/v1/actions/slack_send_message/execute"
-
     input_data = {
-        "channel": channel,
+        "channel": slack_directory.resolve_channel(connectedAccountId, channel),
         "text": text
     }
 
-    payload = {
-        "connectedAccountId": connectedAccountId,
-        "appName": "slack",
-        "input": input_data
-    }
-
-    headers = {
-        "X-API-Key": COMPOSIO_API_KEY,
-        "Content-Type": "application/json"
-    }
-
-    response = requests.post(url, json=payload, headers=headers)
-    response_json = response.json()
+    response_json = composio_client.execute_action("slack_send_message", connectedAccountId, "slack", input_data)
 
     if response_json.get("executed"):
         return f"✅ Message sent to {channel} successfully!"
@@ -62,22 +47,22 @@ def list_slack_channels(connectedAccountId: str) -> str:
 
     print("\n\nListing Slack channels\n\n")
 
-    url = "https://backend.composio.dev/api/v1/actions/slack_list_channels/execute"
+    response_json = slack_directory.channels(connectedAccountId)
 
-    payload = {
-        "connectedAccountId": connectedAccountId,
-        "appName": "slack",
-        "input": {}
-    }
+    return _format_list_slack_channels(response_json)
 
-    headers = {
-        "X-API-Key": COMPOSIO_API_KEY,
-        "Content-Type": "application/json"
-    }
 
-    response = requests.post(url, json=payload, headers=headers)
-    response_json = response.json()
+async def list_slack_channels_async(connectedAccountId: str) -> str:
+    """
+        Awaitable version of the `List Slack Channels` tool for use from the bot's coroutines.
+    """
+
+    response_json = await asyncio.to_thread(slack_directory.channels, connectedAccountId)
 
+    return _format_list_slack_channels(response_json)
+
+
+def _format_list_slack_channels(response_json: dict) -> str:
     if response_json.get("executed"):
         channels = response_json.get("response", {}).get("channels", [])
         if channels:
@@ -112,28 +97,15 @@ def create_slack_channel(connectedAccountId: str, name: str, is_private: bool =
 
     print("\n\nCreating Slack channel\n\n")
 
-    url = "https://backend.composio.dev/api/v1/actions/slack_create_channel/execute"
-
     input_data = {
         "name": name,
         "is_private": is_private
     }
 
-    payload = {
-        "connectedAccountId": connectedAccountId,
-        "appName": "slack",
-        "input": input_data
-    }
-
-    headers = {
-        "X-API-Key": COMPOSIO_API_KEY,
-        "Content-Type": "application/json"
-    }
-
-    response = requests.post(url, json=payload, headers=headers)
-    response_json = response.json()
+    response_json = composio_client.execute_action("slack_create_channel", connectedAccountId, "slack", input_data)
 
     if response_json.get("executed"):
+        slack_directory.invalidate(connectedAccountId, "channels")
         channel_data = response_json.get("response", {}).get("channel", {})
         channel_name = channel_data.get("name", name)
         return f"✅ Channel #{channel_name} created successfully!"
@@ -155,26 +127,12 @@ def set_slack_status(connectedAccountId: str, status_text: str, status_emoji: st
 
     print("\n\nSetting Slack status\n\n")
 
-    url = "https://backend.composio.dev/api/v1/actions/slack_set_user_status/execute"
-
     input_data = {
         "status_text": status_text,
         "status_emoji": status_emoji
     }
 
-    payload = {
-        "connectedAccountId": connectedAccountId,
-        "appName": "slack",
-        "input": input_data
-    }
-
-    headers = {
-        "X-API-Key": COMPOSIO_API_KEY,
-        "Content-Type": "application/json"
-    }
-
-    response = requests.post(url, json=payload, headers=headers)
-    response_json = response.json()
+    response_json = composio_client.execute_action("slack_set_user_status", connectedAccountId, "slack", input_data)
 
     if response_json.get("executed"):
         return f"✅ Slack status updated to: {status_emoji} {status_text}"
@@ -190,32 +148,20 @@ def send_slack_dm(connectedAccountId: str, user: str, text: str) -> str:
         Send a direct message to a Slack user.
 
         :param required connectedAccountId: The ID of the connected account.
-        :param required user: User ID or username.
+        :param required user: User ID, username or display name.
         :param required text: Message text to send.
+
+        Usernames are resolved to user IDs automatically.
     """
 
     print("\n\nSending Slack DM\n\n")
 
-    url = "https://backend.composio.dev/api/v1/actions/slack_send_direct_message/execute"
-
     input_data = {
-        "user": user,
+        "user": slack_directory.resolve_user(connectedAccountId, user),
         "text": text
     }
 
-    payload = {
-        "connectedAccountId": connectedAccountId,
-        "appName": "slack",
-        "input": input_data
-    }
-
-    headers = {
-        "X-API-Key": COMPOSIO_API_KEY,
-        "Content-Type": "application/json"
-    }
-
-    response = requests.post(url, json=payload, headers=headers)
-    response_json = response.json()
+    response_json = composio_client.execute_action("slack_send_direct_message", connectedAccountId, "slack", input_data)
 
     if response_json.get("executed"):
         return f"✅ Direct message sent to {user} successfully!"
@@ -0,0 +1,129 @@
+import pytest
+from utils import job_queue
+from utils.job_executor import AdmissionRejected
+from utils.job_queue import JobQueue, DONE, FAILED, INTERRUPTED_MESSAGE
+
+
+REPLY = {"channel_id": 1, "message_id": 2, "processing": {}, "result": {}}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(job_queue, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"), lease=60, max_attempts=2, max_per_user=2, max_queued=3)
+    yield queue
+    queue.close()
+
+
+def enqueue(queue, user_id, prompt="list my events"):
+    return queue.enqueue(user_id, "calendar", f"account-{user_id}", prompt, REPLY)
+
+
+def state(queue, job_id):
+    return queue._conn.execute("SELECT state FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+
+
+def test_claim_complete_deliver(queue):
+    job_id = enqueue(queue, 1)
+
+    job = queue.claim("w1")
+    assert (job.id, job.user_id, job.connected_account_id, job.reply, job.attempts) == (job_id, 1, "account-1", REPLY, 1)
+    assert queue.claim("w2") is None
+
+    assert queue.complete(job_id, "w1", "Done!")
+    assert [(job.id, job.result) for job in queue.undelivered()] == [(job_id, "Done!")]
+    queue.mark_delivered(job_id)
+    assert queue.undelivered() == []
+    assert state(queue, job_id) == DONE
+
+
+def test_expired_lease_is_claimed_again(queue, clock):
+    job_id = enqueue(queue, 1)
+    queue.claim("w1")
+
+    clock.now += 59
+    assert queue.claim("w2") is None
+
+    clock.now += 2
+    job = queue.claim("w2")
+    assert (job.id, job.attempts) == (job_id, 2)
+    # The first worker lost the job, its late result is dropped
+    assert not queue.complete(job_id, "w1", "Late")
+    assert queue.complete(job_id, "w2", "Done!")
+
+
+def test_heartbeat_keeps_the_lease(queue, clock):
+    enqueue(queue, 1)
+    queue.claim("w1")
+
+    clock.now += 50
+    assert queue.heartbeat("w1") == 1
+    clock.now += 50
+    assert queue.claim("w2") is None
+
+
+def test_release_requeues_running_jobs(queue):
+    job_id = enqueue(queue, 1)
+    queue.claim("w1")
+
+    assert queue.release("w1") == 1
+    assert queue.claim("w1").id == job_id
+
+
+def test_interrupted_jobs_are_given_up(queue, clock):
+    job_id = enqueue(queue, 1)
+    queue.claim("w1")
+    clock.now += 61
+    queue.claim("w2")
+    clock.now += 61
+
+    assert queue.claim("w3") is None
+    assert queue.fail_exhausted() == 1
+    assert state(queue, job_id) == FAILED
+    assert [job.result for job in queue.undelivered()] == [INTERRUPTED_MESSAGE]
+
+
+def test_users_with_fewer_running_jobs_go_first(queue):
+    first = enqueue(queue, 1)
+    second = enqueue(queue, 1)
+    other = enqueue(queue, 2)
+
+    assert queue.claim("w1").id == first
+    assert queue.claim("w1").id == other
+    assert queue.claim("w1").id == second
+
+
+def test_admission_per_user(queue):
+    enqueue(queue, 1)
+    enqueue(queue, 1)
+
+    with pytest.raises(AdmissionRejected):
+        enqueue(queue, 1)
+    enqueue(queue, 2)
+    assert queue.rejected == 1
+
+
+def test_admission_queue_length(queue):
+    for user_id in range(3):
+        enqueue(queue, user_id)
+
+    with pytest.raises(AdmissionRejected):
+        enqueue(queue, 9)
+    # Running jobs no longer count against the queue
+    queue.claim("w1")
+    enqueue(queue, 9)
+    assert queue.stats() == {"queued": 3, "running": 1, "queued_users": 3}
@@ -0,0 +1,123 @@
+import json
+import pytest
+from types import SimpleNamespace
+from utils import plan_execute
+from utils.plan_execute import PlanError, parse_plan, plan_and_execute, _is_failure
+
+
+def make_tool(name, func):
+    return SimpleNamespace(name=name, func=func)
+
+
+def lookup(connectedAccountId: str, title: str) -> str:
+    """
+        Look up an event.
+
+        :param required connectedAccountId: The ID of the connected account.
+        :param required title: The title of the event.
+    """
+
+    return "event-1"
+
+
+TOOLS = {"Lookup": make_tool("Lookup", lookup), "Delete": make_tool("Delete", lookup)}
+
+
+def plan(*steps) -> str:
+    return json.dumps({"steps": list(steps)})
+
+
+@pytest.mark.parametrize("output", [
+    "Something went wrong in creating the event.",
+    "Failed to create event",
+    "No events found with the given title.",
+    "Nothing to do, the batch is empty.",
+    "A batch can have at most 50 operations, please split it.",
+    "Your account's authentication credentials is expired. Please re authenticate again by using `!authenticate` command.",
+    "Your Gmail authentication credentials expired. Please re-authenticate using `!authenticate_gmail` command.",
+    "❌ Something went wrong while sending the email.",
+    "  ❌ Something went wrong while listing channels.\n",
+    "0 of 2 operations succeeded:\n❌ a - failed\n❌ b - failed",
+])
+def test_failures(output):
+    assert _is_failure(output)
+
+
+@pytest.mark.parametrize("output", [
+    "Created the event successfully!",
+    "No events found",
+    "📧 **Search Results:**\nSubject: Service temporarily unavailable, please re-authenticate",
+    "1 of 2 operations succeeded:\n✅ a\n❌ b - failed",
+    "event-1",
+])
+def test_successes(output):
+    assert not _is_failure(output)
+
+
+def test_parse_plan_fills_referenced_dependencies():
+    steps = parse_plan(plan(
+        {"id": "s1", "tool": "Lookup", "args": {"title": "Standup"}},
+        {"id": "s2", "tool": "Delete", "args": {"title": "{{s1}}"}},
+    ), TOOLS)
+
+    assert [step.depends_on for step in steps] == [[], ["s1"]]
+
+
+def test_parse_plan_allows_references_to_earlier_outputs():
+    steps = parse_plan(plan({"id": "s3", "tool": "Delete", "args": {"title": "{{s1}}"}}), TOOLS, known_ids={"s1"}, used_ids={"s1", "s2"})
+
+    assert steps[0].depends_on == []
+
+
+@pytest.mark.parametrize("steps, message", [
+    ([{"id": "s1", "tool": "Unknown", "args": {}}], "unknown tool"),
+    ([{"id": "s1", "tool": "Lookup", "args": {}}, {"id": "s1", "tool": "Lookup", "args": {}}], "used twice"),
+    ([{"id": "s1", "tool": "Lookup", "args": {}, "depends_on": ["s9"]}], "unknown step"),
+    ([{"id": "s1", "tool": "Lookup", "args": {}, "depends_on": ["s2"]}, {"id": "s2", "tool": "Lookup", "args": {}, "depends_on": ["s1"]}], "cycle"),
+    ([{"id": f"s{i}", "tool": "Lookup", "args": {}} for i in range(plan_execute.PLAN_MAX_STEPS + 1)], "more than"),
+])
+def test_parse_plan_rejects_invalid_plans(steps, message):
+    with pytest.raises(PlanError, match=message):
+        parse_plan(plan(*steps), TOOLS)
+
+
+def test_parse_plan_rejects_reused_step_ids():
+    with pytest.raises(PlanError, match="used twice"):
+        parse_plan(plan({"id": "s1", "tool": "Lookup", "args": {}}), TOOLS, used_ids={"s1"})
+
+
+def test_parse_plan_rejects_answers_without_json():
+    with pytest.raises(PlanError, match="no JSON"):
+        parse_plan("I cannot plan this.", TOOLS)
+
+
+class FakeLLM:
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        return SimpleNamespace(content=self.answers.pop(0))
+
+
+def test_replan_drops_errors_it_fixed(monkeypatch):
+    monkeypatch.setattr(plan_execute, "PLAN_MAX_REPLANS", 1)
+    calls = []
+
+    def delete(connectedAccountId: str, title: str) -> str:
+        calls.append(title)
+        return "Something went wrong in deleting the event." if len(calls) == 1 else "The event is deleted successfully! "
+
+    tools = [make_tool("Lookup", lookup), make_tool("Delete", delete)]
+    llm = FakeLLM([
+        plan({"id": "s1", "tool": "Lookup", "args": {"title": "Standup"}}, {"id": "s2", "tool": "Delete", "args": {"title": "{{s1}}"}}),
+        plan({"id": "s3", "tool": "Delete", "args": {"title": "{{s1}}"}}),
+        "Deleted.",
+    ])
+
+    assert plan_and_execute(llm, tools, "account", "Delete standup", "2024-01-01", "UTC") == "Deleted."
+    assert calls == ["event-1", "event-1"]
+    summary = llm.prompts[-1]
+    assert "s3 (Delete" in summary
+    assert "s2 (Delete" not in summary
@@ -0,0 +1,78 @@
+import time
+import pytest
+from utils.rate_limit import RateLimiter, TokenBucket, DEFAULT_APP_RATE, _parse_rates
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "monotonic", clock.monotonic)
+    return clock
+
+
+def test_bucket_allows_the_burst_then_queues(clock):
+    bucket = TokenBucket(rate=2, burst=3)
+
+    assert [bucket.reserve() for _ in range(5)] == [0, 0, 0, 0.5, 1.0]
+    assert bucket.time_to_full() == 2.5
+
+
+def test_bucket_refills_over_time(clock):
+    bucket = TokenBucket(rate=2, burst=3)
+    for _ in range(3):
+        bucket.reserve()
+
+    clock.now += 1
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0.5]
+
+
+def test_bucket_never_exceeds_its_burst(clock):
+    bucket = TokenBucket(rate=2, burst=3)
+
+    clock.now += 100
+    assert [bucket.reserve() for _ in range(4)] == [0, 0, 0, 0.5]
+
+
+def test_account_limit_applies_per_account(clock):
+    limiter = RateLimiter(app_rates={"gmail": (100, 100)}, account_rate=1, account_burst=2)
+
+    assert [limiter.reserve("gmail", "a") for _ in range(3)] == [0, 0, 1.0]
+    assert limiter.reserve("gmail", "b") == 0
+    assert limiter.snapshot() == {"throttled": {"gmail": 1}, "throttle_time": {"gmail": 1.0}}
+
+
+def test_app_limit_applies_across_accounts(clock):
+    limiter = RateLimiter(app_rates={"slack": (1, 2)}, account_rate=100, account_burst=100)
+
+    assert [limiter.reserve("slack", account) for account in "abc"] == [0, 0, 1.0]
+
+
+def test_backlogged_account_is_not_reset(clock):
+    limiter = RateLimiter(app_rates={"gmail": (100, 100)}, account_rate=1, account_burst=2)
+    for _ in range(4):
+        limiter.reserve("gmail", "a")
+
+    # The bucket would be full after its burst / rate of 2s, but still owes 2s of backlog
+    clock.now += 3
+    assert limiter.reserve("gmail", "a") == 0
+    assert limiter.reserve("gmail", "a") == 1.0
+
+
+def test_unknown_apps_use_the_default_rate(clock):
+    limiter = RateLimiter(app_rates={}, account_rate=1000, account_burst=1000)
+    rate, burst = DEFAULT_APP_RATE
+
+    delays = [limiter.reserve("notion", str(i)) for i in range(int(burst) + 1)]
+    assert delays[-2:] == [0, 1 / rate]
+
+
+def test_parse_rates():
+    assert _parse_rates("slack=1:5, github=20:40,") == {"slack": (1.0, 5.0), "github": (20.0, 40.0)}
@@ -1,15 +1,31 @@
-from crewai_tools import tool
-import requests
-import dotenv
 import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from crewai_tools import tool
+from utils.composio_client import composio_client, async_composio_client
 from utils.calendar import get_calendar_by_connectedAccountId
+from utils.calendar_mirror import calendar_mirror, TITLE_SEARCH_WINDOW_DAYS
+from utils.title_index import TitleIndex
+from utils import progress
 
 
-dotenv.load_dotenv()
-COMPOSIO_API_KEY = os.environ["COMPOSIO_API_KEY"] # Get the API key from composio
-
 # calendar = GoogleCalendar(credentials_path='./.credentials/credentials.json')
 
+# Batch tools configuration
+CALENDAR_BATCH_CONCURRENCY = int(os.getenv("CALENDAR_BATCH_CONCURRENCY", "4"))  # Calendar writes of one batch running at the same time
+CALENDAR_BATCH_MAX_SIZE = 50  # Maximum number of operations in one batch
+
+
+def _execute_calendar_write(action: str, connectedAccountId: str, input_data: dict) -> dict:
+    """
+        Execute a calendar action that changes events, then mark the account's mirror stale
+        so the next read syncs the change first.
+    """
+
+    response_json = composio_client.execute_action(action, connectedAccountId, "googlecalendar", input_data)
+    calendar_mirror.mark_stale(connectedAccountId)
+    return response_json
+
 
 @tool("Create Event")
 def create_event(connectedAccountId: str, start_datetime: str, end_datetime: str, title: str | None = None, description: str | None = None, eventType: str | None = None, create_meeting_room: bool | None = None, guestsCanSeeOtherGuests: bool | None = None, guestsCanInviteOthers: bool | None = None, location: str | None = None, visibility: str | None = None, attendees: list | None = None, send_updates: bool | None = None, guests_can_modify: bool | None = None, calendar_id: str | None = None) -> str:
@@ -46,8 +62,24 @@ def create_event(connectedAccountId: str, start_datetime: str, end_datetime: str
 
     print("\n\nCreating event\n\n")
 
-    url = "https://backend.composio.dev/api/v1/actions/googlecalendar_create_event/execute"
+    input_data = _create_event_input(start_datetime, end_datetime, title, description, eventType, create_meeting_room, guestsCanSeeOtherGuests, guestsCanInviteOthers, location, visibility, attendees, send_updates, guests_can_modify, calendar_id)
+
+    response_json = _execute_calendar_write("googlecalendar_create_event", connectedAccountId, input_data)
+
+    if response_json["executed"]:
+        return "Created the event successfully!"
 
+    elif not response_json["executed"]:
+        if int(response_json["response"]["error"]["code"]) == 401:
+            return "Your account's authentication credentials is expired. Please re authenticate again by using `!authenticate` command."
+
+        return "Something went wrong in creating the event."
+
+    else:
+        return "Failed to create event"
+
+
+def _create_event_input(start_datetime: str, end_datetime: str, title: str | None = None, description: str | None = None, eventType: str | None = None, create_meeting_room: bool | None = None, guestsCanSeeOtherGuests: bool | None = None, guestsCanInviteOthers: bool | None = None, location: str | None = None, visibility: str | None = None, attendees: list | None = None, send_updates: bool | None = None, guests_can_modify: bool | None = None, calendar_id: str | None = None) -> dict:
     # Build the payload
     input_data = {
         "start_datetime": start_datetime,
@@ -78,31 +110,7 @@ def create_event(connectedAccountId: str, start_datetime: str, end_datetime: str
     if calendar_id is not None:
         input_data["calendar_id"] = calendar_id
 
-    payload = {
-        "connectedAccountId": connectedAccountId,
-        "appName": "googlecalendar",
-        "input": input_data
-    }
-
-    headers = {
-        "X-API-Key": COMPOSIO_API_KEY,
-        "Content-Type": "application/json"
-    }
-
-    response = requests.post(url, json=payload, headers=headers)
-    response_json = response.json()
-
-    if response_json["executed"]:
-        return "Created the event successfully!"
-
-    elif not response_json["executed"]:
-        if int(response_json["response"]["error"]["code"]) == 401:
-            return "Your account's authentication credentials is expired. Please re authenticate again by using `!authenticate` command."
-
-        return "Something went wrong in creating the event."
-
-    else:
-        return "Failed to create event"
+    return input_data
 
 
 @tool("Find Events")
@@ -122,8 +130,28 @@ def find_events(connectedAccountId: str, query: str | None = None, max_results:
 
     print("\n\nFinding events\n\n")
 
-    url = "https://backend.composio.dev/api/v1/actions/googlecalendar_find_event/execute"
+    response_json = _find_events_from_mirror(connectedAccountId, query, max_results, time_max, time_min, event_types, calendar_id)
+    if response_json is None:
+        input_data = _find_events_input(query, max_results, time_max, time_min, event_types, calendar_id)
+        response_json = composio_client.execute_action("googlecalendar_find_event", connectedAccountId, "googlecalendar", input_data)
+
+    return _format_find_events(response_json)
+
+
+async def find_events_async(connectedAccountId: str, query: str | None = None, max_results: int | None = None, time_max: str | None = None, time_min: str | None = None, event_types: str | None = None, calendar_id: str | None = None) -> str:
+    """
+        Awaitable version of the `Find Events` tool for use from the bot's coroutines.
+    """
+
+    response_json = await asyncio.to_thread(_find_events_from_mirror, connectedAccountId, query, max_results, time_max, time_min, event_types, calendar_id)
+    if response_json is None:
+        input_data = _find_events_input(query, max_results, time_max, time_min, event_types, calendar_id)
+        response_json = await async_composio_client.execute_action("googlecalendar_find_event", connectedAccountId, "googlecalendar", input_data)
+
+    return _format_find_events(response_json)
 
+
+def _find_events_input(query: str | None, max_results: int | None, time_max: str | None, time_min: str | None, event_types: str | None, calendar_id: str | None) -> dict:
     # Build the input dictionary dynamically
     input_data = {}
     if query is not None:
@@ -139,22 +167,22 @@ def find_events(connectedAccountId: str, query: str | None = None, max_results:
     if calendar_id is not None:
         input_data["calendar_id"] = calendar_id
 
-    payload = {
-        "connectedAccountId": connectedAccountId,
-        "appName": "googlecalendar",
-        "input": input_data
-    }
+    return input_data
 
-    headers = {
-        "X-API-Key": COMPOSIO_API_KEY,
-        "Content-Type": "application/json"
-    }
 
-    response = requests.post(url, json=payload, headers=headers)
-    # print(payload, "\n\n")
-    # print(response.json())
-    response_json = response.json()
+def _find_events_from_mirror(connectedAccountId: str, query: str | None, max_results: int | None, time_max: str | None, time_min: str | None, event_types: str | None, calendar_id: str | None) -> dict | None:
+    # The mirror only holds the primary calendar and does not track event types
+    if event_types is not None or calendar_id not in (None, "primary"):
+        return None
 
+    events = calendar_mirror.events(connectedAccountId, time_min=time_min, time_max=time_max, query=query, max_results=max_results)
+    if events is None:
+        return None
+
+    return {"executed": True, "response": {"event_data": events}}
+
+
+def _format_find_events(response_json: dict) -> str:
     if response_json["executed"]:
         events = response_json["response"]["event_data"]
         if events:
@@ -189,8 +217,6 @@ def delete_event(connectedAccountId: str, event_id: str, calendar_id: str | None
 
     print("\n\nDeleting event\n\n")
 
-    url = "https://backend.composio.dev/api/v1/actions/googlecalendar_delete_event/execute"
-
     # Build the payload
     input_data = {
         "event_id": event_id
@@ -198,21 +224,8 @@ def delete_event(connectedAccountId: str, event_id: str, calendar_id: str | None
     if calendar_id is not None:
         input_data["calendar_id"] = calendar_id
 
-    payload = {
-        "connectedAccountId": connectedAccountId,
-        "appName": "googlecalendar",
-        "input": input_data
-    }
-
-    headers = {
-        "X-API-Key": COMPOSIO_API_KEY,
-        "Content-Type": "application/json"
-    }
+    response_json = _execute_calendar_write("googlecalendar_delete_event", connectedAccountId, input_data)
 
-    response = requests.post(url, json=payload, headers=headers)
-    response_json = response.json()
-
-    print(response)
     print(response_json)
 
     if response_json["executed"]:
@@ -241,8 +254,6 @@ def update_event(connectedAccountId: str, event_id: str, start_datetime: str | N
 
     print("\n\nUpdating event\n\n")
 
-    url = "https://backend.composio.dev/api/v1/actions/googlecalendar_update_event/execute"
-
     # Build the payload
     input_data = {
         "event_id": event_id
@@ -256,20 +267,7 @@ def update_event(connectedAccountId: str, event_id: str, start_datetime: str | N
     if description is not None:
         input_data["description"] = description
 
-    payload = {
-        "connectedAccountId": connectedAccountId,
-        "appName": "googlecalendar",
-        "input": input_data
-    }
-
-    headers = {
-        "X-API-Key": COMPOSIO_API_KEY,
-        "Content-Type": "application/json"
-    }
-
-    response = requests.post(url, json=payload, headers=headers)
-    response_json = response.json()
-    print(response)
+    response_json = _execute_calendar_write("googlecalendar_update_event", connectedAccountId, input_data)
     print(response_json)
 
     if response_json["executed"]:
@@ -296,8 +294,6 @@ def remove_attendee_event(connectedAccountId: str, event_id: str, attendee_email
 
     print("\n\nRemoving attendee from event\n\n")
 
-    url = "https://backend.composio.dev/api/v1/actions/googlecalendar_remove_attendee/execute"
-
     # Build the payload
     input_data = {
         "event_id": event_id,
@@ -307,19 +303,7 @@ def remove_attendee_event(connectedAccountId: str, event_id: str, attendee_email
     if calendar_id is not None:
         input_data["calendar_id"] = calendar_id
 
-    payload = {
-        "connectedAccountId": connectedAccountId,
-        "appName": "googlecalendar",
-        "input": input_data
-    }
-
-    headers = {
-        "X-API-Key": COMPOSIO_API_KEY,
-        "Content-Type": "application/json"
-    }
-
-    response = requests.post(url, json=payload, headers=headers)
-    response_json = response.json()
+    response_json = _execute_calendar_write("googlecalendar_remove_attendee", connectedAccountId, input_data)
 
     if response_json["executed"]:
         return "Attendee removed successfully"
@@ -343,8 +327,6 @@ def quick_add_event(connectionAccountId: str, calendar_id: str | None = None, te
 
     print("\n\nQuick adding event\n\n")
 
-    url = "https://backend.composio.dev/api/v1/actions/googlecalendar_quick_add/execute"
-
     # Build the payload
     input_data = {}
     if calendar_id is not None:
@@ -354,19 +336,7 @@ def quick_add_event(connectionAccountId: str, calendar_id: str | None = None, te
     if send_updates is not None:
         input_data["send_updates"] = send_updates
 
-    payload = {
-        "connectedAccountId": connectionAccountId,
-        "appName": "googlecalendar",
-        "input": input_data
-    }
-
-    headers = {
-        "X-API-Key": COMPOSIO_API_KEY,
-        "Content-Type": "application/json"
-    }
-
-    response = requests.post(url, json=payload, headers=headers)
-    response_json = response.json()
+    response_json = _execute_calendar_write("googlecalendar_quick_add", connectionAccountId, input_data)
 
     if response_json["executed"]:
         return "Quick event created successfully"
@@ -386,24 +356,86 @@ def get_event_id_by_title(connectionAccountId: str, title: str) -> str:
         :param required title: The title of the event.
 
         You can use this event ID to perform other actions on the event like updating, deleting, etc.
+        If several events could match the title, use the `Find Event ID Candidates` tool instead.
     """
 
     print("\n\nGetting event ID by title\n\n")
 
-    calendar = get_calendar_by_connectedAccountId(connectionAccountId)
+    candidates = _event_title_candidates(connectionAccountId, title, 1)
+    if isinstance(candidates, str):
+        return candidates
 
-    events = list(calendar.get_events(
-        calendar_id="primary",
-        single_events=True,
-        order_by="startTime",
-        query=title
-    ))
-    
-    if not events:
+    if not candidates:
         return "No events found with the given title."
-    
-    event = events[0]
-    return event.event_id
+
+    return candidates[0][1]["id"]
+
+
+@tool("Find Event ID Candidates")
+def find_event_id_candidates(connectedAccountId: str, title: str, max_candidates: int = 5) -> str:
+    """
+        Find the events whose title best matches the given (possibly partial or misspelled) title,
+        ranked by similarity, with their event IDs. Events closer to today come first on equal matches.
+
+        :param required connectedAccountId: The ID of the connected account.
+        :param required title: The title of the event.
+        :param optional max_candidates: How many candidates to return (default: 5).
+
+        Pick the right event ID from the candidates to update, delete or change attendees of an event.
+    """
+
+    print("\n\nFinding event ID candidates\n\n")
+
+    candidates = _event_title_candidates(connectedAccountId, title, max_candidates)
+    if isinstance(candidates, str):
+        return candidates
+
+    if not candidates:
+        return "No events found with the given title."
+
+    lines = []
+    for i, (score, event) in enumerate(candidates, start=1):
+        start = event.get("start", {})
+        start_time = start.get("dateTime", start.get("date", "No time"))
+        lines.append(f"{i}. `{event['id']}` - **{event.get('summary', 'No Title')}** - {start_time} (match {score:.0%})")
+
+    return f"Event ID candidates for `{title}`, best first:\n" + "\n".join(lines)
+
+
+def _event_title_candidates(connectedAccountId: str, title: str, limit: int) -> list | str:
+    """
+        Ranked (score, event) candidates for a title, from the calendar mirror when it is warm,
+        otherwise from a live search ranked the same way. Returns an error message on failure.
+    """
+
+    candidates = calendar_mirror.find_by_title(connectedAccountId, title, limit=limit)
+    if candidates is not None:
+        return candidates
+
+    from datetime import datetime, timedelta
+    calendar = get_calendar_by_connectedAccountId(connectedAccountId)
+    if isinstance(calendar, str):
+        return calendar
+
+    now = datetime.now().astimezone()
+    window = timedelta(days=TITLE_SEARCH_WINDOW_DAYS)
+    events = calendar.service.events().list(
+        calendarId="primary",
+        singleEvents=True,
+        orderBy="startTime",
+        q=title,
+        timeMin=(now - window).isoformat(),
+        timeMax=(now + window).isoformat()
+    ).execute().get("items", [])
+
+    # The live search already filtered by title, so rank its results without a similarity cut-off
+    index = TitleIndex()
+    by_id = {}
+    for event in events:
+        index.add(event["id"], event.get("summary", ""))
+        by_id[event["id"]] = event
+
+    return [(score, by_id[event_id]) for event_id, score in index.search(title, min_score=0)[:limit]]
 
 
 @tool("List Upcoming Events")
@@ -418,10 +450,53 @@ def list_upcoming_events(connectedAccountId: str, max_results: int = 10, calenda
 
     print("\n\nListing upcoming events\n\n")
 
-    url = "https://backend.composio.dev/api/v1/actions/googlecalendar_find_event/execute"
+    input_data = _list_upcoming_events_input(max_results, calendar_id)
+    response_json = _list_upcoming_events_from_mirror(connectedAccountId, input_data)
+    if response_json is None:
+        response_json = composio_client.execute_action("googlecalendar_find_event", connectedAccountId, "googlecalendar", input_data)
 
+    return _format_list_upcoming_events(response_json)
+
+
+async def list_upcoming_events_async(connectedAccountId: str, max_results: int = 10, calendar_id: str | None = None) -> str:
+    """
+        Awaitable version of the `List Upcoming Events` tool for use from the bot's coroutines.
+    """
+
+    input_data = _list_upcoming_events_input(max_results, calendar_id)
+    response_json = await asyncio.to_thread(_list_upcoming_events_from_mirror, connectedAccountId, input_data)
+    if response_json is None:
+        response_json = await async_composio_client.execute_action("googlecalendar_find_event", connectedAccountId, "googlecalendar", input_data)
+
+    return _format_list_upcoming_events(response_json)
+
+
+async def list_todays_events_async(connectedAccountId: str, max_results: int = 50, calendar_id: str | None = None) -> str:
+    """
+        List the events of the current day (in the bot's local timezone) without going through the agent.
+
+        :param required connectedAccountId: The ID of the connected account.
+        :param optional max_results: Maximum number of events to return (default: 50).
+        :param optional calendar_id: The ID of the calendar to list events from.
+    """
+
+    from datetime import datetime, timedelta
+    day_start = datetime.now().astimezone().replace(hour=0, minute=0, second=0, microsecond=0)
+    day_end = day_start + timedelta(days=1)
+
+    input_data = _list_upcoming_events_input(max_results, calendar_id, time_min=day_start.isoformat(), time_max=day_end.isoformat())
+    response_json = await asyncio.to_thread(_list_upcoming_events_from_mirror, connectedAccountId, input_data)
+    if response_json is None:
+        response_json = await async_composio_client.execute_action("googlecalendar_find_event", connectedAccountId, "googlecalendar", input_data)
+
+    return _format_list_upcoming_events(response_json, heading="📆 **Today's Events:**", empty="No events scheduled for today.")
+
+
+def _list_upcoming_events_input(max_results: int, calendar_id: str | None, time_min: str | None = None, time_max: str | None = None) -> dict:
     from datetime import datetime, timezone as tz
-    time_min = datetime.now(tz.utc).isoformat()
+    if time_min is None:
+        # Minute precision keeps the input identical across calls made close together, so they can be coalesced
+        time_min = datetime.now(tz.utc).replace(second=0, microsecond=0).isoformat()
 
     input_data = {
         "time_min": time_min,
@@ -430,23 +505,19 @@ def list_upcoming_events(connectedAccountId: str, max_results: int = 10, calenda
         "single_events": True
     }
 
+    if time_max is not None:
+        input_data["time_max"] = time_max
     if calendar_id is not None:
         input_data["calendar_id"] = calendar_id
 
-    payload = {
-        "connectedAccountId": connectedAccountId,
-        "appName": "googlecalendar",
-        "input": input_data
-    }
+    return input_data
 
-    headers = {
-        "X-API-Key": COMPOSIO_API_KEY,
-        "Content-Type": "application/json"
-    }
 
-    response = requests.post(url, json=payload, headers=headers)
-    response_json = response.json()
+def _list_upcoming_events_from_mirror(connectedAccountId: str, input_data: dict) -> dict | None:
+    return _find_events_from_mirror(connectedAccountId, None, input_data["max_results"], input_data.get("time_max"), input_data["time_min"], None, input_data.get("calendar_id"))
 
+
+def _format_list_upcoming_events(response_json: dict, heading: str = "📅 **Upcoming Events:**", empty: str = "No upcoming events found.") -> str:
     if response_json["executed"]:
         events = response_json["response"]["event_data"]
         if events:
@@ -460,9 +531,9 @@ def list_upcoming_events(connectedAccountId: str, max_results: int = 10, calenda
                 except (KeyError, TypeError, AttributeError):
                     # Skip events with malformed data
                     continue
-            return f"📅 **Upcoming Events:**\n" + "\n".join(event_list)
+            return f"{heading}\n" + "\n".join(event_list)
         else:
-            return "No upcoming events found."
+            return empty
     else:
         if response_json.get("response", {}).get("error", {}).get("code") == 401:
             return "Your account's authentication credentials is expired. Please re authenticate again by using `!authenticate` command."
@@ -483,8 +554,6 @@ def add_attendee_to_event(connectedAccountId: str, event_id: str, attendee_email
 
     print("\n\nAdding attendee to event\n\n")
 
-    url = "https://backend.composio.dev/api/v1/actions/googlecalendar_add_attendee/execute"
-
     input_data = {
         "event_id": event_id,
         "attendee_email": attendee_email
@@ -493,19 +562,7 @@ def add_attendee_to_event(connectedAccountId: str, event_id: str, attendee_email
     if calendar_id is not None:
         input_data["calendar_id"] = calendar_id
 
-    payload = {
-        "connectedAccountId": connectedAccountId,
-        "appName": "googlecalendar",
-        "input": input_data
-    }
-
-    headers = {
-        "X-API-Key": COMPOSIO_API_KEY,
-        "Content-Type": "application/json"
-    }
-
-    response = requests.post(url, json=payload, headers=headers)
-    response_json = response.json()
+    response_json = _execute_calendar_write("googlecalendar_add_attendee", connectedAccountId, input_data)
 
     if response_json["executed"]:
         return f"Successfully added {attendee_email} to the event!"
@@ -515,6 +572,132 @@ def add_attendee_to_event(connectedAccountId: str, event_id: str, attendee_email
         return "Something went wrong in adding the attendee to the event."
 
 
+@tool("Create Events in Batch")
+def create_events_batch(connectedAccountId: str, events: list) -> str:
+    """
+        Create several events in a Google Calendar in one step, instead of calling `Create Event` once per event.
+
+        :param required connectedAccountId: The ID of the connected account.
+        :param required events: List of events, each a dictionary with the arguments of `Create Event` (without connectedAccountId). start_datetime, end_datetime and title are required. Example [{"title": "Standup", "start_datetime": "2024-05-06T09:00:00+02:00", "end_datetime": "2024-05-06T09:15:00+02:00"}].
+    """
+
+    print("\n\nCreating events in batch\n\n")
+
+    operations = []
+    for event in events:
+        label = event.get("title", "Untitled event") if isinstance(event, dict) else str(event)
+        try:
+            operations.append((label, "googlecalendar_create_event", _create_event_input(**event)))
+        except TypeError as e:
+            operations.append((label, None, str(e)))
+
+    return _run_calendar_batch(connectedAccountId, operations)
+
+
+@tool("Delete Events in Batch")
+def delete_events_batch(connectedAccountId: str, event_ids: list, calendar_id: str | None = None) -> str:
+    """
+        Delete several events from a Google Calendar in one step, instead of calling `Delete Event` once per event.
+        Event IDs can be obtained by using the `Find Event ID Candidates` tool.
+
+        :param required connectedAccountId: The ID of the connected account.
+        :param required event_ids: List of the IDs of the events to delete.
+        :param optional calendar_id: The ID of the calendar to delete the events from.
+    """
+
+    print("\n\nDeleting events in batch\n\n")
+
+    operations = []
+    for event_id in event_ids:
+        input_data = {"event_id": event_id}
+        if calendar_id is not None:
+            input_data["calendar_id"] = calendar_id
+        operations.append((f"`{event_id}`", "googlecalendar_delete_event", input_data))
+
+    return _run_calendar_batch(connectedAccountId, operations)
+
+
+@tool("Add Attendees in Batch")
+def add_attendees_batch(connectedAccountId: str, event_id: str, attendee_emails: list, calendar_id: str | None = None) -> str:
+    """
+        Add several attendees to an existing event in a Google Calendar in one step, instead of calling `Add Attendee to Event` once per attendee.
+        Event ID can be obtained by using the `Get Event ID via Title` tool.
+
+        :param required connectedAccountId: The ID of the connected account.
+        :param required event_id: The ID of the event.
+        :param required attendee_emails: List of the emails of the attendees to add. Example ['email1@gmail.com','email2@icloud.com'].
+        :param optional calendar_id: The ID of the calendar.
+    """
+
+    print("\n\nAdding attendees in batch\n\n")
+
+    operations = []
+    for attendee_email in attendee_emails:
+        input_data = {"event_id": event_id, "attendee_email": attendee_email}
+        if calendar_id is not None:
+            input_data["calendar_id"] = calendar_id
+        operations.append((attendee_email, "googlecalendar_add_attendee", input_data))
+
+    return _run_calendar_batch(connectedAccountId, operations)
+
+
+def _run_calendar_batch(connectedAccountId: str, operations: list[tuple]) -> str:
+    """
+        Execute (label, action, input_data) operations concurrently, at most `CALENDAR_BATCH_CONCURRENCY`
+        at a time, and summarize the result of each. Operations on the same event run one after the
+        other, because Google applies attendee changes as read-modify-write of the whole event.
+        An operation whose action is None failed validation, its input_data is the error.
+    """
+
+    if not operations:
+        return "Nothing to do, the batch is empty."
+    if len(operations) > CALENDAR_BATCH_MAX_SIZE:
+        return f"A batch can have at most {CALENDAR_BATCH_MAX_SIZE} operations, please split it."
+
+    results = [None] * len(operations)
+    groups = {}
+    for i, (_, action, input_data) in enumerate(operations):
+        if action is None:
+            results[i] = input_data
+        else:
+            groups.setdefault(input_data.get("event_id", i), []).append(i)
+
+    reporter = progress.current()
+
+    def run_group(indices):
+        with progress.reporting(reporter):
+            for i in indices:
+                _, action, input_data = operations[i]
+                results[i] = _execute_calendar_write(action, connectedAccountId, input_data)
+
+    if groups:
+        with ThreadPoolExecutor(max_workers=min(CALENDAR_BATCH_CONCURRENCY, len(groups))) as pool:
+            list(pool.map(run_group, groups.values()))
+
+    return _format_calendar_batch(operations, results)
+
+
+def _format_calendar_batch(operations: list[tuple], results: list) -> str:
+    lines = []
+    succeeded = 0
+    expired = False
+    for (label, _, _), result in zip(operations, results):
+        if isinstance(result, str):
+            lines.append(f"❌ {label} - invalid: {result}")
+        elif result.get("executed"):
+            succeeded += 1
+            lines.append(f"✅ {label}")
+        else:
+            code = result.get("response", {}).get("error", {}).get("code")
+            expired = expired or code == 401
+            lines.append(f"❌ {label} - failed")
+
+    summary = f"{succeeded} of {len(operations)} operations succeeded:\n" + "\n".join(lines)
+    if expired:
+        summary += "\n\nYour account's authentication credentials is expired. Please re authenticate again by using `!authenticate` command."
+    return summary
+
+
 @tool("Get Event Details")
 def get_event_details(connectedAccountId: str, event_id: str, calendar_id: str | None = None) -> str:
     """
@@ -528,8 +711,28 @@ def get_event_details(connectedAccountId: str, event_id: str, calendar_id: str |
 
     print("\n\nGetting event details\n\n")
 
-    url = "https://backend.composio.dev/api/v1/actions/googlecalendar_get_event/execute"
+    response_json = _get_event_details_from_mirror(connectedAccountId, event_id, calendar_id)
+    if response_json is None:
+        input_data = _get_event_details_input(event_id, calendar_id)
+        response_json = composio_client.execute_action("googlecalendar_get_event", connectedAccountId, "googlecalendar", input_data)
 
+    return _format_get_event_details(response_json)
+
+
+async def get_event_details_async(connectedAccountId: str, event_id: str, calendar_id: str | None = None) -> str:
+    """
+        Awaitable version of the `Get Event Details` tool for use from the bot's coroutines.
+    """
+
+    response_json = await asyncio.to_thread(_get_event_details_from_mirror, connectedAccountId, event_id, calendar_id)
+    if response_json is None:
+        input_data = _get_event_details_input(event_id, calendar_id)
+        response_json = await async_composio_client.execute_action("googlecalendar_get_event", connectedAccountId, "googlecalendar", input_data)
+
+    return _format_get_event_details(response_json)
+
+
+def _get_event_details_input(event_id: str, calendar_id: str | None) -> dict:
     input_data = {
         "event_id": event_id
     }
@@ -537,24 +740,25 @@ def get_event_details(connectedAccountId: str, event_id: str, calendar_id: str |
     if calendar_id is not None:
         input_data["calendar_id"] = calendar_id
 
-    payload = {
-        "connectedAccountId": connectedAccountId,
-        "appName": "googlecalendar",
-        "input": input_data
-    }
+    return input_data
 
-    headers = {
-        "X-API-Key": COMPOSIO_API_KEY,
-        "Content-Type": "application/json"
-    }
 
-    response = requests.post(url, json=payload, headers=headers)
-    response_json = response.json()
+def _get_event_details_from_mirror(connectedAccountId: str, event_id: str, calendar_id: str | None) -> dict | None:
+    if calendar_id not in (None, "primary"):
+        return None
+
+    event = calendar_mirror.event(connectedAccountId, event_id)
+    if event is None:
+        return None
+
+    return {"executed": True, "response": event}
 
+
+def _format_get_event_details(response_json: dict) -> str:
     if response_json["executed"]:
         event = response_json["response"]
         details = []
-        
+
         if "summary" in event:
             details.append(f"**Title:** {event['summary']}")
         if "start" in event:
@@ -572,7 +776,7 @@ def get_event_details(connectedAccountId: str, event_id: str, calendar_id: str |
             details.append(f"**Attendees:** {attendee_list}")
         if "hangoutLink" in event:
             details.append(f"**Meeting Link:** {event['hangoutLink']}")
-        
+
         return "📋 **Event Details:**\n" + "\n".join(details)
     else:
         if response_json.get("response", {}).get("error", {}).get("code") == 401:
@@ -590,22 +794,22 @@ def list_calendars(connectedAccountId: str) -> str:
 
     print("\n\nListing calendars\n\n")
 
-    url = "https://backend.composio.dev/api/v1/actions/googlecalendar_list_calendars/execute"
+    response_json = composio_client.execute_action("googlecalendar_list_calendars", connectedAccountId, "googlecalendar", {})
 
-    payload = {
-        "connectedAccountId": connectedAccountId,
-        "appName": "googlecalendar",
-        "input": {}
-    }
+    return _format_list_calendars(response_json)
 
-    headers = {
-        "X-API-Key": COMPOSIO_API_KEY,
-        "Content-Type": "application/json"
-    }
 
-    response = requests.post(url, json=payload, headers=headers)
-    response_json = response.json()
+async def list_calendars_async(connectedAccountId: str) -> str:
+    """
+        Awaitable version of the `List Calendars` tool for use from the bot's coroutines.
+    """
+
+    response_json = await async_composio_client.execute_action("googlecalendar_list_calendars", connectedAccountId, "googlecalendar", {})
+
+    return _format_list_calendars(response_json)
+
 
+def _format_list_calendars(response_json: dict) -> str:
     if response_json["executed"]:
         calendars = response_json["response"].get("items", [])
         if calendars:
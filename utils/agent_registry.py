@@ -0,0 +1,80 @@
+import os
+import threading
+from contextlib import contextmanager
+
+
+AGENT_POOL_SIZE = int(os.getenv("AGENT_POOL_SIZE", "4"))  # Idle agents kept per service combination
+
+
+class AgentRegistry:
+    """
+        Keeps prebuilt crewai agents per service combination and hands them out per request.
+
+        A crewai `Agent` keeps its executor on the instance while a task runs, so one agent
+        cannot serve two requests at the same time. The registry therefore keeps a small
+        pool of idle agents per key: a request checks one out (building it only if the
+        pool is empty) and returns it when the task is done.
+    """
+
+    def __init__(self, factory, max_idle: int = AGENT_POOL_SIZE):
+        """
+            :param required factory: Callable building an agent for a key (a tuple of service names).
+            :param optional max_idle: How many idle agents to keep per key.
+        """
+
+        self.factory = factory
+        self.max_idle = max_idle
+        self._lock = threading.Lock()
+        self._idle = {}  # key -> list of idle agents
+        self.created = 0
+        self.reused = 0
+
+    @contextmanager
+    def checkout(self, services):
+        """
+            Borrow an agent for the given services for the duration of a `with` block.
+
+            :param required services: The service names the agent covers, e.g. ["calendar"].
+        """
+
+        key = tuple(services)
+        with self._lock:
+            idle = self._idle.get(key)
+            agent = idle.pop() if idle else None
+            if agent is not None:
+                self.reused += 1
+
+        if agent is None:
+            agent = self.factory(key)
+            with self._lock:
+                self.created += 1
+
+        try:
+            yield agent
+        finally:
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                if len(idle) < self.max_idle:
+                    idle.append(agent)
+
+    def warm(self, keys):
+        """
+            Build one idle agent for each key up front, e.g. at bot startup.
+
+            :param required keys: Iterable of service lists, e.g. [["calendar"], ["gmail"]].
+        """
+
+        for services in keys:
+            key = tuple(services)
+            agent = self.factory(key)
+            with self._lock:
+                self.created += 1
+                self._idle.setdefault(key, []).append(agent)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "created": self.created,
+                "reused": self.reused,
+                "idle": {"+".join(key): len(agents) for key, agents in self._idle.items()},
+            }
@@ -1,44 +1,76 @@
+import os
+import time
 from google.oauth2.credentials import Credentials
 from gcsa.google_calendar import GoogleCalendar
-import requests
-import dotenv
-import os
+from utils.cache import TTLCache
+from utils.composio_client import composio_client
+
+
+CALENDAR_CLIENT_CACHE_SIZE = int(os.getenv("CALENDAR_CLIENT_CACHE_SIZE", "256"))  # Number of GoogleCalendar clients kept
+CALENDAR_CLIENT_TTL = float(os.getenv("CALENDAR_CLIENT_TTL", "3000"))  # Upper bound in seconds for keeping a client
+TOKEN_EXPIRY_MARGIN = 60  # Evict a client this many seconds before its access token expires
+
+calendar_clients = TTLCache(CALENDAR_CLIENT_CACHE_SIZE, CALENDAR_CLIENT_TTL)
+
+
+def _client_ttl(connection_params: dict) -> float:
+    """
+        How long a client built from these connection params may be cached: until shortly
+        before the access token expires, but never longer than `CALENDAR_CLIENT_TTL`.
+    """
 
+    if connection_params.get('expires_at'):
+        remaining = float(connection_params['expires_at']) - time.time()
+    elif connection_params.get('expires_in'):
+        remaining = float(connection_params['expires_in'])
+    else:
+        return CALENDAR_CLIENT_TTL
 
-dotenv.load_dotenv()
-COMPOSIO_API_KEY = os.environ["COMPOSIO_API_KEY"] # Get the API key from composio
+    return max(0.0, min(CALENDAR_CLIENT_TTL, remaining - TOKEN_EXPIRY_MARGIN))
 
 
 def get_calendar_by_connectedAccountId(connectedAccountId: str) -> GoogleCalendar:
     """
-        Get the calendar by connectedAccountId.
+        Get the calendar by connectedAccountId. Clients are cached per account (see `calendar_clients`).
 
         :param required connectedAccountId: The ID of the connected account of the user.
     """
 
-    url = f"https://backend.composio.dev/api/v1/connectedAccounts/{connectedAccountId}"
+    calendar = calendar_clients.get(connectedAccountId)
+    if calendar is not None:
+        return calendar
 
-    headers = {
-        "X-API-Key": COMPOSIO_API_KEY,
-        "Content-Type": "application/json"
-    }
-
-    response = requests.get(url, headers=headers)
+    response = composio_client.get_connected_account(connectedAccountId)
     response_json = response.json()
 
     if not response.status_code == 200:
         print(response_json)
         return "Something went wrong. Please try again."
 
+    connection_params = response_json['connectionParams']
     token = Credentials(
-        token=response_json['connectionParams']['access_token'],
-        refresh_token=response_json['connectionParams']['refresh_token'],
-        client_id=response_json['connectionParams']['client_id'],
-        client_secret=response_json['connectionParams']['client_secret'],
+        token=connection_params['access_token'],
+        refresh_token=connection_params['refresh_token'],
+        client_id=connection_params['client_id'],
+        client_secret=connection_params['client_secret'],
         scopes=['https://www.googleapis.com/auth/calendar'],
         token_uri='https://oauth2.googleapis.com/token'
     )
 
     calendar = GoogleCalendar(credentials=token)
 
-    return calendar
\ No newline at end of file
+    ttl = _client_ttl(connection_params)
+    if ttl > 0:
+        calendar_clients.set(connectedAccountId, calendar, ttl)
+
+    return calendar
+
+
+def invalidate_calendar(connectedAccountId: str):
+    """
+        Drop the cached client of an account, e.g. when the user re-authenticates.
+
+        :param required connectedAccountId: The ID of the connected account of the user.
+    """
+
+    calendar_clients.invalidate(connectedAccountId)
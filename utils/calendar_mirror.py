@@ -0,0 +1,415 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from googleapiclient.errors import HttpError
+from utils.calendar import get_calendar_by_connectedAccountId
+from utils.shared_cache import SharedCache, shared_cache
+from utils.title_index import TitleIndex
+
+
+CALENDAR_MIRROR_ENABLED = os.getenv("CALENDAR_MIRROR_ENABLED", "true").lower() == "true"  # Answer calendar reads from the local mirror
+CALENDAR_MIRROR_MAX_STALENESS = float(os.getenv("CALENDAR_MIRROR_MAX_STALENESS", "60"))  # Seconds a mirror answers reads before it is synced again
+CALENDAR_MIRROR_MAX_ACCOUNTS = int(os.getenv("CALENDAR_MIRROR_MAX_ACCOUNTS", "500"))  # Mirrors kept in memory, least recently used are dropped
+CALENDAR_MIRROR_WORKERS = 2  # Threads running the initial full syncs
+SYNC_PAGE_SIZE = 2500  # Largest page the Calendar API returns
+DEFAULT_MAX_RESULTS = 250  # Events returned when no `max_results` is given, as the Calendar API does
+TITLE_SEARCH_WINDOW_DAYS = float(os.getenv("TITLE_SEARCH_WINDOW_DAYS", "90"))  # Title lookups only consider events within this many days of now
+CALENDAR_MIRROR_RESYNC_DAYS = 7  # Days after a full sync before its window is moved with a new one
+CALENDAR_MIRROR_WINDOW_DAYS = TITLE_SEARCH_WINDOW_DAYS + CALENDAR_MIRROR_RESYNC_DAYS  # A mirror holds the events within this many days of its full sync
+
+
+class _Mirror:
+    def __init__(self):
+        self.lock = threading.Lock()  # Guards the events; held while reading, never during network calls
+        self.sync_lock = threading.Lock()  # One incremental sync at a time
+        self.events = {}  # event id -> (start, end, event)
+        self.titles = TitleIndex()
+        self.sync_token = None
+        self.window = None  # (start, end) of the time range the mirror holds
+        self.synced_at = 0.0
+        self.stale = False
+        self.syncing = False
+        self.generation = 0  # Shared write count of the account last seen
+
+
+def _parse_time(value: str | None) -> datetime | None:
+    """Parse an RFC3339 timestamp or a date. Values without an offset are taken as local time."""
+
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.astimezone()
+
+
+def _event_bounds(event: dict) -> tuple[datetime, datetime]:
+    start = event.get("start", {})
+    end = event.get("end", {})
+    start_time = _parse_time(start.get("dateTime") or start.get("date"))
+    end_time = _parse_time(end.get("dateTime") or end.get("date")) or start_time
+    return start_time, end_time
+
+
+def _search_text(event: dict) -> str:
+    people = event.get("attendees", []) + [event.get("organizer", {})]
+    fields = [event.get("summary"), event.get("description"), event.get("location")]
+    fields += [person.get(key) for person in people for key in ("email", "displayName")]
+    return " ".join(field for field in fields if field).lower()
+
+
+class CalendarMirror:
+    """
+        Per-account local copy of the primary Google Calendar.
+
+        A mirror is filled by one full sync of the events within `CALENDAR_MIRROR_WINDOW_DAYS`
+        of now and then kept up to date with Google's incremental sync (`syncToken`), which only
+        returns the events changed since the previous sync. Reads reaching outside that window
+        return None and are answered live; the window is moved by a new full sync once a week.
+        Reads are answered locally while the mirror is younger than `max_staleness` seconds;
+        older or write-invalidated mirrors are synced first. A cold mirror returns None, so the
+        caller falls back to a live call, and starts its full sync in the background.
+
+        With a `SharedCache`, marking an account stale also bumps a per-account generation there,
+        so writes made by another process (e.g. a queue worker) force a sync here as well.
+    """
+
+    def __init__(self, client_factory=get_calendar_by_connectedAccountId, max_staleness: float = CALENDAR_MIRROR_MAX_STALENESS, max_accounts: int = CALENDAR_MIRROR_MAX_ACCOUNTS, workers: int = CALENDAR_MIRROR_WORKERS, shared: SharedCache | None = None):
+        """
+            :param optional client_factory: Callable returning the `GoogleCalendar` of a connected account.
+            :param optional max_staleness: Seconds a mirror answers reads before it is synced again.
+            :param optional max_accounts: How many mirrors to keep in memory.
+            :param optional workers: Threads running the initial full syncs.
+            :param optional shared: Cache shared with the other bot and worker processes.
+        """
+
+        self.client_factory = client_factory
+        self.shared = shared
+        self.max_staleness = max_staleness
+        self.max_accounts = max_accounts
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="calendar-mirror")
+        self._lock = threading.Lock()
+        self._mirrors = OrderedDict()
+        self.hits = 0
+        self.fallbacks = 0
+        self.full_syncs = 0
+        self.incremental_syncs = 0
+
+    def _mirror(self, connectedAccountId: str) -> _Mirror:
+        with self._lock:
+            mirror = self._mirrors.get(connectedAccountId)
+            if mirror is None:
+                mirror = self._mirrors[connectedAccountId] = _Mirror()
+                while len(self._mirrors) > self.max_accounts:
+                    self._mirrors.popitem(last=False)
+            self._mirrors.move_to_end(connectedAccountId)
+            return mirror
+
+    def _fetch(self, connectedAccountId: str, sync_token: str | None, window: tuple[datetime, datetime] | None = None) -> tuple[list, str]:
+        """
+            Page through a full sync of the events within `window` (no token) or an incremental sync.
+            Returns (changed events, next sync token).
+        """
+
+        calendar = self.client_factory(connectedAccountId)
+        if isinstance(calendar, str):
+            raise RuntimeError(calendar)
+
+        params = {"calendarId": "primary", "singleEvents": True, "maxResults": SYNC_PAGE_SIZE}
+        if sync_token is not None:
+            params["syncToken"] = sync_token
+        else:
+            # Recurring series are expanded into single events, so an unbounded full sync would never end
+            params["timeMin"], params["timeMax"] = window[0].isoformat(), window[1].isoformat()
+
+        items = []
+        while True:
+            page = calendar.service.events().list(**params).execute()
+            items.extend(page.get("items", []))
+            if "nextPageToken" not in page:
+                return items, page["nextSyncToken"]
+            params["pageToken"] = page["nextPageToken"]
+
+    def _apply(self, mirror: _Mirror, items: list):
+        window_start, window_end = mirror.window
+        for event in items:
+            mirror.events.pop(event["id"], None)
+            mirror.titles.remove(event["id"])
+            if event.get("status") == "cancelled":
+                continue
+            try:
+                start, end = _event_bounds(event)
+            except (TypeError, ValueError) as e:
+                print(f"Calendar mirror skipped event {event['id']} with unreadable times: {e}")
+                continue
+            # Incremental syncs also report changes outside the window, which the mirror does not hold
+            if start is not None and end > window_start and start < window_end:
+                mirror.events[event["id"]] = (start, end, event)
+                mirror.titles.add(event["id"], event.get("summary", ""))
+
+    def _full_sync(self, connectedAccountId: str, mirror: _Mirror):
+        now = datetime.now().astimezone()
+        window = (now - timedelta(days=CALENDAR_MIRROR_WINDOW_DAYS), now + timedelta(days=CALENDAR_MIRROR_WINDOW_DAYS))
+        # Cleared before fetching, so a write marking the mirror stale during the fetch is not lost
+        stale = mirror.stale
+        mirror.stale = False
+        started = time.monotonic()
+        try:
+            items, sync_token = self._fetch(connectedAccountId, None, window)
+            with mirror.lock:
+                mirror.events = {}
+                mirror.titles = TitleIndex()
+                mirror.window = window
+                self._apply(mirror, items)
+                mirror.sync_token = sync_token
+                mirror.synced_at = started
+            self.full_syncs += 1
+        except Exception as e:
+            mirror.stale = mirror.stale or stale
+            print(f"Calendar mirror full sync failed: {e}")
+        finally:
+            mirror.syncing = False
+
+    def _sync(self, connectedAccountId: str, mirror: _Mirror) -> bool:
+        """Bring a warm mirror up to date. Must be called with `mirror.sync_lock` held."""
+
+        stale = mirror.stale
+        mirror.stale = False
+        sync_token = mirror.sync_token
+        try:
+            items, next_sync_token = self._fetch(connectedAccountId, sync_token)
+        except HttpError as e:
+            mirror.stale = mirror.stale or stale
+            if e.resp.status == 410:
+                # The sync token expired, start over
+                with mirror.lock:
+                    if mirror.sync_token == sync_token:
+                        mirror.sync_token = None
+                self._start_full_sync(connectedAccountId, mirror)
+            print(f"Calendar mirror sync failed: {e}")
+            return False
+        except Exception as e:
+            mirror.stale = mirror.stale or stale
+            print(f"Calendar mirror sync failed: {e}")
+            return False
+
+        with mirror.lock:
+            # A full sync that finished meanwhile replaced the events and the token, its copy wins
+            if mirror.sync_token == sync_token:
+                self._apply(mirror, items)
+                mirror.sync_token = next_sync_token
+                mirror.synced_at = time.monotonic()
+        self.incremental_syncs += 1
+        return True
+
+    def _start_full_sync(self, connectedAccountId: str, mirror: _Mirror):
+        with self._lock:
+            if mirror.syncing:
+                return
+            mirror.syncing = True
+        self._pool.submit(self._full_sync, connectedAccountId, mirror)
+
+    def _fresh(self, connectedAccountId: str):
+        """
+            Return the account's mirror if it can answer a read right now, else None.
+            The returned mirror is locked, the caller releases `mirror.lock` after reading.
+        """
+
+        if not CALENDAR_MIRROR_ENABLED:
+            return None
+
+        mirror = self._mirror(connectedAccountId)
+        if self.shared is not None:
+            # Read before syncing, a write counted here has finished and is in the fetched changes
+            generation = self.shared.counters([f"calendar:{connectedAccountId}"])[0]
+            if generation != mirror.generation:
+                mirror.generation = generation
+                mirror.stale = True
+
+        if mirror.sync_token is None:
+            self._start_full_sync(connectedAccountId, mirror)
+            self.fallbacks += 1
+            return None
+
+        # Reads after a write wait for a sync already running; reads of a merely old copy go on
+        # with it while another read brings it up to date
+        if mirror.stale or time.monotonic() - mirror.synced_at > self.max_staleness:
+            if mirror.sync_lock.acquire(blocking=mirror.stale):
+                try:
+                    if mirror.stale or time.monotonic() - mirror.synced_at > self.max_staleness:
+                        synced = self._sync(connectedAccountId, mirror)
+                    else:
+                        synced = True
+                finally:
+                    mirror.sync_lock.release()
+                if not synced:
+                    self.fallbacks += 1
+                    return None
+
+        mirror.lock.acquire()
+        if mirror.sync_token is None:
+            mirror.lock.release()
+            self.fallbacks += 1
+            return None
+
+        # Move the window before title lookups around now reach its end; reads go on meanwhile
+        if datetime.now().astimezone() + timedelta(days=TITLE_SEARCH_WINDOW_DAYS) > mirror.window[1]:
+            self._start_full_sync(connectedAccountId, mirror)
+
+        return mirror
+
+    def events(self, connectedAccountId: str, time_min: str | None = None, time_max: str | None = None, query: str | None = None, max_results: int | None = None) -> list | None:
+        """
+            Events of the primary calendar ending after `time_min` and starting before `time_max`,
+            matching every term of `query`, ordered by start time. None if the mirror cannot answer,
+            i.e. for a range reaching outside the mirror's window. Without `time_max` the range
+            ends with the window, like "upcoming" listings in the bot.
+
+            :param required connectedAccountId: The ID of the connected account.
+            :param optional time_min: RFC3339 lower bound (exclusive) for an event's end time.
+            :param optional time_max: RFC3339 upper bound (exclusive) for an event's start time.
+            :param optional query: Search terms matched against title, description, location and people.
+            :param optional max_results: The maximum number of events to return.
+        """
+
+        try:
+            lower, upper = _parse_time(time_min), _parse_time(time_max)
+        except ValueError:
+            return None
+
+        mirror = self._fresh(connectedAccountId)
+        if mirror is None:
+            return None
+
+        # Events ending before the window are not held, so the range must start inside it
+        window_start, window_end = mirror.window
+        if lower is None or lower < window_start:
+            mirror.lock.release()
+            self.fallbacks += 1
+            return None
+
+        limit = max_results or DEFAULT_MAX_RESULTS
+        try:
+            terms = query.lower().split() if query else []
+            matches = []
+            for start, end, event in mirror.events.values():
+                if end <= lower:
+                    continue
+                if upper is not None and start >= upper:
+                    continue
+                if terms:
+                    text = _search_text(event)
+                    if not all(term in text for term in terms):
+                        continue
+                matches.append((start, event))
+        finally:
+            mirror.lock.release()
+
+        # Events after the window start later than every held one, so a full page is still exact
+        if upper is not None and upper > window_end and len(matches) < limit:
+            self.fallbacks += 1
+            return None
+
+        self.hits += 1
+        matches.sort(key=lambda match: match[0])
+        return [event for _, event in matches[:limit]]
+
+    def event(self, connectedAccountId: str, event_id: str) -> dict | None:
+        """
+            A single event of the primary calendar, or None if the mirror cannot answer.
+
+            :param required connectedAccountId: The ID of the connected account.
+            :param required event_id: The ID of the event.
+        """
+
+        mirror = self._fresh(connectedAccountId)
+        if mirror is None:
+            return None
+
+        try:
+            entry = mirror.events.get(event_id)
+        finally:
+            mirror.lock.release()
+
+        # Events outside the window are not held, so a missing one is looked up live
+        if entry is None:
+            self.fallbacks += 1
+            return None
+        self.hits += 1
+        return entry[2]
+
+    def find_by_title(self, connectedAccountId: str, title: str, limit: int = 5, window_days: float = TITLE_SEARCH_WINDOW_DAYS) -> list | None:
+        """
+            Events whose title is similar to `title`, as (score, event) pairs. Only events within
+            `window_days` of now are considered; equal scores are ordered by distance from now.
+            None if the mirror cannot answer.
+
+            :param required connectedAccountId: The ID of the connected account.
+            :param required title: The (possibly partial or misspelled) title of the event.
+            :param optional limit: How many candidates to return.
+            :param optional window_days: How far from now candidates may be.
+        """
+
+        mirror = self._fresh(connectedAccountId)
+        if mirror is None:
+            return None
+
+        now = datetime.now().astimezone()
+        window = timedelta(days=window_days)
+        if now - window < mirror.window[0] or now + window > mirror.window[1]:
+            mirror.lock.release()
+            self.fallbacks += 1
+            return None
+
+        def in_window(event_id):
+            start, end, _ = mirror.events[event_id]
+            return end >= now - window and start <= now + window
+
+        try:
+            matches = [
+                (score, abs(mirror.events[event_id][0] - now), mirror.events[event_id][2])
+                for event_id, score in mirror.titles.search(title, accept=in_window)
+            ]
+        finally:
+            mirror.lock.release()
+
+        self.hits += 1
+        matches.sort(key=lambda match: (-round(match[0], 2), match[1]))
+        return [(score, event) for score, _, event in matches[:limit]]
+
+    def mark_stale(self, connectedAccountId: str):
+        """
+            Force a sync before the next read, e.g. after the account's calendar was written to.
+
+            :param required connectedAccountId: The ID of the connected account.
+        """
+
+        with self._lock:
+            mirror = self._mirrors.get(connectedAccountId)
+        if mirror is not None:
+            mirror.stale = True
+        if self.shared is not None:
+            self.shared.increment(f"calendar:{connectedAccountId}")
+
+    def invalidate(self, connectedAccountId: str):
+        """
+            Drop the mirror of an account, e.g. when the user re-authenticates.
+
+            :param required connectedAccountId: The ID of the connected account.
+        """
+
+        with self._lock:
+            self._mirrors.pop(connectedAccountId, None)
+
+    def stats(self) -> dict:
+        return {
+            "accounts": len(self._mirrors),
+            "hits": self.hits,
+            "fallbacks": self.fallbacks,
+            "full_syncs": self.full_syncs,
+            "incremental_syncs": self.incremental_syncs,
+        }
+
+
+calendar_mirror = CalendarMirror(shared=shared_cache)
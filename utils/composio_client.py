@@ -0,0 +1,316 @@
+import os
+import time
+import asyncio
+import dotenv
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from utils.resilience import IDEMPOTENT_ACTIONS, TransientError, get_breaker, failure_response, retry_policy, resilience_metrics
+from utils.single_flight import SingleFlight, AsyncSingleFlight, make_key
+from utils.response_cache import response_cache
+from utils.rate_limit import rate_limiter
+from utils import progress
+
+
+dotenv.load_dotenv()
+COMPOSIO_API_KEY = os.environ["COMPOSIO_API_KEY"] # Get the API key from composio
+
+COMPOSIO_BASE_URL = "https://backend.composio.dev/api/v1"
+
+# Connection pool configuration
+COMPOSIO_POOL_SIZE = int(os.getenv("COMPOSIO_POOL_SIZE", "32"))  # Keep-alive connections per host
+COMPOSIO_POOL_HOSTS = int(os.getenv("COMPOSIO_POOL_HOSTS", "4"))  # Number of hosts to keep pools for
+COMPOSIO_CONNECT_TIMEOUT = float(os.getenv("COMPOSIO_CONNECT_TIMEOUT", "5"))  # Seconds
+COMPOSIO_READ_TIMEOUT = float(os.getenv("COMPOSIO_READ_TIMEOUT", "60"))  # Seconds
+
+
+def _action_steps(action: str, connectedAccountId: str, app_name: str, input_data: dict):
+    """
+        The policy of one Composio action (response cache, single flight, circuit breaker, rate
+        limit and retries), written once for both clients as a generator of effects. Each client's
+        `_drive` performs them its own way and sends the outcome back in:
+
+        ("call", func, args)    a local call, e.g. to the response cache, returns its result
+        ("sleep", seconds)      wait before a retry or for the rate limit
+        ("shared", key, steps)  drive `steps` once for all identical calls in flight, returns the response
+        ("send", action, payload) post the action, returns (status, response_json); transport
+            failures are thrown in as `TransientError`
+
+        Returns the decoded JSON response.
+    """
+
+    payload = {
+        "connectedAccountId": connectedAccountId,
+        "appName": app_name,
+        "input": input_data
+    }
+
+    progress.emit("tool_started", action)
+
+    cached = yield ("call", response_cache.get, (action, connectedAccountId, input_data))
+    if cached is not None:
+        return cached
+
+    # Identical reads that are already in flight share one upstream request
+    if action in IDEMPOTENT_ACTIONS:
+        key = make_key(connectedAccountId, action, input_data)
+        generation = yield ("call", response_cache.generation, (action, connectedAccountId, input_data))
+        response_json = yield ("shared", key, _send_steps(action, app_name, payload))
+        yield ("call", response_cache.store, (action, connectedAccountId, input_data, response_json, generation))
+        return response_json
+
+    response_json = yield from _send_steps(action, app_name, payload)
+    yield ("call", response_cache.invalidate_for_write, (action, connectedAccountId, input_data))
+    return response_json
+
+
+def _send_steps(action: str, app_name: str, payload: dict):
+    """Send an action through its app's circuit breaker and the rate limits, retrying idempotent reads."""
+
+    breaker = get_breaker(app_name)
+    if not breaker.allow():
+        resilience_metrics.record_short_circuit(app_name)
+        return failure_response(503, f"{app_name} is temporarily unavailable, please try again later.")
+
+    attempts = retry_policy.attempts_for(action)
+    for attempt in range(attempts):
+        delay = rate_limiter.reserve(app_name, payload["connectedAccountId"])
+        if delay > 0:
+            progress.emit("throttled", f"⏳ Waiting {delay:.1f}s to stay within the {app_name} rate limit")
+            yield ("sleep", delay)
+        try:
+            status, response_json = yield ("send", action, payload)
+            if status >= 500 or status == 429:
+                raise TransientError(f"HTTP {status}")
+        except TransientError as e:
+            if breaker.record_failure():
+                resilience_metrics.record_breaker_open(app_name)
+            if attempt + 1 < attempts and breaker.allow():
+                resilience_metrics.record_retry(action)
+                yield ("sleep", retry_policy.delay(attempt))
+                continue
+            resilience_metrics.record_failure(action)
+            print(f"Composio action {action} failed: {e}")
+            return failure_response(503, str(e))
+        except BaseException:
+            # Any other error, or a cancelled call, has no outcome, so a half-open trial must not stay in flight
+            breaker.release_trial()
+            raise
+
+        breaker.record_success()
+        return response_json
+
+
+class ComposioClient:
+    """
+        Thin client for the Composio REST API.
+
+        A single `requests.Session` is shared by every tool so that agent runs reuse
+        warm keep-alive connections to backend.composio.dev instead of paying a new
+        TCP + TLS handshake on every action.
+    """
+
+    def __init__(self, api_key: str, base_url: str = COMPOSIO_BASE_URL, pool_size: int = COMPOSIO_POOL_SIZE, pool_hosts: int = COMPOSIO_POOL_HOSTS, connect_timeout: float = COMPOSIO_CONNECT_TIMEOUT, read_timeout: float = COMPOSIO_READ_TIMEOUT):
+        """
+            :param required api_key: The Composio API key.
+            :param optional base_url: Base URL of the Composio API.
+            :param optional pool_size: Maximum number of pooled connections kept per host.
+            :param optional pool_hosts: Number of per-host connection pools to keep.
+            :param optional connect_timeout: Seconds to wait for a connection to be established.
+            :param optional read_timeout: Seconds to wait for the response once connected.
+        """
+
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            "X-API-Key": api_key,
+            "Content-Type": "application/json"
+        })
+
+        adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.single_flight = SingleFlight()
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """
+            Send a request to the Composio API using the shared session.
+
+            :param required method: HTTP method, e.g. "GET" or "POST".
+            :param required path: Path relative to the API base URL, e.g. "connectedAccounts".
+        """
+
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, f"{self.base_url}/{path.lstrip('/')}", **kwargs)
+
+    def execute_action(self, action: str, connectedAccountId: str, app_name: str, input_data: dict) -> dict:
+        """
+            Execute a Composio action and return the decoded JSON response.
+
+            :param required action: The action name, e.g. "googlecalendar_create_event".
+            :param required connectedAccountId: The ID of the connected account.
+            :param required app_name: The app the action belongs to, e.g. "googlecalendar".
+            :param required input_data: The input parameters of the action.
+        """
+
+        return self._drive(_action_steps(action, connectedAccountId, app_name, input_data))
+
+    def _drive(self, steps):
+        """Perform the effects of `_action_steps` with blocking calls. Returns the response."""
+
+        try:
+            effect = next(steps)
+            while True:
+                kind, *args = effect
+                if kind == "send":
+                    try:
+                        response = self.request("POST", f"actions/{args[0]}/execute", json=args[1])
+                        result = response.status_code, response.json()
+                    except (requests.RequestException, ValueError) as e:
+                        effect = steps.throw(TransientError(str(e)))
+                        continue
+                elif kind == "call":
+                    result = args[0](*args[1])
+                elif kind == "sleep":
+                    result = time.sleep(args[0])
+                else:
+                    result = self.single_flight.do(args[0], lambda: self._drive(args[1]))
+                effect = steps.send(result)
+        except StopIteration as done:
+            return done.value
+        finally:
+            steps.close()
+
+    def get_connected_account(self, connectedAccountId: str) -> requests.Response:
+        """
+            Fetch a connected account (including its connection params).
+
+            :param required connectedAccountId: The ID of the connected account.
+        """
+
+        return self.request("GET", f"connectedAccounts/{connectedAccountId}")
+
+    def create_connected_account(self, integration_id: str) -> dict:
+        """
+            Start a new connection for the given integration.
+            The response contains the `connectedAccountId` and the `redirectUrl` the user has to visit.
+
+            :param required integration_id: The ID of the Composio integration.
+        """
+
+        response = self.request("POST", "connectedAccounts", json={"integrationId": integration_id})
+        return response.json()
+
+
+class AsyncComposioClient:
+    """
+        asyncio counterpart of `ComposioClient` for use from the bot's coroutines.
+
+        The underlying `aiohttp.ClientSession` is created lazily on first use, because it
+        has to be bound to the running event loop.
+    """
+
+    def __init__(self, api_key: str, base_url: str = COMPOSIO_BASE_URL, pool_size: int = COMPOSIO_POOL_SIZE, pool_hosts: int = COMPOSIO_POOL_HOSTS, connect_timeout: float = COMPOSIO_CONNECT_TIMEOUT, read_timeout: float = COMPOSIO_READ_TIMEOUT):
+        """
+            :param required api_key: The Composio API key.
+            :param optional base_url: Base URL of the Composio API.
+            :param optional pool_size: Maximum number of pooled connections kept per host.
+            :param optional pool_hosts: Number of hosts to keep connections for.
+            :param optional connect_timeout: Seconds to wait for a connection to be established.
+            :param optional read_timeout: Seconds to wait for the response once connected.
+        """
+
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.pool_size = pool_size
+        self.pool_hosts = pool_hosts
+        self.timeout = aiohttp.ClientTimeout(connect=connect_timeout, sock_read=read_timeout)
+        self._session = None
+        self.single_flight = AsyncSingleFlight()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size * self.pool_hosts, limit_per_host=self.pool_size)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                headers={
+                    "X-API-Key": self.api_key,
+                    "Content-Type": "application/json"
+                }
+            )
+        return self._session
+
+    async def request(self, method: str, path: str, **kwargs) -> tuple[int, dict]:
+        """
+            Send a request to the Composio API and return the status code and decoded JSON body.
+
+            :param required method: HTTP method, e.g. "GET" or "POST".
+            :param required path: Path relative to the API base URL, e.g. "connectedAccounts".
+        """
+
+        session = self._get_session()
+        async with session.request(method, f"{self.base_url}/{path.lstrip('/')}", **kwargs) as response:
+            return response.status, await response.json(content_type=None)
+
+    async def execute_action(self, action: str, connectedAccountId: str, app_name: str, input_data: dict) -> dict:
+        """
+            Execute a Composio action and return the decoded JSON response.
+
+            :param required action: The action name, e.g. "googlecalendar_find_event".
+            :param required connectedAccountId: The ID of the connected account.
+            :param required app_name: The app the action belongs to, e.g. "googlecalendar".
+            :param required input_data: The input parameters of the action.
+        """
+
+        return await self._drive(_action_steps(action, connectedAccountId, app_name, input_data))
+
+    async def _drive(self, steps):
+        """Perform the effects of `_action_steps` without blocking the event loop. Returns the response."""
+
+        try:
+            effect = next(steps)
+            while True:
+                kind, *args = effect
+                if kind == "send":
+                    try:
+                        result = await self.request("POST", f"actions/{args[0]}/execute", json=args[1])
+                    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                        effect = steps.throw(TransientError(str(e)))
+                        continue
+                elif kind == "call" and response_cache.shared is not None:
+                    # The shared cache is a SQLite file that may wait for other processes' writes
+                    result = await asyncio.to_thread(args[0], *args[1])
+                elif kind == "call":
+                    result = args[0](*args[1])
+                elif kind == "sleep":
+                    result = await asyncio.sleep(args[0])
+                else:
+                    result = await self.single_flight.do(args[0], lambda: self._drive(args[1]))
+                effect = steps.send(result)
+        except StopIteration as done:
+            return done.value
+        finally:
+            steps.close()
+
+    async def create_connected_account(self, integration_id: str) -> dict:
+        """
+            Start a new connection for the given integration.
+            The response contains the `connectedAccountId` and the `redirectUrl` the user has to visit.
+
+            :param required integration_id: The ID of the Composio integration.
+        """
+
+        _, response_json = await self.request("POST", "connectedAccounts", json={"integrationId": integration_id})
+        return response_json
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
+composio_client = ComposioClient(COMPOSIO_API_KEY)
+async_composio_client = AsyncComposioClient(COMPOSIO_API_KEY)
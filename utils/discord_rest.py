@@ -0,0 +1,140 @@
+import os
+import threading
+import time
+import requests
+from utils.progress import STATUS_EDIT_INTERVAL, STATUS_MAX_LINES
+
+
+DISCORD_API_URL = "https://discord.com/api/v10"
+DISCORD_REST_TIMEOUT = float(os.getenv("DISCORD_REST_TIMEOUT", "10"))  # Seconds
+DISCORD_REST_MAX_RETRIES = 3  # Attempts per request when Discord answers 429
+
+
+class DiscordRest:
+    """
+        Minimal Discord REST client for processes without a gateway connection (the job
+        workers), used to post results into the messages the bot sent when a job was queued.
+    """
+
+    def __init__(self, token: str, base_url: str = DISCORD_API_URL, timeout: float = DISCORD_REST_TIMEOUT):
+        """
+            :param required token: The Discord bot token.
+            :param optional base_url: Base URL of the Discord API.
+            :param optional timeout: Seconds to wait for a response.
+        """
+
+        self.base_url = base_url
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bot {token}",
+            "Content-Type": "application/json"
+        })
+
+    def _request(self, method: str, path: str, payload: dict) -> int:
+        """Send a request, waiting out rate limits. Returns the HTTP status code."""
+
+        for _ in range(DISCORD_REST_MAX_RETRIES):
+            response = self.session.request(method, f"{self.base_url}/{path}", json=payload, timeout=self.timeout)
+            if response.status_code != 429:
+                return response.status_code
+            time.sleep(float(response.json().get("retry_after", 1)))
+        return 429
+
+    def edit_message(self, channel_id: int, message_id: int, embed: dict) -> int:
+        """
+            Replace the embed of a message the bot sent. Returns the HTTP status code.
+
+            :param required channel_id: The channel the message is in.
+            :param required message_id: The message to edit.
+            :param required embed: The embed, as returned by `discord.Embed.to_dict()`.
+        """
+
+        return self._request("PATCH", f"channels/{channel_id}/messages/{message_id}", {"embeds": [embed]})
+
+    def send_message(self, channel_id: int, embed: dict) -> int:
+        """
+            Post a new message with an embed. Returns the HTTP status code.
+
+            :param required channel_id: The channel to post in.
+            :param required embed: The embed, as returned by `discord.Embed.to_dict()`.
+        """
+
+        return self._request("POST", f"channels/{channel_id}/messages", {"embeds": [embed]})
+
+
+class RestStatusMessage:
+    """
+        Progress sink editing a status message over REST, the worker-side counterpart of
+        `StatusEditCoalescer`: lines arriving faster than `interval` are merged, and the message
+        is edited at most once per interval, always with the latest state.
+
+        Edits are sent from a flush thread, so the agent never waits for Discord (or its 429s).
+    """
+
+    def __init__(self, rest: DiscordRest, channel_id: int, message_id: int, embed: dict, interval: float = STATUS_EDIT_INTERVAL, max_lines: int = STATUS_MAX_LINES):
+        """
+            :param required rest: The REST client.
+            :param required channel_id: The channel the status message is in.
+            :param required message_id: The status message.
+            :param required embed: The processing embed the progress lines are appended to.
+            :param optional interval: Minimum seconds between two edits.
+            :param optional max_lines: How many of the latest lines to show.
+        """
+
+        self.rest = rest
+        self.channel_id = channel_id
+        self.message_id = message_id
+        self.embed = embed
+        self.interval = interval
+        self.max_lines = max_lines
+        self.lines = []
+        self.edits = 0
+        self._changed = threading.Condition()
+        self._last_edit = 0.0
+        self._dirty = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._flush, name=f"status-message-{message_id}", daemon=True)
+        self._thread.start()
+
+    def push(self, line: str):
+        """Add a progress line. Called from the thread running the agent."""
+
+        with self._changed:
+            if self._closed:
+                return
+            self.lines.append(line)
+            self._dirty = True
+            self._changed.notify()
+
+    def _flush(self):
+        while True:
+            with self._changed:
+                while not self._dirty and not self._closed:
+                    self._changed.wait()
+                # Lines arriving while the interval runs out go into the same edit
+                while not self._closed:
+                    delay = self._last_edit + self.interval - time.monotonic()
+                    if delay <= 0:
+                        break
+                    self._changed.wait(delay)
+                if self._closed:
+                    return
+                self._dirty = False
+                lines = self.lines[-self.max_lines:]
+
+            embed = dict(self.embed, description=f"{self.embed.get('description', '')}\n\n" + "\n".join(lines))
+            try:
+                self.rest.edit_message(self.channel_id, self.message_id, embed)
+                self.edits += 1
+            except requests.RequestException as e:
+                print(f"Failed to update status message: {e}")
+            self._last_edit = time.monotonic()
+
+    def close(self):
+        """Stop editing and wait for an edit in flight. Call this before the final result edit."""
+
+        with self._changed:
+            self._closed = True
+            self._changed.notify()
+        self._thread.join()
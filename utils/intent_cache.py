@@ -0,0 +1,148 @@
+import asyncio
+import threading
+import time
+from utils.shared_cache import SharedCache, shared_cache
+
+
+# Canned intents of the dashboard buttons and how long (seconds) one result is reused.
+# Results are bucketed on wall-clock time, so e.g. "today" never outlives midnight.
+CANNED_INTENTS = {
+    "upcoming": 60,
+    "today": 60,
+    "unread": 30,
+}
+
+# Replies that report a failure rather than a result, and must not be reused
+ERROR_MARKERS = ("Something went wrong", "authenticat", "temporarily unavailable")
+
+
+async def _call(func, *args):
+    return func(*args)
+
+
+class IntentCache:
+    """
+        Per-user cache of the rendered results of canned button intents, keyed by
+        (user, intent, time bucket). A user's entries are dropped as soon as that user
+        runs anything through the bot that may write.
+
+        With a `SharedCache` the results are kept there instead, so every bot process serves
+        them, and dropping a user's entries bumps a per-user generation that is part of the key.
+    """
+
+    def __init__(self, intents: dict = CANNED_INTENTS, shared: SharedCache | None = None):
+        """
+            :param optional intents: Bucket length in seconds per intent, see `CANNED_INTENTS`.
+            :param optional shared: Cache shared with the other bot processes.
+        """
+
+        self.intents = intents
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._entries = {}  # user id -> {intent: (bucket, result)}
+        self._generations = {}  # user id -> number of invalidations
+        self.hits = 0
+        self.misses = 0
+
+    def _bucket(self, intent: str) -> int:
+        return int(time.time() // self.intents[intent])
+
+    def _shared_key(self, user_id: int, intent: str, generation: int) -> str:
+        return f"intent:{user_id}:{generation}:{intent}:{self._bucket(intent)}"
+
+    def generation(self, user_id: int) -> int:
+        """
+            How often the user's entries were invalidated. Read it before computing a result
+            and pass it to `set`, so a result computed across an invalidation is not stored.
+
+            :param required user_id: The Discord user ID.
+        """
+
+        if self.shared is not None:
+            return self.shared.counters([f"intent:{user_id}"])[0]
+        with self._lock:
+            return self._generations.get(user_id, 0)
+
+    def get(self, user_id: int, intent: str) -> str | None:
+        """
+            :param required user_id: The Discord user ID.
+            :param required intent: One of `CANNED_INTENTS`.
+        """
+
+        if self.shared is not None:
+            result = self.shared.get(self._shared_key(user_id, intent, self.generation(user_id)))
+            with self._lock:
+                if result is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+            return result
+
+        with self._lock:
+            entry = self._entries.get(user_id, {}).get(intent)
+            if entry is not None and entry[0] == self._bucket(intent):
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def set(self, user_id: int, intent: str, result: str, generation: int | None = None):
+        """
+            :param required user_id: The Discord user ID.
+            :param required intent: One of `CANNED_INTENTS`.
+            :param required result: The rendered result. Error replies are not cached.
+            :param optional generation: `generation(user_id)` from before the result was computed (default: now).
+        """
+
+        if any(marker in result for marker in ERROR_MARKERS):
+            return
+        if generation is None:
+            generation = self.generation(user_id)
+        if self.shared is not None:
+            # Under an invalidated generation the entry is never read
+            self.shared.set(self._shared_key(user_id, intent, generation), result, self.intents[intent])
+            return
+        with self._lock:
+            if self._generations.get(user_id, 0) == generation:
+                self._entries.setdefault(user_id, {})[intent] = (self._bucket(intent), result)
+
+    async def get_or_fetch(self, user_id: int, intent: str, factory) -> str:
+        """
+            Return the cached result, or await `factory()` and cache what it returns.
+
+            :param required user_id: The Discord user ID.
+            :param required intent: One of `CANNED_INTENTS`.
+            :param required factory: Zero-argument callable returning the coroutine computing the result.
+        """
+
+        # The shared cache is a SQLite file that may wait for other processes' writes, so it is read off the event loop
+        run = asyncio.to_thread if self.shared is not None else _call
+
+        # Taken before fetching, so a write finishing during the fetch keeps its result out of the cache
+        generation = await run(self.generation, user_id)
+        result = await run(self.get, user_id, intent)
+        if result is None:
+            result = await factory()
+            await run(self.set, user_id, intent, result, generation)
+        return result
+
+    def invalidate(self, user_id: int):
+        """
+            Drop every cached intent of a user, e.g. after the user ran a write.
+
+            :param required user_id: The Discord user ID.
+        """
+
+        if self.shared is not None:
+            self.shared.increment(f"intent:{user_id}")
+            return
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"users": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+intent_cache = IntentCache(shared=shared_cache)
@@ -0,0 +1,98 @@
+import re
+import threading
+from collections import Counter
+
+
+# Keyword rules per service. Each match adds the given weight to the service's score.
+SERVICE_KEYWORDS = {
+    "calendar": {
+        r"\bcalendars?\b": 3,
+        r"\b(events?|meetings?|appointments?|agenda|schedul\w*|reschedul\w*)\b": 2,
+        r"\b(attendees?|invite\w*|busy|free slot|availability)\b": 1,
+        r"\b(today|tomorrow|tonight|next week|this week|monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b": 1,
+        r"\b\d{1,2}(:\d{2})?\s?(am|pm)\b": 1,
+    },
+    "gmail": {
+        r"\b(gmail|inbox)\b": 3,
+        r"\b(e-?mails?|mails?|drafts?|unread)\b": 2,
+        r"\b(cc|bcc|subject|reply|forward)\b": 1,
+        r"[\w.+-]+@[\w-]+\.[\w.]+": 1,
+    },
+    "github": {
+        r"\bgithub\b": 3,
+        r"\b(repos?|repositor(y|ies)|pull requests?|prs?|issues?)\b": 2,
+        r"\b(star|stars|branch(es)?|commits?|fork|labels?)\b": 1,
+        r"\b[\w.-]+/[\w.-]+\b": 1,
+    },
+    "slack": {
+        r"\bslack\b": 3,
+        r"\b(channels?|dms?|direct messages?|workspace)\b": 2,
+        r"(^|\s)#[\w-]+": 2,
+        r"\b(status|post|notify|team)\b": 1,
+    },
+}
+
+# Only services scoring at least this much are considered relevant
+MIN_SCORE = 2
+
+# More services than this and the full toolset is cheaper than guessing
+MAX_ROUTED_SERVICES = 2
+
+
+class IntentRouter:
+    """
+        Cheap rule-based pre-routing of `!ai` prompts.
+
+        Picks the one or two services a prompt is about, so the agent is built with only
+        those tools. Falls back to "all" when no service or too many services match.
+    """
+
+    def __init__(self, service_keywords: dict = SERVICE_KEYWORDS, min_score: int = MIN_SCORE, max_services: int = MAX_ROUTED_SERVICES):
+        self.rules = {
+            service: [(re.compile(pattern, re.IGNORECASE), weight) for pattern, weight in patterns.items()]
+            for service, patterns in service_keywords.items()
+        }
+        self.min_score = min_score
+        self.max_services = max_services
+        self._lock = threading.Lock()
+        self.routes = Counter()
+
+    def scores(self, prompt: str) -> dict:
+        """
+            Score every service against the prompt.
+
+            :param required prompt: The user's request.
+        """
+
+        return {
+            service: sum(weight * len(pattern.findall(prompt)) for pattern, weight in rules)
+            for service, rules in self.rules.items()
+        }
+
+    def route(self, prompt: str) -> list[str]:
+        """
+            Pick the services relevant to the prompt, in the order of `service_keywords` whatever
+            their scores, so the same services always share one agent pool. Returns ["all"] when unsure.
+
+            :param required prompt: The user's request.
+        """
+
+        scores = self.scores(prompt)
+        services = [service for service in self.rules if scores[service] >= self.min_score]
+
+        if not services or len(services) > self.max_services:
+            services = ["all"]
+
+        with self._lock:
+            self.routes["+".join(services)] += 1
+
+        return services
+
+    def stats(self) -> dict:
+        """How often each route has been taken, e.g. {"calendar": 12, "calendar+slack": 3, "all": 2}."""
+
+        with self._lock:
+            return dict(self.routes)
+
+
+intent_router = IntentRouter()
@@ -0,0 +1,222 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+AGENT_MAX_PER_USER = int(os.getenv("AGENT_MAX_PER_USER", "2"))  # Agent runs one user may have queued or running at once
+AGENT_MAX_QUEUED = int(os.getenv("AGENT_MAX_QUEUED", "50"))  # Agent runs waiting for a worker before new ones are rejected
+
+
+class AdmissionRejected(Exception):
+    """Raised when a job is not accepted because its user or the whole queue is at its limit."""
+
+
+class _Job:
+    """A single blocking call waiting to be run on the worker pool."""
+
+    def __init__(self, user_id, func, args, kwargs, future, loop):
+        self.user_id = user_id
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.future = future
+        self.loop = loop
+        self.enqueued_at = time.monotonic()
+
+
+def _resolve(future, result=None, error=None):
+    """Set the outcome of an asyncio future unless the waiter already gave up."""
+
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class JobExecutor:
+    """
+        Run blocking agent jobs (crewai crews, Composio calls) off the Discord event loop.
+
+        Jobs are queued per user and dispatched round-robin across users, so one user
+        submitting many requests cannot starve everybody else of worker threads.
+
+        Admission control: a user may have at most `max_per_user` jobs queued or running, and at
+        most `max_queued` jobs wait for a worker. Jobs over either limit are rejected up front
+        with `AdmissionRejected` instead of piling up. `max_workers` caps concurrent runs.
+    """
+
+    def __init__(self, max_workers: int = 4, wait_samples: int = 100, max_per_user: int = AGENT_MAX_PER_USER, max_queued: int = AGENT_MAX_QUEUED):
+        """
+            :param optional max_workers: Number of worker threads running jobs concurrently.
+            :param optional wait_samples: How many recent queue wait and run times to keep for stats and estimates.
+            :param optional max_per_user: Jobs one user may have queued or running at once.
+            :param optional max_queued: Jobs that may wait for a worker at once.
+        """
+
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="agent-job")
+        self._lock = threading.Lock()
+        self._queues = OrderedDict()  # user_id -> deque of jobs, in round-robin order
+        self.max_per_user = max_per_user
+        self.max_queued = max_queued
+        self._running = 0
+        self._running_by_user = {}
+        self._completed = 0
+        self._rejected = 0
+        self._wait_times = deque(maxlen=wait_samples)
+        self._run_times = deque(maxlen=wait_samples)
+
+    def enqueue(self, user_id, func, *args, **kwargs) -> _Job:
+        """
+            Queue `func(*args, **kwargs)` for `user_id`. Await the returned job's `future` for the
+            result. Must be called from the event loop.
+            Raises `AdmissionRejected` if the user or the queue is at its limit.
+
+            :param required user_id: The Discord user the job belongs to (fairness key).
+            :param required func: The blocking callable to run on a worker thread.
+        """
+
+        loop = asyncio.get_running_loop()
+        job = _Job(user_id, func, args, kwargs, loop.create_future(), loop)
+
+        with self._lock:
+            in_flight = len(self._queues.get(user_id, ())) + self._running_by_user.get(user_id, 0)
+            if in_flight >= self.max_per_user:
+                self._rejected += 1
+                raise AdmissionRejected(f"You already have {in_flight} requests in progress. Please wait for one to finish.")
+            if self._running >= self.max_workers and sum(len(jobs) for jobs in self._queues.values()) >= self.max_queued:
+                self._rejected += 1
+                raise AdmissionRejected("The bot is very busy right now. Please try again in a minute.")
+
+            self._queues.setdefault(user_id, deque()).append(job)
+            self._dispatch()
+
+        return job
+
+    async def submit(self, user_id, func, *args, **kwargs):
+        """
+            Queue `func(*args, **kwargs)` for `user_id` and wait for its result.
+            Raises `AdmissionRejected` if the user or the queue is at its limit.
+
+            :param required user_id: The Discord user the job belongs to (fairness key).
+            :param required func: The blocking callable to run on a worker thread.
+        """
+
+        return await self.enqueue(user_id, func, *args, **kwargs).future
+
+    def position(self, job: _Job) -> tuple[int, float | None] | None:
+        """
+            Where a queued job stands: (1-based position in the dispatch order, estimated seconds
+            until it starts, or None before any job finished). Returns None once the job started.
+
+            :param required job: A job returned by `enqueue`.
+        """
+
+        with self._lock:
+            jobs = self._queues.get(job.user_id)
+            if not jobs or job not in jobs:
+                return None
+
+            # Round-robin: the job runs in round `index`, after every other user's first `index`
+            # jobs and after the users ahead of its user in the rotation that have one more
+            index = jobs.index(job)
+            ahead = 0
+            before = True
+            for user_id, queued in self._queues.items():
+                if user_id == job.user_id:
+                    before = False
+                    continue
+                ahead += min(len(queued), index + 1 if before else index)
+            position = ahead + index + 1
+
+            run_times = list(self._run_times)
+            running = self._running
+
+        if not run_times:
+            return position, None
+        # Every worker finishes one job per average run, the jobs ahead and the running ones go first
+        return position, (running + position - 1) // self.max_workers * sum(run_times) / len(run_times)
+
+    def _next_job(self):
+        """Pop the next job, rotating the user it came from to the back of the line."""
+
+        while self._queues:
+            user_id, jobs = self._queues.popitem(last=False)
+            job = jobs.popleft()
+            if jobs:
+                self._queues[user_id] = jobs
+            if not job.future.cancelled():
+                return job
+        return None
+
+    def _dispatch(self):
+        """Start queued jobs while there are free workers. Caller must hold the lock."""
+
+        while self._running < self.max_workers:
+            job = self._next_job()
+            if job is None:
+                return
+            self._running += 1
+            self._running_by_user[job.user_id] = self._running_by_user.get(job.user_id, 0) + 1
+            self._wait_times.append(time.monotonic() - job.enqueued_at)
+            self._pool.submit(self._run, job)
+
+    def _run(self, job):
+        started = time.monotonic()
+        result, error = None, None
+        try:
+            result = job.func(*job.args, **job.kwargs)
+        except Exception as e:
+            error = e
+
+        with self._lock:
+            self._running -= 1
+            self._running_by_user[job.user_id] -= 1
+            if not self._running_by_user[job.user_id]:
+                del self._running_by_user[job.user_id]
+            self._completed += 1
+            self._run_times.append(time.monotonic() - started)
+            self._dispatch()
+
+        job.loop.call_soon_threadsafe(_resolve, job.future, result, error)
+
+    def queue_depth(self, user_id=None) -> int:
+        """
+            Number of jobs waiting for a worker.
+
+            :param optional user_id: Only count jobs belonging to this user.
+        """
+
+        with self._lock:
+            if user_id is not None:
+                return len(self._queues.get(user_id, ()))
+            return sum(len(jobs) for jobs in self._queues.values())
+
+    def stats(self) -> dict:
+        """Snapshot of the executor's load: queue depth, running jobs, wait and run times in seconds."""
+
+        now = time.monotonic()
+        with self._lock:
+            queued = [job for jobs in self._queues.values() for job in jobs]
+            waits = list(self._wait_times)
+            runs = list(self._run_times)
+            return {
+                "workers": self.max_workers,
+                "running": self._running,
+                "queued": len(queued),
+                "queued_users": len(self._queues),
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "oldest_wait": max((now - job.enqueued_at for job in queued), default=0.0),
+                "avg_wait": sum(waits) / len(waits) if waits else 0.0,
+                "max_wait": max(waits, default=0.0),
+                "avg_run": sum(runs) / len(runs) if runs else 0.0,
+            }
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,285 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from utils.job_executor import AdmissionRejected, AGENT_MAX_PER_USER, AGENT_MAX_QUEUED
+
+
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", "./db/jobs.sqlite3")
+JOB_LEASE = float(os.getenv("JOB_LEASE", "60"))  # Seconds a claimed job stays with its worker without a heartbeat
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))  # Runs of a job interrupted by worker crashes before it is given up
+JOB_RETENTION = float(os.getenv("JOB_RETENTION", str(24 * 60 * 60)))  # Seconds finished jobs are kept
+RUN_TIME_SAMPLES = 50  # Recent jobs whose run times are averaged for wait estimates
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+INTERRUPTED_MESSAGE = "Your request was interrupted several times and has been cancelled. Please try again."
+
+
+class Job:
+    """An agent run waiting in or taken from the queue."""
+
+    def __init__(self, id, user_id, service, connected_account_id, prompt, reply, attempts, result=None):
+        self.id = id
+        self.user_id = user_id
+        self.service = service
+        self.connected_account_id = connected_account_id
+        self.prompt = prompt
+        self.reply = reply  # channel_id, message_id, processing embed and result embed of the status message
+        self.attempts = attempts
+        self.result = result
+
+
+class JobQueue:
+    """
+        Durable agent job queue in a SQLite file, shared by the bot processes enqueuing jobs
+        and the worker processes running them.
+
+        A worker claims a job with a lease and extends it with heartbeats while the agent runs.
+        If the worker dies, the lease runs out and another worker claims the job again, so
+        nothing queued or in flight is lost on a restart. Finished jobs keep their result until
+        it was delivered to Discord.
+
+        Workers pick the oldest job of the user with the fewest running jobs, so one user
+        queuing many requests does not starve everybody else.
+
+        Admission control works as in `JobExecutor`, across every bot process: a user may have
+        at most `max_per_user` jobs queued or running, and at most `max_queued` jobs may wait.
+    """
+
+    def __init__(self, path: str = JOB_QUEUE_PATH, lease: float = JOB_LEASE, max_attempts: int = JOB_MAX_ATTEMPTS, max_per_user: int = AGENT_MAX_PER_USER, max_queued: int = AGENT_MAX_QUEUED):
+        """
+            :param optional path: Path of the SQLite database file.
+            :param optional lease: Seconds a claimed job stays with its worker without a heartbeat.
+            :param optional max_attempts: Runs of a job before it is given up.
+            :param optional max_per_user: Jobs one user may have queued or running at once.
+            :param optional max_queued: Jobs that may wait for a worker at once.
+        """
+
+        self.path = path
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.max_per_user = max_per_user
+        self.max_queued = max_queued
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "user_id INTEGER NOT NULL, "
+            "service TEXT NOT NULL, "
+            "connected_account_id TEXT NOT NULL, "
+            "prompt TEXT NOT NULL, "
+            "reply TEXT NOT NULL, "
+            "state TEXT NOT NULL, "
+            "worker TEXT, "
+            "lease_until REAL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, "
+            "result TEXT, "
+            "delivered INTEGER NOT NULL DEFAULT 0, "
+            "created_at REAL NOT NULL, "
+            "started_at REAL, "
+            "finished_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_user ON jobs (user_id, state)")
+
+    def enqueue(self, user_id: int, service: str, connected_account_id: str, prompt: str, reply: dict) -> int:
+        """
+            Queue an agent run. Returns the job ID.
+            Raises `AdmissionRejected` if the user or the queue is at its limit.
+
+            :param required user_id: The Discord user ID.
+            :param required service: "calendar", "gmail", "github", "slack" or "all".
+            :param required connected_account_id: The ID of the connected account of the user.
+            :param required prompt: The user's request.
+            :param required reply: Where and how to post the result: channel_id, message_id, processing and result embeds.
+        """
+
+        with self._lock:
+            # Checked and inserted in one write transaction, so concurrent bot processes cannot both pass the check
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                in_flight = self._conn.execute("SELECT COUNT(*) FROM jobs WHERE user_id = ? AND state IN (?, ?)", (user_id, QUEUED, RUNNING)).fetchone()[0]
+                if in_flight >= self.max_per_user:
+                    self.rejected += 1
+                    raise AdmissionRejected(f"You already have {in_flight} requests in progress. Please wait for one to finish.")
+                if self._conn.execute("SELECT COUNT(*) FROM jobs WHERE state = ?", (QUEUED,)).fetchone()[0] >= self.max_queued:
+                    self.rejected += 1
+                    raise AdmissionRejected("The bot is very busy right now. Please try again in a minute.")
+
+                job_id = self._conn.execute(
+                    "INSERT INTO jobs (user_id, service, connected_account_id, prompt, reply, state, created_at) VALUES (?, ?, ?, ?, ?, ?, ?) RETURNING id",
+                    (user_id, service, connected_account_id, prompt, json.dumps(reply), QUEUED, time.time())
+                ).fetchone()[0]
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return job_id
+
+    def wait_estimate(self, workers: int) -> tuple[int, float | None]:
+        """
+            Queue position of a job enqueued now and its estimated wait in seconds before a worker
+            starts it, from the run times of recent jobs (None before any job finished).
+
+            :param required workers: Number of agent workers across all worker processes.
+        """
+
+        with self._lock:
+            counts = dict(self._conn.execute(
+                "SELECT state, COUNT(*) FROM jobs WHERE state IN (?, ?) GROUP BY state", (QUEUED, RUNNING)
+            ).fetchall())
+            run_times = [row[0] for row in self._conn.execute(
+                "SELECT finished_at - started_at FROM jobs WHERE state = ? ORDER BY id DESC LIMIT ?", (DONE, RUN_TIME_SAMPLES)
+            )]
+
+        position = counts.get(QUEUED, 0) + 1
+        if not run_times:
+            return position, None
+        return position, (counts.get(RUNNING, 0) + position - 1) // max(1, workers) * sum(run_times) / len(run_times)
+
+    def claim(self, worker: str) -> Job | None:
+        """
+            Take the next job, or a job whose worker stopped sending heartbeats. Returns None if there is nothing to do.
+
+            :param required worker: ID of the claiming worker.
+        """
+
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "UPDATE jobs SET state = ?, worker = ?, lease_until = ?, attempts = attempts + 1, started_at = ? "
+                "WHERE id = ("
+                "  SELECT id FROM jobs AS candidate "
+                "  WHERE (state = ? OR (state = ? AND lease_until < ?)) AND attempts < ? "
+                "  ORDER BY (SELECT COUNT(*) FROM jobs AS busy WHERE busy.user_id = candidate.user_id AND busy.state = ?), id "
+                "  LIMIT 1"
+                ") RETURNING id, user_id, service, connected_account_id, prompt, reply, attempts",
+                (RUNNING, worker, now + self.lease, now, QUEUED, RUNNING, now, self.max_attempts, RUNNING)
+            ).fetchone()
+        if row is None:
+            return None
+        return Job(row[0], row[1], row[2], row[3], row[4], json.loads(row[5]), row[6])
+
+    def heartbeat(self, worker: str) -> int:
+        """
+            Extend the leases of every job a worker is running. Returns the number of jobs.
+
+            :param required worker: ID of the worker.
+        """
+
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE state = ? AND worker = ?",
+                (time.time() + self.lease, RUNNING, worker)
+            ).rowcount
+
+    def release(self, worker: str) -> int:
+        """
+            Put the running jobs of a worker back in the queue, e.g. when a restarted worker with
+            the same ID starts, instead of waiting for their leases to run out.
+
+            :param required worker: ID of the worker.
+        """
+
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE jobs SET state = ?, worker = NULL, lease_until = NULL WHERE state = ? AND worker = ?",
+                (QUEUED, RUNNING, worker)
+            ).rowcount
+
+    def complete(self, job_id: int, worker: str, result: str) -> bool:
+        """
+            Store the result of a job. Returns False if the job was meanwhile claimed by another worker.
+
+            :param required job_id: The job ID.
+            :param required worker: ID of the worker that ran it.
+            :param required result: The reply to post.
+        """
+
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE jobs SET state = ?, result = ?, finished_at = ?, lease_until = NULL WHERE id = ? AND worker = ? AND state = ?",
+                (DONE, result, time.time(), job_id, worker, RUNNING)
+            ).rowcount == 1
+
+    def fail_exhausted(self) -> int:
+        """
+            Give up jobs whose last allowed run was interrupted. Their users are told to retry.
+            Returns the number of jobs given up.
+        """
+
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE jobs SET state = ?, result = ?, finished_at = ?, lease_until = NULL "
+                "WHERE ((state = ? AND lease_until < ?) OR state = ?) AND attempts >= ?",
+                (FAILED, INTERRUPTED_MESSAGE, time.time(), RUNNING, time.time(), QUEUED, self.max_attempts)
+            ).rowcount
+
+    def undelivered(self, limit: int = 50) -> list[Job]:
+        """
+            Finished jobs whose result has not been posted yet.
+
+            :param optional limit: Maximum number of jobs returned.
+        """
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, user_id, service, connected_account_id, prompt, reply, attempts, result FROM jobs "
+                "WHERE state IN (?, ?) AND delivered = 0 ORDER BY id LIMIT ?",
+                (DONE, FAILED, limit)
+            ).fetchall()
+        return [Job(row[0], row[1], row[2], row[3], row[4], json.loads(row[5]), row[6], row[7]) for row in rows]
+
+    def mark_delivered(self, job_id: int):
+        """
+            :param required job_id: The job ID.
+        """
+
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET delivered = 1 WHERE id = ?", (job_id,))
+
+    def purge(self, retention: float = JOB_RETENTION) -> int:
+        """
+            Delete delivered jobs finished more than `retention` seconds ago. Returns the number of jobs removed.
+
+            :param optional retention: Seconds finished jobs are kept.
+        """
+
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM jobs WHERE delivered = 1 AND finished_at < ?",
+                (time.time() - retention,)
+            ).rowcount
+
+    def stats(self) -> dict:
+        """Number of queued and running jobs, and of users with queued jobs."""
+
+        with self._lock:
+            counts = dict(self._conn.execute(
+                "SELECT state, COUNT(*) FROM jobs WHERE state IN (?, ?) GROUP BY state", (QUEUED, RUNNING)
+            ).fetchall())
+            users = self._conn.execute("SELECT COUNT(DISTINCT user_id) FROM jobs WHERE state = ?", (QUEUED,)).fetchone()[0]
+        return {"queued": counts.get(QUEUED, 0), "running": counts.get(RUNNING, 0), "queued_users": users}
+
+    def queue_depth(self, user_id: int) -> int:
+        """
+            Number of queued jobs of a user.
+
+            :param required user_id: The Discord user ID.
+        """
+
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE user_id = ? AND state = ?", (user_id, QUEUED)).fetchone()[0]
+
+    def close(self):
+        self._conn.close()
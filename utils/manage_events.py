@@ -1,72 +1,42 @@
-import os
-import dotenv
-from datetime import datetime
-from crewai import Agent, Task
-# from composio_crewai import App, ComposioToolSet
-from langchain_google_genai import ChatGoogleGenerativeAI
-from tools import (
-    create_event,
-    find_events,
-    update_event,
-    delete_event,
-    get_event_id_by_title,
-    quick_add_event,
-    remove_attendee_event,
-    list_upcoming_events,
-    add_attendee_to_event,
-    get_event_details,
-    list_calendars,
-)
+from crewai import Task
+from utils.manage_multi_service import agent_registry, current_date_context
+from utils.progress import ProgressReporter, reporting
 
 
-# Load the environment variables
-dotenv.load_dotenv()
-google_api_key = os.environ["GOOGLE_API_KEY"] # Google API Key
-
-llm = ChatGoogleGenerativeAI(model="gemini-pro", temperature=0.1, google_api_key=google_api_key)
-
-# composio_toolset = ComposioToolSet()
-# tools = composio_toolset.get_tools(apps=[App.GOOGLECALENDAR])
-
-date = datetime.today().strftime("%Y-%m-%d")
-timezone = datetime.now().astimezone().tzinfo
-
-
-def manage_events(connectedAccountId: str, prompt: str) -> str:
+def manage_events(connectedAccountId: str, prompt: str, progress: ProgressReporter | None = None) -> str:
     """
         Run the crew to manage events in Google Calendar.
         :param required connectedAccountId: The ID of the connected account of the user.
         :param required prompt: The prompt for the crew to follow.
+        :param optional progress: Receives step events (tool started/finished, final answer) while the crew runs.
     """
 
     log = ""
-
-    calendar_agent = Agent(
-        role="Google Calendar Agent",
-        goal="""You take action on Google Calendar using Google Calendar APIs""",
-        backstory="""You are an AI agent responsible for taking actions on Google Calendar on users' behalf.
-        You need to take action on Calendar using Google Calendar APIs. Use correct tools to run APIs from the given tool-set.""",
-        verbose=True,
-        tools=[get_event_id_by_title, create_event, find_events, update_event, delete_event, quick_add_event, remove_attendee_event, list_upcoming_events, add_attendee_to_event, get_event_details, list_calendars],
-        llm=llm,
-    )
+    date, timezone = current_date_context()
 
     def log_response(response):
         nonlocal log
         log += response + "\n"
 
-    task = Task(
-        description=f"""Manage events in Google Calendar based on: \n {prompt} \n 
-        Schedule it for given date. Today's date is {date} and make the timezone be {timezone}.
-        The connected account ID (connectedAccountId) is {connectedAccountId}.
-        """,
-        agent=calendar_agent,
-        expected_output="Successfully scheduled or found the events. Also your final answer should be a statement which fits the prompt dont say `Successfully scheduled the events` or `Successfully scheduled or found the events`, also give more human like response and add some emojis if necessary.",
-        on_result=log_response,
-    )
+    # The calendar agent is prebuilt and shared with `manage_multi_service(service="calendar")`
+    with agent_registry.checkout(["calendar"]) as calendar_agent, reporting(progress):
+        calendar_agent.step_callback = progress.on_step if progress else None
+        task = Task(
+            description=f"""Manage events in Google Calendar based on: \n {prompt} \n 
+            Schedule it for given date. Today's date is {date} and make the timezone be {timezone}.
+            The connected account ID (connectedAccountId) is {connectedAccountId}.
+            """,
+            agent=calendar_agent,
+            expected_output="Successfully scheduled or found the events. Also your final answer should be a statement which fits the prompt dont say `Successfully scheduled the events` or `Successfully scheduled or found the events`, also give more human like response and add some emojis if necessary.",
+            on_result=log_response,
+        )
+
+        try:
+            response = task.execute()
+        finally:
+            calendar_agent.step_callback = None
 
-    response = task.execute()
     if response:
         return response
     else:
-        return "Something went wrong. Please try again."
\ No newline at end of file
+        return "Something went wrong. Please try again."
@@ -11,12 +11,16 @@ from tools import (
     update_event,
     delete_event,
     get_event_id_by_title,
+    find_event_id_candidates,
     quick_add_event,
     remove_attendee_event,
     list_upcoming_events,
     add_attendee_to_event,
     get_event_details,
     list_calendars,
+    create_events_batch,
+    delete_events_batch,
+    add_attendees_batch,
 )
 
 # Gmail tools
@@ -45,114 +49,183 @@ from slack_tools import (
     send_slack_dm,
 )
 
+from utils.intent_router import intent_router
+from utils.agent_registry import AgentRegistry
+from utils.tool_schema import agent_tools
+from utils.progress import ProgressReporter, reporting
+from utils.plan_execute import plan_and_execute, PlanError
+
 
 # Load the environment variables
 dotenv.load_dotenv()
 google_api_key = os.environ["GOOGLE_API_KEY"]
+AI_EXECUTION_MODE = os.getenv("AI_EXECUTION_MODE", "react").lower()  # How `service="all"` runs: "react" agent loop, or "plan" to plan once and run independent steps in parallel
 
 llm = ChatGoogleGenerativeAI(model="gemini-pro", temperature=0.1, google_api_key=google_api_key)
 
-date = datetime.today().strftime("%Y-%m-%d")
-timezone = datetime.now().astimezone().tzinfo
 
+def current_date_context() -> tuple[str, object]:
+    """
+        Today's date and the local timezone, computed per task so a long-running bot does not go stale after midnight.
+    """
+
+    now = datetime.now().astimezone()
+    return now.strftime("%Y-%m-%d"), now.tzinfo
+
+
+SERVICE_TOOLS = {
+    "calendar": [get_event_id_by_title, find_event_id_candidates, create_event, find_events, update_event,
+                 delete_event, quick_add_event, remove_attendee_event, list_upcoming_events, add_attendee_to_event,
+                 get_event_details, list_calendars, create_events_batch, delete_events_batch, add_attendees_batch],
+    "gmail": [send_email, search_emails, get_unread_count, create_draft],
+    "github": [create_github_issue, list_github_issues, search_github_repos,
+               create_pull_request, star_repository],
+    "slack": [send_slack_message, list_slack_channels, create_slack_channel,
+              set_slack_status, send_slack_dm],
+}
+
+SERVICE_AGENTS = {
+    "calendar": {
+        "role": "Google Calendar Agent",
+        "goal": "You take action on Google Calendar using Google Calendar APIs",
+        "backstory": """You are an AI agent responsible for taking actions on Google Calendar on users' behalf.
+        You need to take action on Calendar using Google Calendar APIs. Use correct tools to run APIs from the given tool-set.""",
+    },
+    "gmail": {
+        "role": "Gmail Agent",
+        "goal": "You manage Gmail operations like sending emails, searching inbox, and creating drafts",
+        "backstory": """You are an AI agent responsible for managing Gmail operations on users' behalf.
+        You can send emails, search the inbox, check unread messages, and create drafts.""",
+    },
+    "github": {
+        "role": "GitHub Agent",
+        "goal": "You manage GitHub operations like creating issues, pull requests, and searching repositories",
+        "backstory": """You are an AI agent responsible for managing GitHub operations on users' behalf.
+        You can create issues, list issues, search repositories, create pull requests, and star repositories.""",
+    },
+    "slack": {
+        "role": "Slack Agent",
+        "goal": "You manage Slack operations like sending messages, creating channels, and managing status",
+        "backstory": """You are an AI agent responsible for managing Slack operations on users' behalf.
+        You can send messages to channels, create channels, set status, and send direct messages.""",
+    },
+}
+
+SERVICE_NAMES = {
+    "calendar": "Google Calendar",
+    "gmail": "Gmail",
+    "github": "GitHub",
+    "slack": "Slack",
+}
+
+
+def _agent_config(services: list[str]) -> tuple[list, str, str, str]:
+    """
+        Build the tools, role, goal and backstory of an agent covering the given services.
 
-def manage_multi_service(connectedAccountId: str, prompt: str, service: str = "calendar") -> str:
+        :param required services: Service names, e.g. ["calendar"] or ["calendar", "slack"].
+    """
+
+    if len(services) == 1:
+        config = SERVICE_AGENTS[services[0]]
+        return SERVICE_TOOLS[services[0]], config["role"], config["goal"], config["backstory"]
+
+    tools = [tool for service in services for tool in SERVICE_TOOLS[service]]
+    names = ", ".join(SERVICE_NAMES[service] for service in services)
+    role = "Multi-Service AI Agent"
+    goal = f"You manage multiple services including {names}"
+    backstory = f"""You are an AI agent responsible for managing multiple services on users' behalf.
+        You can handle {names}.
+        Choose the appropriate service and tools based on the user's request."""
+
+    return tools, role, goal, backstory
+
+
+def _build_agent(services: tuple[str, ...]) -> Agent:
+    tools, role, goal, backstory = _agent_config(list(services))
+
+    return Agent(
+        role=role,
+        goal=goal,
+        backstory=backstory,
+        verbose=True,
+        tools=agent_tools(tools),
+        llm=llm,
+        # Pooled agents serve many requests and users; crewai's tool cache would replay stale
+        # reads and skip repeated writes. Reads are cached by the response cache instead.
+        cache=False,
+    )
+
+
+# Agents are built once per service combination and reused across requests
+agent_registry = AgentRegistry(_build_agent)
+
+
+def manage_multi_service(connectedAccountId: str, prompt: str, service: str = "calendar", progress: ProgressReporter | None = None, mode: str | None = None) -> str:
     """
         Run the crew to manage multiple services (calendar, gmail, github, slack).
         :param required connectedAccountId: The ID of the connected account of the user.
         :param required prompt: The prompt for the crew to follow.
         :param optional service: The service to use - "calendar", "gmail", "github", "slack", or "all" (default: "calendar").
+        With "all" the prompt is routed first, so the agent only gets the tools of the services it is about.
+        :param optional progress: Receives step events (tool started/finished, final answer) while the crew runs.
+        :param optional mode: "react" or "plan", for `service="all"` only (default: `AI_EXECUTION_MODE`).
+        With "plan" the LLM plans every tool call up front and independent calls run in parallel.
     """
 
     # Select tools based on service
-    if service == "calendar":
-        tools = [get_event_id_by_title, create_event, find_events, update_event, delete_event, 
-                 quick_add_event, remove_attendee_event, list_upcoming_events, add_attendee_to_event, 
-                 get_event_details, list_calendars]
-        role = "Google Calendar Agent"
-        goal = "You take action on Google Calendar using Google Calendar APIs"
-        backstory = """You are an AI agent responsible for taking actions on Google Calendar on users' behalf.
-        You need to take action on Calendar using Google Calendar APIs. Use correct tools to run APIs from the given tool-set."""
-    
-    elif service == "gmail":
-        tools = [send_email, search_emails, get_unread_count, create_draft]
-        role = "Gmail Agent"
-        goal = "You manage Gmail operations like sending emails, searching inbox, and creating drafts"
-        backstory = """You are an AI agent responsible for managing Gmail operations on users' behalf.
-        You can send emails, search the inbox, check unread messages, and create drafts."""
-    
-    elif service == "github":
-        tools = [create_github_issue, list_github_issues, search_github_repos, 
-                 create_pull_request, star_repository]
-        role = "GitHub Agent"
-        goal = "You manage GitHub operations like creating issues, pull requests, and searching repositories"
-        backstory = """You are an AI agent responsible for managing GitHub operations on users' behalf.
-        You can create issues, list issues, search repositories, create pull requests, and star repositories."""
-    
-    elif service == "slack":
-        tools = [send_slack_message, list_slack_channels, create_slack_channel, 
-                 set_slack_status, send_slack_dm]
-        role = "Slack Agent"
-        goal = "You manage Slack operations like sending messages, creating channels, and managing status"
-        backstory = """You are an AI agent responsible for managing Slack operations on users' behalf.
-        You can send messages to channels, create channels, set status, and send direct messages."""
-    
-    elif service == "all":
-        tools = [
-            # Calendar
-            get_event_id_by_title, create_event, find_events, update_event, delete_event, 
-            quick_add_event, remove_attendee_event, list_upcoming_events, add_attendee_to_event, 
-            get_event_details, list_calendars,
-            # Gmail
-            send_email, search_emails, get_unread_count, create_draft,
-            # GitHub
-            create_github_issue, list_github_issues, search_github_repos, 
-            create_pull_request, star_repository,
-            # Slack
-            send_slack_message, list_slack_channels, create_slack_channel, 
-            set_slack_status, send_slack_dm,
-        ]
-        role = "Multi-Service AI Agent"
-        goal = "You manage multiple services including Google Calendar, Gmail, GitHub, and Slack"
-        backstory = """You are an AI agent responsible for managing multiple services on users' behalf.
-        You can handle Google Calendar events, Gmail emails, GitHub issues and repositories, and Slack messages.
-        Choose the appropriate service and tools based on the user's request."""
-    
+    if service == "all":
+        services = intent_router.route(prompt)
+        if services == ["all"]:
+            services = list(SERVICE_TOOLS)
+        print(f"Routed request to: {', '.join(services)}")
+
+    elif service in SERVICE_TOOLS:
+        services = [service]
+
     else:
         # Invalid service name
         return f"Invalid service '{service}'. Please use 'calendar', 'gmail', 'github', 'slack', or 'all'."
 
-    agent = Agent(
-        role=role,
-        goal=goal,
-        backstory=backstory,
-        verbose=True,
-        tools=tools,
-        llm=llm,
-    )
+    date, timezone = current_date_context()
+
+    if service == "all" and (mode or AI_EXECUTION_MODE) == "plan":
+        tools = [tool for name in services for tool in SERVICE_TOOLS[name]]
+        try:
+            return plan_and_execute(llm, tools, connectedAccountId, prompt, date, timezone, progress=progress) or "Something went wrong. Please try again."
+        except PlanError as e:
+            # An unusable plan costs one LLM call, the agent loop still gets the request done
+            print(f"Plan-and-execute failed, falling back to the agent: {e}")
 
     # Build task description based on service
-    if service == "calendar":
+    if services == ["calendar"]:
         task_desc = f"""Manage events in Google Calendar based on: \n {prompt} \n 
         Schedule it for given date. Today's date is {date} and make the timezone be {timezone}.
         The connected account ID (connectedAccountId) is {connectedAccountId}."""
         expected = "Successfully completed the calendar task. Give a human-like response with emojis if necessary."
     else:
-        task_desc = f"""Handle the following request for {service}: \n {prompt} \n 
+        service_label = " and ".join(services)
+        task_desc = f"""Handle the following request for {service_label}: \n {prompt} \n 
         Today's date is {date} and timezone is {timezone}.
         The connected account ID (connectedAccountId) is {connectedAccountId}.
         For GitHub tasks, make sure to extract repository owner and name from the request.
         For Slack tasks, identify the channel or user correctly.
         For Gmail tasks, ensure email addresses are properly formatted."""
-        expected = f"Successfully completed the {service} task. Give a human-like response with emojis if necessary."
+        expected = f"Successfully completed the {service_label} task. Give a human-like response with emojis if necessary."
 
-    task = Task(
-        description=task_desc,
-        agent=agent,
-        expected_output=expected,
-    )
+    with agent_registry.checkout(services) as agent, reporting(progress):
+        agent.step_callback = progress.on_step if progress else None
+        task = Task(
+            description=task_desc,
+            agent=agent,
+            expected_output=expected,
+        )
+
+        try:
+            response = task.execute()
+        finally:
+            agent.step_callback = None
 
-    response = task.execute()
     if response:
         return response
     else:
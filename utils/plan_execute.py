@@ -0,0 +1,299 @@
+import inspect
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from utils.progress import ProgressReporter, reporting, current, emit
+from utils.tool_schema import compact_description
+
+
+PLAN_CONCURRENCY = int(os.getenv("PLAN_CONCURRENCY", "4"))  # Plan steps running at the same time
+PLAN_MAX_REPLANS = int(os.getenv("PLAN_MAX_REPLANS", "1"))  # LLM calls allowed to repair a plan after failed steps
+PLAN_MAX_STEPS = 20  # Longer plans are rejected
+
+# Starts of the tool replies reporting that the whole step failed, one per error return of the
+# tool modules. Only the start of a reply is compared, so results merely quoting such words
+# (e.g. an email subject) are not taken for failures.
+FAILURE_PREFIXES = (
+    "❌",
+    "Something went wrong",
+    "Failed to create event",
+    "No events found with the given title.",
+    "Nothing to do, the batch is empty.",
+    "A batch can have at most",
+    "Your account's authentication credentials is expired.",
+    "Your Gmail authentication credentials expired.",
+    "Your GitHub authentication credentials expired.",
+    "Your Slack authentication credentials expired.",
+)
+
+# Batch tools report every operation; a batch is a failed step only if none of them succeeded,
+# so a re-plan never repeats the writes that went through
+BATCH_SUMMARY = re.compile(r"(\d+) of \d+ operations succeeded")
+
+# Parameter names the tools use for the connected account, filled in by the executor
+ACCOUNT_PARAMS = ("connectedAccountId", "connectionAccountId")
+
+_REFERENCE = re.compile(r"\{\{(\w[\w-]*)\}\}")
+
+PLAN_PROMPT = """You plan the tool calls that fulfil a user's request. Do not execute anything.
+Today's date is {date} and the timezone is {timezone}.
+
+Available tools:
+{tools}
+
+User request:
+{request}
+{context}
+Answer with JSON only, in this shape:
+{{"steps": [{{"id": "s1", "tool": "<tool name>", "args": {{"<argument>": "<value>"}}, "depends_on": []}}]}}
+
+Rules:
+- Use the exact tool names and argument names listed above. Leave out connectedAccountId, it is filled in for you.
+- Steps that do not need each other's output must not depend on each other, they run in parallel.
+- To use the output of an earlier step as an argument, write "{{{{<step id>}}}}" as the value and list that step in depends_on.
+  E.g. "Get Event ID via Title" outputs just the event ID, so "event_id": "{{{{s1}}}}" works.
+- Use at most {max_steps} steps. Return {{"steps": []}} if no tool is needed."""
+
+REPLAN_CONTEXT = """
+Part of an earlier plan already ran. Plan only the work that is still missing.
+Steps that succeeded (you may reference their outputs with "{{{{<step id>}}}}"):
+{succeeded}
+Steps that failed or were skipped:
+{failed}
+Use new step IDs that are not listed above.
+"""
+
+SUMMARY_PROMPT = """You completed a user's request by running tools.
+
+User request:
+{request}
+
+Tool results:
+{results}
+
+Tell the user what was done, and clearly what could not be done. Give a human-like response with emojis if necessary."""
+
+
+class PlanError(Exception):
+    """Raised when the LLM's plan cannot be parsed or validated."""
+
+
+class Step:
+    """One tool call of a plan."""
+
+    def __init__(self, id: str, tool: str, args: dict, depends_on: list[str]):
+        self.id = id
+        self.tool = tool
+        self.args = args
+        self.depends_on = depends_on
+
+
+def _extract_json(text: str) -> dict:
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    if match is None:
+        raise PlanError("The plan contains no JSON object.")
+    try:
+        return json.loads(match.group(0))
+    except json.JSONDecodeError as e:
+        raise PlanError(f"The plan is not valid JSON: {e}")
+
+
+def parse_plan(text: str, tools_by_name: dict, known_ids: set = frozenset(), used_ids: set = frozenset()) -> list[Step]:
+    """
+        Parse and validate the LLM's plan: known tools, unique step IDs, dependencies on
+        existing steps only, and no cycles. Raises `PlanError`.
+
+        :param required text: The LLM's answer.
+        :param required tools_by_name: The tools the plan may use, by name.
+        :param optional known_ids: IDs of succeeded steps of an earlier plan whose outputs may be referenced.
+        :param optional used_ids: IDs of every step of earlier plans, which new steps must not reuse.
+    """
+
+    raw_steps = _extract_json(text).get("steps")
+    if not isinstance(raw_steps, list):
+        raise PlanError("The plan has no list of steps.")
+    if len(raw_steps) > PLAN_MAX_STEPS:
+        raise PlanError(f"The plan has more than {PLAN_MAX_STEPS} steps.")
+
+    steps = {}
+    for raw in raw_steps:
+        if not isinstance(raw, dict) or not isinstance(raw.get("depends_on") or [], list):
+            raise PlanError(f"The plan has a malformed step: {json.dumps(raw)}")
+        step = Step(str(raw.get("id", "")), raw.get("tool", ""), raw.get("args") or {}, [str(dep) for dep in raw.get("depends_on") or []])
+        if not step.id or step.id in steps or step.id in used_ids:
+            raise PlanError(f"Step ID `{step.id}` is missing or used twice.")
+        if step.tool not in tools_by_name:
+            raise PlanError(f"Step `{step.id}` uses the unknown tool `{step.tool}`.")
+        if not isinstance(step.args, dict):
+            raise PlanError(f"Step `{step.id}` has no argument object.")
+        steps[step.id] = step
+
+    for step in steps.values():
+        references = set(_REFERENCE.findall(json.dumps(step.args)))
+        for dep in set(step.depends_on) | references:
+            if dep not in steps and dep not in known_ids:
+                raise PlanError(f"Step `{step.id}` depends on the unknown step `{dep}`.")
+        # A referenced step of this plan must finish first, even if the LLM forgot to list it
+        step.depends_on = sorted((set(step.depends_on) | references) - set(known_ids))
+
+    # Kahn's algorithm: a plan that cannot be ordered has a cycle
+    remaining = {step_id: set(step.depends_on) for step_id, step in steps.items()}
+    while remaining:
+        ready = [step_id for step_id, deps in remaining.items() if not deps]
+        if not ready:
+            raise PlanError("The plan's dependencies form a cycle.")
+        for step_id in ready:
+            del remaining[step_id]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+    return list(steps.values())
+
+
+def _is_failure(output: str) -> bool:
+    output = output.strip()
+    batch = BATCH_SUMMARY.match(output)
+    if batch:
+        return batch.group(1) == "0"
+    return output.startswith(FAILURE_PREFIXES)
+
+
+def _resolve_args(args: dict, outputs: dict) -> dict:
+    """Replace "{{step id}}" references with the outputs of those steps."""
+
+    def resolve(value):
+        if isinstance(value, str):
+            match = _REFERENCE.fullmatch(value.strip())
+            if match:
+                return outputs[match.group(1)].strip()
+            return _REFERENCE.sub(lambda m: outputs[m.group(1)].strip(), value)
+        if isinstance(value, list):
+            return [resolve(item) for item in value]
+        if isinstance(value, dict):
+            return {key: resolve(item) for key, item in value.items()}
+        return value
+
+    return {key: resolve(value) for key, value in args.items()}
+
+
+def _call_tool(tool, connectedAccountId: str, args: dict) -> str:
+    func = tool.func
+    parameters = inspect.signature(func).parameters
+    kwargs = {name: value for name, value in args.items() if name in parameters}
+    for name in ACCOUNT_PARAMS:
+        if name in parameters:
+            kwargs[name] = connectedAccountId
+    return str(func(**kwargs))
+
+
+def execute_plan(steps: list[Step], tools_by_name: dict, connectedAccountId: str, outputs: dict, concurrency: int = PLAN_CONCURRENCY) -> tuple[dict, dict]:
+    """
+        Run the steps of a plan, each as soon as the steps it depends on succeeded, at most
+        `concurrency` at a time. Steps depending on a failed step are skipped.
+        Returns the outputs of the steps that succeeded and the errors of the others.
+
+        :param required steps: The validated plan.
+        :param required tools_by_name: The tools the plan may use, by name.
+        :param required connectedAccountId: The ID of the connected account of the user.
+        :param required outputs: Outputs of steps that already ran (earlier plans), by step ID.
+        :param optional concurrency: Steps running at the same time.
+    """
+
+    reporter = current()
+    succeeded, failed = {}, {}
+    pending = {step.id: step for step in steps}
+    running = {}
+
+    def run(step):
+        with reporting(reporter):
+            emit("tool_started", step.tool)
+            output = _call_tool(tools_by_name[step.tool], connectedAccountId, _resolve_args(step.args, {**outputs, **succeeded}))
+            emit("tool_finished", step.tool)
+            return output
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        while pending or running:
+            for step_id, step in list(pending.items()):
+                if any(dep in failed for dep in step.depends_on):
+                    failed[step_id] = "Skipped, a step it depends on failed."
+                    del pending[step_id]
+                elif all(dep in succeeded or dep in outputs for dep in step.depends_on):
+                    running[pool.submit(run, step)] = step
+                    del pending[step_id]
+
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step = running.pop(future)
+                try:
+                    output = future.result()
+                except Exception as e:
+                    failed[step.id] = f"Error: {e}"
+                    continue
+                if _is_failure(output):
+                    failed[step.id] = output
+                else:
+                    succeeded[step.id] = output
+
+    return succeeded, failed
+
+
+def _describe(steps: dict, results: dict) -> str:
+    return "\n".join(f"- {step_id} ({steps[step_id].tool} {json.dumps(steps[step_id].args)}): {result}" for step_id, result in results.items()) or "- none"
+
+
+def plan_and_execute(llm, tools: list, connectedAccountId: str, prompt: str, date: str, timezone, progress: ProgressReporter | None = None) -> str:
+    """
+        Answer a request with one LLM call for a plan (a DAG of tool calls), run the independent
+        steps of the plan concurrently, and call the LLM again only to repair the plan after
+        failed steps (at most `PLAN_MAX_REPLANS` times) and to write the final answer.
+        Raises `PlanError` if the first plan is unusable, so the caller can fall back to the agent loop.
+
+        :param required llm: The langchain chat model.
+        :param required tools: The tools the plan may use.
+        :param required connectedAccountId: The ID of the connected account of the user.
+        :param required prompt: The user's request.
+        :param required date: Today's date.
+        :param required timezone: The local timezone.
+        :param optional progress: Receives a step event per tool call and the final answer.
+    """
+
+    tools_by_name = {tool.name: tool for tool in tools}
+    catalog = "\n\n".join(compact_description(tool) for tool in tools)
+
+    def ask(context: str, outputs: dict, all_steps: dict) -> list[Step]:
+        answer = llm.invoke(PLAN_PROMPT.format(date=date, timezone=timezone, tools=catalog, request=prompt, context=context, max_steps=PLAN_MAX_STEPS))
+        return parse_plan(answer.content, tools_by_name, set(outputs), set(all_steps))
+
+    with reporting(progress):
+        steps = ask("", {}, {})
+        print(f"Plan: {', '.join(f'{step.id}={step.tool}' for step in steps) or 'no steps'}")
+
+        all_steps = {step.id: step for step in steps}
+        outputs, failed = execute_plan(steps, tools_by_name, connectedAccountId, {})
+        errors = dict(failed)
+
+        for _ in range(PLAN_MAX_REPLANS):
+            if not failed:
+                break
+            context = REPLAN_CONTEXT.format(succeeded=_describe(all_steps, outputs), failed=_describe(all_steps, failed))
+            try:
+                steps = ask(context, outputs, all_steps)
+            except PlanError as e:
+                print(f"Re-plan failed: {e}")
+                break
+            print(f"Re-plan: {', '.join(f'{step.id}={step.tool}' for step in steps) or 'no steps'}")
+            all_steps.update({step.id: step for step in steps})
+            new_outputs, failed = execute_plan(steps, tools_by_name, connectedAccountId, outputs)
+            outputs.update(new_outputs)
+            # A re-planned step that went through replaces the earlier failures of its tool
+            fixed = {all_steps[step_id].tool for step_id in new_outputs}
+            errors = {step_id: error for step_id, error in errors.items() if all_steps[step_id].tool not in fixed}
+            errors.update(failed)
+
+        emit("final_answer", "")
+        results = _describe(all_steps, {**outputs, **errors})
+        return llm.invoke(SUMMARY_PROMPT.format(request=prompt, results=results)).content
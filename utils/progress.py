@@ -0,0 +1,170 @@
+import asyncio
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+STATUS_EDIT_INTERVAL = float(os.getenv("STATUS_EDIT_INTERVAL", "2"))  # Minimum seconds between two edits of a status message
+STATUS_MAX_LINES = 6  # Progress lines shown in the status embed
+
+_current = threading.local()
+
+
+class ProgressReporter:
+    """
+        Collects step events of an agent run (tool started, tool finished, final answer)
+        and forwards them to a sink. Events are emitted from the worker thread running the crew.
+    """
+
+    def __init__(self, sink):
+        """
+            :param required sink: Thread-safe callable receiving a human readable progress line.
+        """
+
+        self.sink = sink
+
+    def emit(self, kind: str, detail: str):
+        """
+            :param required kind: "tool_started", "tool_finished" or "final_answer".
+            :param required detail: What the event is about, e.g. the tool or action name.
+        """
+
+        if kind == "tool_started":
+            line = f"🔧 Running `{detail}`..."
+        elif kind == "tool_finished":
+            line = f"✅ {detail} finished"
+        elif kind == "final_answer":
+            line = "✍️ Writing the final answer..."
+        else:
+            line = detail
+        self.sink(line)
+
+    def on_step(self, step_output):
+        """
+            crewai `step_callback`: called after every reasoning step with either the
+            finished answer or the list of (action, observation) pairs just executed.
+        """
+
+        if hasattr(step_output, "return_values"):
+            self.emit("final_answer", "")
+            return
+
+        steps = step_output if isinstance(step_output, list) else [step_output]
+        for step in steps:
+            action = step[0] if isinstance(step, tuple) else getattr(step, "action", None)
+            tool = getattr(action, "tool", None)
+            if tool:
+                self.emit("tool_finished", tool)
+
+
+@contextmanager
+def reporting(reporter: ProgressReporter | None):
+    """
+        Make `reporter` the current reporter of this thread, so lower layers (e.g. the
+        Composio client) can emit events without it being passed through every tool.
+    """
+
+    previous = getattr(_current, "reporter", None)
+    _current.reporter = reporter
+    try:
+        yield reporter
+    finally:
+        _current.reporter = previous
+
+
+def current() -> ProgressReporter | None:
+    """The current thread's reporter, to hand over to helper threads with `reporting`."""
+
+    return getattr(_current, "reporter", None)
+
+
+def emit(kind: str, detail: str):
+    """Emit an event to the current thread's reporter, if there is one."""
+
+    reporter = getattr(_current, "reporter", None)
+    if reporter is not None:
+        reporter.emit(kind, detail)
+
+
+class StatusEditCoalescer:
+    """
+        Pushes progress lines into a Discord status message without exceeding edit rate limits.
+
+        Lines arriving faster than `interval` are merged: the message is edited at most once
+        per interval, always with the latest state.
+    """
+
+    def __init__(self, message, embed_factory, interval: float = STATUS_EDIT_INTERVAL, max_lines: int = STATUS_MAX_LINES):
+        """
+            :param required message: The Discord message to edit.
+            :param required embed_factory: Callable building the embed from the list of progress lines.
+            :param optional interval: Minimum seconds between two edits.
+            :param optional max_lines: How many of the latest lines to show.
+        """
+
+        self.message = message
+        self.embed_factory = embed_factory
+        self.interval = interval
+        self.max_lines = max_lines
+        self.loop = asyncio.get_running_loop()
+        self.lines = []
+        self.status = None
+        self.edits = 0
+        self._last_edit = 0.0
+        self._dirty = False
+        self._flush_task = None
+        self._closed = False
+
+    def push_threadsafe(self, line: str):
+        """Add a progress line from any thread."""
+
+        self.loop.call_soon_threadsafe(self.push, line)
+
+    def push(self, line: str):
+        """Add a progress line from the event loop."""
+
+        if self._closed:
+            return
+        self.lines.append(line)
+        self._schedule()
+
+    def set_status(self, line: str | None):
+        """Show `line` above the progress lines, replacing the previous one (e.g. a queue position). None removes it."""
+
+        if self._closed or line == self.status:
+            return
+        self.status = line
+        self._schedule()
+
+    def _schedule(self):
+        self._dirty = True
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = self.loop.create_task(self._flush())
+
+    async def _flush(self):
+        while self._dirty and not self._closed:
+            delay = self._last_edit + self.interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if self._closed:
+                return
+            self._dirty = False
+            self._last_edit = time.monotonic()
+            try:
+                lines = ([self.status] if self.status else []) + self.lines[-self.max_lines:]
+                await self.message.edit(embed=self.embed_factory(lines))
+                self.edits += 1
+            except Exception as e:
+                print(f"Failed to update status message: {e}")
+
+    async def close(self):
+        """Stop editing. Call this before the final result edit."""
+
+        self._closed = True
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+from collections import Counter
+from utils.cache import TTLCache
+
+
+# Client-side pacing of Composio actions. Rates are requests per second, bursts the number of
+# requests that may go out back to back after an idle period. Limits apply per bot/worker process.
+ACCOUNT_RATE = float(os.getenv("COMPOSIO_ACCOUNT_RATE", "5"))  # Requests per second per connected account
+ACCOUNT_BURST = float(os.getenv("COMPOSIO_ACCOUNT_BURST", "10"))
+ACCOUNT_BUCKETS_MAX = 4096  # Connected accounts whose buckets are kept
+
+# (requests per second, burst) per app, across all accounts.
+# Override with e.g. COMPOSIO_APP_RATES="slack=1:5,github=20:40".
+APP_RATES = {
+    "googlecalendar": (10, 20),
+    "gmail": (10, 20),
+    "github": (10, 30),
+    "slack": (5, 10),
+}
+DEFAULT_APP_RATE = (10, 20)  # Apps missing from APP_RATES
+
+
+def _parse_rates(value: str) -> dict:
+    rates = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        app, limits = item.split("=")
+        rate, burst = limits.split(":")
+        rates[app.strip()] = (float(rate), float(burst))
+    return rates
+
+
+APP_RATES.update(_parse_rates(os.getenv("COMPOSIO_APP_RATES", "")))
+
+
+class TokenBucket:
+    """
+        Token bucket handing out reservations instead of yes/no answers: `reserve` always takes
+        a token, letting the balance go negative, and returns how long the caller has to wait
+        for it. Callers are served in the order they reserved, in threads and coroutines alike.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        """
+            :param required rate: Tokens added per second.
+            :param required burst: Maximum number of tokens, i.e. requests allowed back to back.
+        """
+
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._tokens = burst
+        self._updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """Take one token. Returns the seconds to wait before using it."""
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    def time_to_full(self) -> float:
+        """Seconds until the bucket is full again if nothing more is reserved, including any backlog."""
+
+        with self._lock:
+            return (self.burst - self._tokens) / self.rate
+
+
+class RateLimiter:
+    """
+        Paces Composio actions with one token bucket per connected account and one per app, so
+        bursts are spread out before they reach backend.composio.dev and the Google, GitHub and
+        Slack APIs behind it, instead of coming back as 429s.
+    """
+
+    def __init__(self, app_rates: dict = APP_RATES, account_rate: float = ACCOUNT_RATE, account_burst: float = ACCOUNT_BURST):
+        """
+            :param optional app_rates: (rate, burst) per app, see `APP_RATES`.
+            :param optional account_rate: Requests per second per connected account.
+            :param optional account_burst: Burst per connected account.
+        """
+
+        self.account_rate = account_rate
+        self.account_burst = account_burst
+        self._apps = {app: TokenBucket(rate, burst) for app, (rate, burst) in app_rates.items()}
+        self._apps_lock = threading.Lock()
+        # Every bucket expires once it is full again (see `_reserve_account`), so dropping it loses nothing
+        self._accounts = TTLCache(ACCOUNT_BUCKETS_MAX, account_burst / account_rate)
+        self._accounts_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.throttled = Counter()  # app -> requests that had to wait
+        self.throttle_time = Counter()  # app -> seconds waited
+
+    def _app_bucket(self, app_name: str) -> TokenBucket:
+        with self._apps_lock:
+            if app_name not in self._apps:
+                self._apps[app_name] = TokenBucket(*DEFAULT_APP_RATE)
+            return self._apps[app_name]
+
+    def _reserve_account(self, connectedAccountId: str) -> float:
+        with self._accounts_lock:
+            bucket = self._accounts.get(connectedAccountId)
+            if bucket is None:
+                bucket = TokenBucket(self.account_rate, self.account_burst)
+            delay = bucket.reserve()
+            # Kept until it refilled, backlog included, so a backlogged account is never paced from a fresh bucket
+            self._accounts.set(connectedAccountId, bucket, bucket.time_to_full())
+            return delay
+
+    def reserve(self, app_name: str, connectedAccountId: str) -> float:
+        """
+            Reserve one request of an account on an app. Returns the seconds to wait before sending it.
+
+            :param required app_name: The Composio app name, e.g. "gmail".
+            :param required connectedAccountId: The ID of the connected account.
+        """
+
+        delay = max(self._app_bucket(app_name).reserve(), self._reserve_account(connectedAccountId))
+        if delay > 0:
+            with self._stats_lock:
+                self.throttled[app_name] += 1
+                self.throttle_time[app_name] += delay
+        return delay
+
+    def snapshot(self) -> dict:
+        with self._stats_lock:
+            return {"throttled": dict(self.throttled), "throttle_time": dict(self.throttle_time)}
+
+
+rate_limiter = RateLimiter()
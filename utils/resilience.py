@@ -0,0 +1,190 @@
+import os
+import random
+import threading
+import time
+from collections import Counter
+
+
+# Retry configuration (only applied to idempotent read actions)
+RETRY_MAX_ATTEMPTS = int(os.getenv("COMPOSIO_RETRY_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = float(os.getenv("COMPOSIO_RETRY_BASE_DELAY", "0.25"))  # Seconds
+RETRY_MAX_DELAY = float(os.getenv("COMPOSIO_RETRY_MAX_DELAY", "4"))  # Seconds
+
+# Circuit breaker configuration (one breaker per app)
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("COMPOSIO_BREAKER_THRESHOLD", "5"))  # Consecutive failures before opening
+BREAKER_RESET_TIMEOUT = float(os.getenv("COMPOSIO_BREAKER_RESET", "30"))  # Seconds before a trial request is let through
+
+# Actions that only read data and can safely be sent more than once
+IDEMPOTENT_ACTIONS = {
+    "googlecalendar_find_event",
+    "googlecalendar_get_event",
+    "googlecalendar_list_calendars",
+    "gmail_search_emails",
+    "gmail_get_profile",
+    "github_list_issues",
+    "github_search_repositories",
+    "slack_list_channels",
+    "slack_list_users",
+}
+
+
+class TransientError(Exception):
+    """Raised for upstream failures worth retrying (5xx, 429, malformed responses)."""
+
+
+class RetryPolicy:
+    """
+        Exponential backoff with full jitter.
+    """
+
+    def __init__(self, max_attempts: int = RETRY_MAX_ATTEMPTS, base_delay: float = RETRY_BASE_DELAY, max_delay: float = RETRY_MAX_DELAY):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def attempts_for(self, action: str) -> int:
+        """Number of attempts allowed for an action. Writes are never retried."""
+
+        return self.max_attempts if action in IDEMPOTENT_ACTIONS else 1
+
+    def delay(self, attempt: int) -> float:
+        """
+            Seconds to sleep before the retry following `attempt` (0-based).
+
+            :param required attempt: The attempt that just failed.
+        """
+
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """
+        Fails fast once an app has failed `failure_threshold` times in a row.
+
+        After `reset_timeout` seconds a single trial request is let through (half-open);
+        its outcome decides whether the breaker closes again or stays open. A trial that
+        never reports back is given up after another `reset_timeout` seconds.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD, reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._trial_started = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a request may be sent right now."""
+
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and (not self._trial_in_flight or time.monotonic() - self._trial_started >= self.reset_timeout):
+                self._trial_in_flight = True
+                self._trial_started = time.monotonic()
+                return True
+            return False
+
+    def release_trial(self):
+        """Let another trial through, e.g. when the trial request ended without an outcome."""
+
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> bool:
+        """Count a failure. Returns True if this failure opened the breaker."""
+
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+
+class ResilienceMetrics:
+    """
+        Counters for retries, failures and circuit breaker activity.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.retries = Counter()  # action -> retries
+        self.failures = Counter()  # action -> requests that failed after all attempts
+        self.breaker_opens = Counter()  # app -> times the breaker opened
+        self.short_circuits = Counter()  # app -> requests rejected by an open breaker
+
+    def record_retry(self, action: str):
+        with self._lock:
+            self.retries[action] += 1
+
+    def record_failure(self, action: str):
+        with self._lock:
+            self.failures[action] += 1
+
+    def record_breaker_open(self, app_name: str):
+        with self._lock:
+            self.breaker_opens[app_name] += 1
+
+    def record_short_circuit(self, app_name: str):
+        with self._lock:
+            self.short_circuits[app_name] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "retries": dict(self.retries),
+                "failures": dict(self.failures),
+                "breaker_opens": dict(self.breaker_opens),
+                "short_circuits": dict(self.short_circuits),
+                "breakers": {name: breaker.state for name, breaker in _breakers.items()},
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(app_name: str) -> CircuitBreaker:
+    """
+        Get the circuit breaker of an app (googlecalendar, gmail, github, slack), creating it on first use.
+
+        :param required app_name: The Composio app name.
+    """
+
+    with _breakers_lock:
+        if app_name not in _breakers:
+            _breakers[app_name] = CircuitBreaker(app_name)
+        return _breakers[app_name]
+
+
+def failure_response(code: int, message: str) -> dict:
+    """
+        Build a response in the same shape as a failed Composio action, so tools handle
+        transport failures through their existing error branches.
+    """
+
+    return {"executed": False, "response": {"error": {"code": code, "message": message}}}
+
+
+retry_policy = RetryPolicy()
+resilience_metrics = ResilienceMetrics()
@@ -0,0 +1,186 @@
+import os
+import threading
+from utils.cache import TTLCache
+from utils.shared_cache import SharedCache, shared_cache
+from utils.single_flight import make_key
+
+
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"  # Serve repeated reads from memory
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2048"))  # Maximum number of cached responses
+
+def _public_search(input_data: dict) -> bool:
+    # Authenticated repository searches include the caller's private repositories unless limited to public ones
+    return "is:public" in str(input_data.get("q", "")).lower().split()
+
+
+# Read actions whose successful responses are cached.
+#   ttl:    seconds a response is served from the cache
+#   shared: the response does not depend on the account, so every user shares one entry.
+#           A callable decides per input.
+#   scope:  input fields naming the resource read, so writes to it only invalidate matching entries
+# Slack channel and user lists are cached by the Slack directory instead.
+CACHE_POLICIES = {
+    "github_search_repositories": {"ttl": 300, "shared": _public_search},
+    "github_list_issues": {"ttl": 60, "scope": ("owner", "repo")},
+    "googlecalendar_list_calendars": {"ttl": 600},
+    "googlecalendar_find_event": {"ttl": 30},
+    "googlecalendar_get_event": {"ttl": 60, "scope": ("event_id",)},
+    "gmail_search_emails": {"ttl": 30},
+    "gmail_get_profile": {"ttl": 30},
+}
+
+# Write actions and the cached reads they make stale. Reads with a scope are only
+# invalidated for the resource the write names, e.g. one owner/repo.
+WRITE_INVALIDATIONS = {
+    "github_create_issue": ["github_list_issues"],
+    "github_create_pull_request": ["github_list_issues"],
+    "googlecalendar_create_event": ["googlecalendar_find_event"],
+    "googlecalendar_quick_add": ["googlecalendar_find_event"],
+    "googlecalendar_update_event": ["googlecalendar_find_event", "googlecalendar_get_event"],
+    "googlecalendar_delete_event": ["googlecalendar_find_event", "googlecalendar_get_event"],
+    "googlecalendar_add_attendee": ["googlecalendar_find_event", "googlecalendar_get_event"],
+    "googlecalendar_remove_attendee": ["googlecalendar_find_event", "googlecalendar_get_event"],
+    "gmail_send_email": ["gmail_search_emails", "gmail_get_profile"],
+    "gmail_create_draft": ["gmail_search_emails"],
+}
+
+SHARED_ACCOUNT = "*"  # Account part of the key of shared entries
+
+
+class ResponseCache:
+    """
+        Cache of Composio read responses keyed on (account, action, normalized input).
+
+        Invalidation uses generation counters instead of tracking keys: every entry remembers
+        the generation of its action (per account) and of its scope when it was stored, and a
+        write bumps those generations, so older entries stop matching without being searched for.
+
+        With a `SharedCache` the generations live in it, so a write in one bot process invalidates
+        the entries of every process, and responses missing from memory are looked up there.
+    """
+
+    def __init__(self, policies: dict = CACHE_POLICIES, invalidations: dict = WRITE_INVALIDATIONS, max_size: int = RESPONSE_CACHE_SIZE, enabled: bool = RESPONSE_CACHE_ENABLED, shared: SharedCache | None = None):
+        """
+            :param optional policies: Cache policy per read action, see `CACHE_POLICIES`.
+            :param optional invalidations: Reads invalidated per write action, see `WRITE_INVALIDATIONS`.
+            :param optional max_size: Maximum number of cached responses.
+            :param optional enabled: Whether responses are cached at all.
+            :param optional shared: Cache shared with the other bot processes.
+        """
+
+        self.policies = policies
+        self.invalidations = invalidations
+        self.enabled = enabled
+        self.shared = shared
+        self._entries = TTLCache(max_size, 0)
+        self._lock = threading.Lock()
+        self._generations = {}
+        self.invalidated = 0
+
+    def _tags(self, action: str, connectedAccountId: str, input_data: dict) -> list[tuple]:
+        policy = self.policies[action]
+        tags = [(connectedAccountId, action)]
+        if "scope" in policy:
+            tags.append((connectedAccountId, action) + tuple(input_data.get(field) for field in policy["scope"]))
+        return tags
+
+    def _generation(self, tags: list[tuple]) -> tuple:
+        if self.shared is not None:
+            return tuple(self.shared.counters([_tag_key(tag) for tag in tags]))
+        with self._lock:
+            return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def _key(self, action: str, connectedAccountId: str, input_data: dict) -> str:
+        shared = self.policies[action].get("shared", False)
+        if callable(shared):
+            shared = shared(input_data)
+        account = SHARED_ACCOUNT if shared else connectedAccountId
+        return make_key(account, action, input_data)
+
+    def get(self, action: str, connectedAccountId: str, input_data: dict) -> dict | None:
+        """
+            The cached response of a read, or None.
+
+            :param required action: The Composio action name.
+            :param required connectedAccountId: The ID of the connected account.
+            :param required input_data: The input parameters of the action.
+        """
+
+        if not self.enabled or action not in self.policies:
+            return None
+
+        key = self._key(action, connectedAccountId, input_data)
+        entry = self._entries.get(key)
+        if entry is None and self.shared is not None:
+            entry = self.shared.get(key)
+        if entry is None:
+            return None
+
+        generation, response_json = tuple(entry[0]), entry[1]
+        if generation != self._generation(self._tags(action, connectedAccountId, input_data)):
+            self._entries.invalidate(key)
+            return None
+        return response_json
+
+    def generation(self, action: str, connectedAccountId: str, input_data: dict) -> tuple | None:
+        """
+            Snapshot to take before executing a read and pass to `store`, so a write that
+            completes while the read is in flight keeps its (older) response from being cached.
+        """
+
+        if not self.enabled or action not in self.policies:
+            return None
+        return self._generation(self._tags(action, connectedAccountId, input_data))
+
+    def store(self, action: str, connectedAccountId: str, input_data: dict, response_json: dict, generation: tuple | None):
+        """
+            Cache a successful read response according to the action's policy.
+
+            :param required action: The Composio action name.
+            :param required connectedAccountId: The ID of the connected account.
+            :param required input_data: The input parameters of the action.
+            :param required response_json: The decoded response of the action.
+            :param required generation: The `generation` taken before the read was executed.
+        """
+
+        if generation is None or not response_json.get("executed"):
+            return
+
+        key, ttl = self._key(action, connectedAccountId, input_data), self.policies[action]["ttl"]
+        self._entries.set(key, (generation, response_json), ttl)
+        if self.shared is not None:
+            self.shared.set(key, [list(generation), response_json], ttl)
+
+    def invalidate_for_write(self, action: str, connectedAccountId: str, input_data: dict):
+        """
+            Invalidate the cached reads a write action makes stale.
+
+            :param required action: The Composio action name.
+            :param required connectedAccountId: The ID of the connected account.
+            :param required input_data: The input parameters of the action.
+        """
+
+        for read_action in self.invalidations.get(action, []):
+            scope = self.policies.get(read_action, {}).get("scope")
+            if scope and all(input_data.get(field) is not None for field in scope):
+                tag = (connectedAccountId, read_action) + tuple(input_data[field] for field in scope)
+            else:
+                tag = (connectedAccountId, read_action)
+            if self.shared is not None:
+                self.shared.increment(_tag_key(tag))
+            with self._lock:
+                if self.shared is None:
+                    self._generations[tag] = self._generations.get(tag, 0) + 1
+                self.invalidated += 1
+
+    def stats(self) -> dict:
+        stats = self._entries.stats()
+        stats["invalidated"] = self.invalidated
+        return stats
+
+
+def _tag_key(tag: tuple) -> str:
+    return "response:" + "|".join(str(part) for part in tag)
+
+
+response_cache = ResponseCache(shared=shared_cache)
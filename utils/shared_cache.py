@@ -0,0 +1,101 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import dotenv
+
+
+# Imported before the entry points load .env, so load it here like the Composio client does
+dotenv.load_dotenv()
+SHARED_CACHE_PATH = os.getenv("SHARED_CACHE_PATH")  # SQLite file through which the bot processes share cached responses, unset to keep caches per process
+SHARED_CACHE_SWEEP_INTERVAL = float(os.getenv("SHARED_CACHE_SWEEP_INTERVAL", "300"))  # Seconds between two purges of expired shared entries
+
+
+class SharedCache:
+    """
+        Key/value cache with per-entry expiry and counters, stored in a SQLite file so every
+        bot process on the host sees the same entries.
+
+        Values are stored as JSON. Counters are used as generation numbers: a process that
+        invalidates something increments a counter, and every process compares it on read.
+    """
+
+    def __init__(self, path: str):
+        """
+            :param required path: Path of the SQLite database file.
+        """
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS counters (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, default=None):
+        """
+            :param required key: The entry key.
+            :param optional default: Returned when the entry is missing or expired.
+        """
+
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM entries WHERE key = ? AND expires_at > ?", (key, time.time())).fetchone()
+            if row is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value, ttl: float):
+        """
+            :param required key: The entry key.
+            :param required value: A JSON-serializable value.
+            :param required ttl: Seconds the entry is kept.
+        """
+
+        data = json.dumps(value)
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO entries (key, value, expires_at) VALUES (?, ?, ?)", (key, data, time.time() + ttl))
+
+    def counters(self, keys: list[str]) -> list[int]:
+        """
+            Current values of the given counters, 0 for counters never incremented.
+
+            :param required keys: The counter keys.
+        """
+
+        with self._lock:
+            values = dict(self._conn.execute(
+                f"SELECT key, value FROM counters WHERE key IN ({', '.join('?' * len(keys))})", keys
+            ).fetchall())
+        return [values.get(key, 0) for key in keys]
+
+    def increment(self, key: str):
+        """
+            :param required key: The counter key.
+        """
+
+        with self._lock:
+            self._conn.execute("INSERT INTO counters (key, value) VALUES (?, 1) ON CONFLICT (key) DO UPDATE SET value = value + 1", (key,))
+
+    def purge(self) -> int:
+        """Delete expired entries. Returns the number of entries removed."""
+
+        with self._lock:
+            return self._conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {"size": size, "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        self._conn.close()
+
+
+# Only created when the bot runs as several processes, see launcher.py
+shared_cache = SharedCache(SHARED_CACHE_PATH) if SHARED_CACHE_PATH else None
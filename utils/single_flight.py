@@ -0,0 +1,102 @@
+import asyncio
+import json
+import threading
+
+
+def make_key(connectedAccountId: str, action: str, input_data: dict) -> str:
+    """
+        Build a coalescing key from the account, the action and its normalized input.
+        Unset (None) parameters are dropped and keys are sorted, so equivalent calls map to the same key.
+
+        :param required connectedAccountId: The ID of the connected account.
+        :param required action: The Composio action name.
+        :param required input_data: The input parameters of the action.
+    """
+
+    normalized = {k: v for k, v in input_data.items() if v is not None}
+    return f"{connectedAccountId}:{action}:{json.dumps(normalized, sort_keys=True, default=str)}"
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+        Coalesces concurrent identical calls from worker threads: the first caller runs the
+        function, everybody arriving while it is in flight waits for and shares its result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key: str, func):
+        """
+            Run `func()` unless a call with the same key is already in flight.
+
+            :param required key: Identifies calls that may share a result (see `make_key`).
+            :param required func: Zero-argument callable doing the actual work.
+        """
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    """
+        asyncio counterpart of `SingleFlight`. Callers that get cancelled do not cancel the
+        shared request for the others still waiting on it.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.executed = 0
+        self.shared = 0
+
+    async def do(self, key: str, factory):
+        """
+            Await `factory()` unless a call with the same key is already in flight.
+
+            :param required key: Identifies calls that may share a result (see `make_key`).
+            :param required factory: Zero-argument callable returning the coroutine doing the work.
+        """
+
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+            self.executed += 1
+        else:
+            self.shared += 1
+
+        return await asyncio.shield(task)
@@ -0,0 +1,145 @@
+import os
+import re
+from utils.cache import TTLCache
+from utils.composio_client import composio_client
+from utils.single_flight import SingleFlight
+
+
+SLACK_DIRECTORY_TTL = float(os.getenv("SLACK_DIRECTORY_TTL", "600"))  # Seconds before a workspace's channel/user list is fetched again
+SLACK_DIRECTORY_MAX_ACCOUNTS = 256  # Workspaces kept in memory
+SLACK_DIRECTORY_PAGE_SIZE = 200  # Items requested per page, Slack's recommended maximum
+SLACK_DIRECTORY_MAX_PAGES = 50  # Stop paginating after this many pages
+
+# Slack IDs are used as-is, without a directory lookup
+CHANNEL_ID = re.compile(r"^[CGD][A-Z0-9]{8,}$")
+USER_ID = re.compile(r"^[UW][A-Z0-9]{8,}$")
+
+LIST_ACTIONS = {
+    "channels": ("slack_list_channels", "channels"),
+    "users": ("slack_list_users", "members"),
+}
+
+
+def _user_names(user: dict) -> list[str]:
+    profile = user.get("profile", {})
+    names = [user.get("name"), user.get("real_name"), profile.get("display_name"), profile.get("real_name")]
+    return [name.lower() for name in names if name]
+
+
+class SlackDirectory:
+    """
+        Per-account cache of a Slack workspace's channels and users.
+
+        Each list is fetched with cursor pagination the first time it is needed and refreshed
+        after `ttl` seconds. Concurrent first loads of the same list share one fetch. Lookups
+        map "#general" or "alice" to the Slack ID the send actions expect.
+    """
+
+    def __init__(self, ttl: float = SLACK_DIRECTORY_TTL, max_accounts: int = SLACK_DIRECTORY_MAX_ACCOUNTS, page_size: int = SLACK_DIRECTORY_PAGE_SIZE, max_pages: int = SLACK_DIRECTORY_MAX_PAGES):
+        """
+            :param optional ttl: Seconds before a list is fetched again.
+            :param optional max_accounts: How many workspaces to keep.
+            :param optional page_size: Items requested per page.
+            :param optional max_pages: Maximum number of pages fetched per list.
+        """
+
+        self._cache = TTLCache(max_accounts * len(LIST_ACTIONS), ttl)
+        self._single_flight = SingleFlight()
+        self.page_size = page_size
+        self.max_pages = max_pages
+
+    def _fetch(self, connectedAccountId: str, kind: str) -> dict:
+        """Fetch every page of a list. Returns the combined response, or the first failed one."""
+
+        action, key = LIST_ACTIONS[kind]
+        items = []
+        cursor = None
+        for _ in range(self.max_pages):
+            input_data = {"limit": self.page_size}
+            if cursor:
+                input_data["cursor"] = cursor
+
+            response_json = composio_client.execute_action(action, connectedAccountId, "slack", input_data)
+            if not response_json.get("executed"):
+                return response_json
+
+            response = response_json.get("response", {})
+            items.extend(response.get(key, []))
+            cursor = response.get("response_metadata", {}).get("next_cursor")
+            if not cursor:
+                break
+
+        if kind == "channels":
+            by_name = {channel["name"].lower(): channel["id"] for channel in items if channel.get("name")}
+        else:
+            by_name = {name: user["id"] for user in items if not user.get("deleted") for name in _user_names(user)}
+
+        entry = {"executed": True, "response": {key: items}, "by_name": by_name}
+        self._cache.set((connectedAccountId, kind), entry)
+        return entry
+
+    def _load(self, connectedAccountId: str, kind: str) -> dict:
+        entry = self._cache.get((connectedAccountId, kind))
+        if entry is not None:
+            return entry
+        return self._single_flight.do(f"{connectedAccountId}:{kind}", lambda: self._fetch(connectedAccountId, kind))
+
+    def channels(self, connectedAccountId: str) -> dict:
+        """
+            Every channel of the workspace, in the shape of a `slack_list_channels` response.
+
+            :param required connectedAccountId: The ID of the connected account.
+        """
+
+        return self._load(connectedAccountId, "channels")
+
+    def resolve_channel(self, connectedAccountId: str, channel: str) -> str:
+        """
+            Map a channel name ("#general" or "general") to its ID. IDs and unknown names are returned unchanged.
+
+            Only an already cached channel list is used: Slack also accepts channel names when
+            posting, so fetching the whole list first would only add a round trip.
+
+            :param required connectedAccountId: The ID of the connected account.
+            :param required channel: Channel ID or name.
+        """
+
+        channel = channel.strip()
+        if CHANNEL_ID.match(channel):
+            return channel
+        entry = self._cache.get((connectedAccountId, "channels"))
+        if entry is None:
+            return channel
+        return entry["by_name"].get(channel.lstrip("#").lower(), channel)
+
+    def resolve_user(self, connectedAccountId: str, user: str) -> str:
+        """
+            Map a username, display name or real name ("@alice", "Alice Smith") to the user's ID.
+            IDs and unknown names are returned unchanged.
+
+            :param required connectedAccountId: The ID of the connected account.
+            :param required user: User ID or name.
+        """
+
+        user = user.strip()
+        if USER_ID.match(user):
+            return user
+        by_name = self._load(connectedAccountId, "users").get("by_name", {})
+        return by_name.get(user.lstrip("@").lower(), user)
+
+    def invalidate(self, connectedAccountId: str, kind: str | None = None):
+        """
+            Drop cached lists of an account, e.g. after a channel was created.
+
+            :param required connectedAccountId: The ID of the connected account.
+            :param optional kind: "channels" or "users", both when omitted.
+        """
+
+        for name in [kind] if kind else LIST_ACTIONS:
+            self._cache.invalidate((connectedAccountId, name))
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+slack_directory = SlackDirectory()
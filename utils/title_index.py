@@ -0,0 +1,89 @@
+import re
+from collections import Counter
+
+
+MIN_TITLE_SCORE = 0.3  # Candidates sharing fewer trigrams than this (Dice coefficient) are dropped
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def trigrams(text: str) -> set[str]:
+    """
+        Trigrams of every word of `text`, lowercased and padded like PostgreSQL's pg_trgm,
+        so short words and word starts still produce matches.
+    """
+
+    grams = set()
+    for word in _NON_WORD.sub(" ", text.lower()).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TitleIndex:
+    """
+        In-memory trigram inverted index from event titles to event IDs.
+
+        A search only scores the events sharing at least one trigram with the query, so it
+        stays in the microseconds range for calendars with thousands of events, and it
+        tolerates typos and partial titles.
+    """
+
+    def __init__(self):
+        self._postings = {}  # trigram -> set of event ids
+        self._grams = {}  # event id -> trigrams of its title
+
+    def add(self, event_id: str, title: str):
+        """
+            Index (or re-index) an event title.
+
+            :param required event_id: The ID of the event.
+            :param required title: The title (summary) of the event.
+        """
+
+        self.remove(event_id)
+        grams = trigrams(title or "")
+        if not grams:
+            return
+        self._grams[event_id] = grams
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(event_id)
+
+    def remove(self, event_id: str):
+        grams = self._grams.pop(event_id, None)
+        for gram in grams or ():
+            ids = self._postings[gram]
+            ids.discard(event_id)
+            if not ids:
+                del self._postings[gram]
+
+    def search(self, query: str, accept=None, min_score: float = MIN_TITLE_SCORE) -> list[tuple[str, float]]:
+        """
+            Rank indexed events by title similarity to `query`, best first.
+
+            :param required query: The (possibly partial or misspelled) title to look for.
+            :param optional accept: Predicate on the event ID, events it rejects are skipped.
+            :param optional min_score: Lowest similarity (0 to 1) returned.
+        """
+
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(self._postings.get(gram, ()))
+
+        results = []
+        for event_id, count in shared.items():
+            if accept is not None and not accept(event_id):
+                continue
+            score = 2 * count / (len(query_grams) + len(self._grams[event_id]))
+            if score >= min_score:
+                results.append((event_id, score))
+
+        results.sort(key=lambda result: -result[1])
+        return results
+
+    def __len__(self) -> int:
+        return len(self._grams)
@@ -0,0 +1,114 @@
+import inspect
+import os
+import re
+
+
+TOOL_DESCRIPTIONS = os.getenv("TOOL_DESCRIPTIONS", "full").lower()  # "full" sends the tool docstrings verbatim, "compact" condensed signatures
+PARAM_SUMMARY_LENGTH = 80  # Characters kept of a parameter's description in compact mode
+CHARS_PER_TOKEN = 4  # Rough characters per token, used to estimate prompt sizes
+
+_PARAM = re.compile(r"^:param (required|optional) (\w+):\s*(.*)$")
+_ENUM_VALUE = re.compile(r'^"(\w+)\s*"\s*-')
+
+
+def _first_sentence(text: str, limit: int = PARAM_SUMMARY_LENGTH) -> str:
+    sentence = re.split(r"(?<=[.!?])\s", text.strip(), maxsplit=1)[0].rstrip("\\ ")
+    return sentence if len(sentence) <= limit else sentence[:limit - 3].rstrip() + "..."
+
+
+def _parse_docstring(doc: str) -> tuple[list[str], dict]:
+    """
+        Split a tool docstring into its free-text lines and its parameters.
+        Lines directly following a `:param` line belong to that parameter; lines after a blank line are free text again.
+    """
+
+    text, params = [], {}
+    current = None
+    # A trailing backslash in a docstring joins the next `:param` line onto the previous one
+    doc = re.sub(r"\s+:param ", "\n:param ", inspect.cleandoc(doc or ""))
+    for line in doc.splitlines():
+        line = line.strip()
+        match = _PARAM.match(line)
+        if match:
+            current = match.group(2)
+            inline = re.search(r"values are:?\s*(.+)$", match.group(3))
+            values = re.findall(r"['\"](\w+)['\"]", inline.group(1)) if inline else []
+            params[current] = {"required": match.group(1) == "required", "text": match.group(3), "values": values}
+        elif not line:
+            current = None
+        elif current is not None:
+            value = _ENUM_VALUE.match(line)
+            if value:
+                params[current]["values"].append(value.group(1))
+        else:
+            text.append(line)
+    return text, params
+
+
+def _type_name(annotation) -> str:
+    if annotation is inspect.Parameter.empty:
+        return "str"
+    name = getattr(annotation, "__name__", None) or str(annotation)
+    return name.replace(" | None", "").replace("typing.", "")
+
+
+def compact_description(tool) -> str:
+    """
+        Build a condensed description of a crewai tool from its function: one line per argument
+        with its type, a one-sentence summary and its allowed values, instead of the full
+        docstring and JSON schema.
+
+        :param required tool: A tool created with the crewai_tools `@tool` decorator.
+    """
+
+    text, params = _parse_docstring(tool.func.__doc__)
+    arguments = []
+    for name, parameter in inspect.signature(tool.func).parameters.items():
+        info = params.get(name, {"required": parameter.default is inspect.Parameter.empty, "text": "", "values": []})
+        optional = "" if info["required"] else "?"
+        line = f"- {name}{optional}: {_type_name(parameter.annotation)}"
+        if info["text"]:
+            line += f" - {_first_sentence(info['text'])}"
+        if info["values"]:
+            line += f" One of: {', '.join(info['values'])}."
+        arguments.append(line)
+
+    return f"Tool Name: {tool.name}\nTool Arguments (? = optional):\n" + "\n".join(arguments) + f"\nTool Description: {' '.join(text)}"
+
+
+def compact_tools(tools: list) -> list:
+    """
+        Copies of the tools with their descriptions replaced by `compact_description`.
+
+        :param required tools: Tools created with the crewai_tools `@tool` decorator.
+    """
+
+    return [tool.model_copy(update={"description": compact_description(tool)}) for tool in tools]
+
+
+def agent_tools(tools: list) -> list:
+    """The tools to give an agent, in the description mode selected by `TOOL_DESCRIPTIONS`."""
+
+    return compact_tools(tools) if TOOL_DESCRIPTIONS == "compact" else tools
+
+
+def description_report(service_tools: dict) -> list[dict]:
+    """
+        Size of the tool descriptions sent with every reasoning step, per service and for all
+        services together, in both modes.
+
+        :param required service_tools: Tools per service, e.g. `SERVICE_TOOLS`.
+    """
+
+    rows = []
+    groups = list(service_tools.items()) + [("all", [tool for tools in service_tools.values() for tool in tools])]
+    for service, tools in groups:
+        full = sum(len(tool.description) for tool in tools)
+        compact = sum(len(compact_description(tool)) for tool in tools)
+        rows.append({
+            "service": service,
+            "tools": len(tools),
+            "full_tokens": full // CHARS_PER_TOKEN,
+            "compact_tokens": compact // CHARS_PER_TOKEN,
+        })
+    return rows
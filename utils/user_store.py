@@ -0,0 +1,242 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+USER_DB_PATH = os.getenv("USER_DB_PATH", "./db/users.sqlite3")
+PENDING_ACCOUNT_TTL = float(os.getenv("PENDING_ACCOUNT_TTL", str(24 * 60 * 60)))  # Seconds before an unfinished `!create_account` expires
+CLOCK_SKEW_MARGIN = 5.0  # Seconds of rows re-read on refresh, in case another process committed with a slightly older timestamp
+
+# Account states
+PENDING = "pending"  # `!create_account` was run, the user has not used the bot since
+ACTIVE = "active"
+REAUTH = "reauth"  # `!authenticate` was run, the new connection has not been used yet
+
+
+class UserStore:
+    """
+        Discord user -> Composio connected account store.
+
+        Every account lives in one `accounts` table with a state (pending, active, reauth),
+        so moving between states is a single-row update that commits atomically.
+        Lookups are served from an in-memory dict keyed by Discord user id. Every write goes
+        to SQLite (WAL mode) first and updates the in-memory index only once it is committed,
+        so the index never holds data that is not on disk.
+
+        Several bot processes may share one database file. Before a lookup the store checks
+        SQLite's `data_version`, which changes when another connection commits, and if it did,
+        reloads the rows updated since the newest change it has seen.
+    """
+
+    def __init__(self, path: str = USER_DB_PATH):
+        """
+            :param optional path: Path of the SQLite database file.
+        """
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS accounts ("
+            "user_id INTEGER PRIMARY KEY, "
+            "connected_account_id TEXT NOT NULL, "
+            "state TEXT NOT NULL, "
+            "updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS accounts_pending ON accounts (state, updated_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS accounts_updated ON accounts (updated_at)")
+
+        self._accounts = {}
+        self._data_version = None
+        self._loaded_until = 0.0
+        self.refresh()
+
+    def refresh(self):
+        """
+            Pick up rows committed by other processes since the last refresh. Costs one
+            `PRAGMA data_version` query when nothing changed.
+
+            Rows deleted by another process (expired pending accounts) are not seen, they stay
+            pending here until `resolve` tries to promote them and finds them gone.
+        """
+
+        with self._lock:
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version == self._data_version:
+                return
+            self._data_version = data_version
+            # Re-read a margin before the newest change seen, other processes' clocks may lag slightly
+            rows = self._conn.execute(
+                "SELECT user_id, connected_account_id, state, updated_at FROM accounts WHERE updated_at >= ?",
+                (self._loaded_until - CLOCK_SKEW_MARGIN,)
+            ).fetchall()
+            for user_id, connected_account_id, state, updated_at in rows:
+                self._accounts[user_id] = (connected_account_id, state, updated_at)
+                self._loaded_until = max(self._loaded_until, updated_at)
+
+    def _write(self, user_id: int, connected_account_id: str, state: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO accounts (user_id, connected_account_id, state, updated_at) VALUES (?, ?, ?, ?)",
+                (user_id, connected_account_id, state, now)
+            )
+            self._accounts[user_id] = (connected_account_id, state, now)
+
+    def get(self, user_id: int) -> str | None:
+        """
+            Get the connected account ID of a user who has an account (active or re-authenticating).
+            Pending accounts are not returned, use `resolve` to activate them.
+
+            :param required user_id: The Discord user ID.
+        """
+
+        self.refresh()
+        account = self._accounts.get(user_id)
+        if account is None or account[1] == PENDING:
+            return None
+        return account[0]
+
+    def state(self, user_id: int) -> str | None:
+        """
+            :param required user_id: The Discord user ID.
+        """
+
+        self.refresh()
+        account = self._accounts.get(user_id)
+        return account[1] if account else None
+
+    def resolve(self, user_id: int) -> str | None:
+        """
+            Get the connected account ID a command should use, activating a pending or
+            re-authenticated account in the same step. Returns None if the user has no account.
+
+            :param required user_id: The Discord user ID.
+        """
+
+        self.refresh()
+        account = self._accounts.get(user_id)
+        if account is None:
+            return None
+        if account[1] == ACTIVE:
+            return account[0]
+        return self.promote(user_id)
+
+    def promote(self, user_id: int) -> str | None:
+        """
+            Atomically move a pending or re-authenticated account to active.
+            Returns the connected account ID, or None if the user has no account.
+
+            :param required user_id: The Discord user ID.
+        """
+
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "UPDATE accounts SET state = ?, updated_at = ? WHERE user_id = ? RETURNING connected_account_id",
+                (ACTIVE, now, user_id)
+            ).fetchone()
+            if row is None:
+                self._accounts.pop(user_id, None)
+                return None
+            self._accounts[user_id] = (row[0], ACTIVE, now)
+            return row[0]
+
+    def create_pending(self, user_id: int, connected_account_id: str):
+        """
+            Save a connection started by `!create_account` that the user still has to finish.
+
+            :param required user_id: The Discord user ID.
+            :param required connected_account_id: The ID of the connected account.
+        """
+
+        self._write(user_id, connected_account_id, PENDING)
+
+    def start_reauth(self, user_id: int, connected_account_id: str):
+        """
+            Point an existing user to the new connection started by `!authenticate`.
+
+            :param required user_id: The Discord user ID.
+            :param required connected_account_id: The ID of the new connected account.
+        """
+
+        self._write(user_id, connected_account_id, REAUTH)
+
+    def expire_pending(self, ttl: float = PENDING_ACCOUNT_TTL) -> int:
+        """
+            Delete pending accounts older than `ttl` seconds. Returns the number of accounts removed.
+
+            :param optional ttl: Age in seconds after which a pending account expires.
+        """
+
+        cutoff = time.time() - ttl
+        with self._lock:
+            expired = self._conn.execute(
+                "DELETE FROM accounts WHERE state = ? AND updated_at < ? RETURNING user_id",
+                (PENDING, cutoff)
+            ).fetchall()
+            for (user_id,) in expired:
+                self._accounts.pop(user_id, None)
+        return len(expired)
+
+    def counts(self) -> dict:
+        """Number of accounts per state."""
+
+        self.refresh()
+        counts = {PENDING: 0, ACTIVE: 0, REAUTH: 0}
+        for _, state, _ in list(self._accounts.values()):
+            counts[state] += 1
+        return counts
+
+    def __len__(self) -> int:
+        return len(self._accounts)
+
+    def migrate_from_tinydb(self, user_json: str, temp_user_json: str) -> tuple[int, int]:
+        """
+            One-shot import of the old TinyDB files. Imported files are renamed to `*.migrated`
+            so the import never runs twice. Returns the number of (users, pending users) imported.
+
+            :param required user_json: Path of the old `user.json`.
+            :param required temp_user_json: Path of the old `temp_user.json`.
+        """
+
+        counts = []
+        # Pending users first, so a user present in both files ends up active
+        for path, state in [(temp_user_json, PENDING), (user_json, ACTIVE)]:
+            now = time.time()
+            rows = [(user_id, connected_account_id, state, now) for user_id, connected_account_id in _read_tinydb_rows(path)]
+            with self._lock:
+                self._conn.execute("BEGIN")
+                self._conn.executemany("INSERT OR REPLACE INTO accounts (user_id, connected_account_id, state, updated_at) VALUES (?, ?, ?, ?)", rows)
+                self._conn.execute("COMMIT")
+                for user_id, connected_account_id, state, updated_at in rows:
+                    self._accounts[user_id] = (connected_account_id, state, updated_at)
+            if os.path.exists(path):
+                os.replace(path, path + ".migrated")
+            counts.append(len(rows))
+
+        return counts[1], counts[0]
+
+    def close(self):
+        self._conn.close()
+
+
+def _read_tinydb_rows(path: str) -> list[tuple[int, str]]:
+    """Read the (user_id, connected_account_id) documents of a TinyDB JSON file."""
+
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return []
+
+    with open(path) as f:
+        data = json.load(f)
+
+    rows = []
+    for table in data.values():
+        for document in table.values():
+            if "user_id" in document and "connected_account_id" in document:
+                rows.append((int(document["user_id"]), document["connected_account_id"]))
+    return rows
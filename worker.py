@@ -0,0 +1,160 @@
+"""
+    Agent worker process: runs the jobs the bot processes put in the job queue and posts the
+    results into the Discord messages they belong to.
+
+    Start any number of these next to bots running with AGENT_MODE=queue (launcher.py does both).
+    Bots and workers must share SHARED_CACHE_PATH.
+
+    Usage: python worker.py
+"""
+
+import os
+import signal
+import socket
+import threading
+import time
+import requests
+from dotenv import load_dotenv
+from utils.manage_events import manage_events
+from utils.manage_multi_service import manage_multi_service, agent_registry, SERVICE_TOOLS
+from utils.intent_cache import intent_cache
+from utils.shared_cache import shared_cache
+from utils.progress import ProgressReporter
+from utils.discord_rest import DiscordRest, RestStatusMessage
+from utils.job_queue import JobQueue, Job, JOB_LEASE
+
+
+load_dotenv()
+DISCORD_BOT_TOKEN = os.getenv("DISCORD_BOT_TOKEN")
+AGENT_WORKERS = int(os.getenv("AGENT_WORKERS", "4"))  # Jobs this process runs concurrently
+AGENT_PREWARM = os.getenv("AGENT_PREWARM", "true").lower() == "true"  # Build the service agents before claiming jobs
+WORKER_ID = os.getenv("WORKER_ID", f"{socket.gethostname()}-{os.getpid()}")  # Stable IDs let a restarted worker resume its own jobs at once
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))  # Seconds an idle worker waits before looking for jobs again
+MAINTENANCE_INTERVAL = JOB_LEASE / 3  # Seconds between two heartbeats / delivery retries
+
+# Dashboard results invalidated after a job only reach the bot processes through the shared cache
+if shared_cache is None:
+    raise SystemExit("worker.py needs SHARED_CACHE_PATH, set to the same file as for the bot processes.")
+
+job_queue = JobQueue()
+discord_rest = DiscordRest(DISCORD_BOT_TOKEN)
+
+
+def run_job(job: Job, progress: ProgressReporter | None = None) -> str:
+    """
+        Run the agent of a job, the same way the bot runs it inline.
+
+        :param required job: The claimed job.
+        :param optional progress: Receives step events while the crew runs.
+    """
+
+    if job.service == "calendar":
+        return manage_events(job.connected_account_id, job.prompt, progress=progress)
+    return manage_multi_service(job.connected_account_id, job.prompt, service=job.service, progress=progress)
+
+
+def deliver(job: Job):
+    """
+        Post the result of a finished job into its status message, or as a new message if the
+        status message is gone. Jobs that could not be posted are retried by `maintenance`.
+    """
+
+    reply = job.reply
+    embed = dict(reply["result"], description=job.result)
+    try:
+        status = discord_rest.edit_message(reply["channel_id"], reply["message_id"], embed)
+        if status == 404:
+            status = discord_rest.send_message(reply["channel_id"], embed)
+    except requests.RequestException as e:
+        print(f"Failed to deliver job {job.id}: {e}")
+        return
+
+    # Missing access (403) or a deleted channel (404) will not get better by retrying
+    if status < 500 and status != 429:
+        job_queue.mark_delivered(job.id)
+    else:
+        print(f"Failed to deliver job {job.id}: HTTP {status}")
+
+
+def process(job: Job):
+    reply = job.reply
+    status_message = RestStatusMessage(discord_rest, reply["channel_id"], reply["message_id"], reply["processing"])
+    reporter = ProgressReporter(status_message.push)
+
+    try:
+        job.result = run_job(job, progress=reporter)
+    except Exception as e:
+        print(f"Job {job.id} failed: {e}")
+        job.result = "Something went wrong. Please try again."
+    finally:
+        status_message.close()
+        # The agent may have written, so the user's dashboard results are stale
+        intent_cache.invalidate(job.user_id)
+
+    if job_queue.complete(job.id, WORKER_ID, job.result):
+        deliver(job)
+
+
+def work(stop: threading.Event):
+    """Claim and run jobs until `stop` is set."""
+
+    while not stop.is_set():
+        try:
+            job = job_queue.claim(WORKER_ID)
+            if job is None:
+                stop.wait(JOB_POLL_INTERVAL)
+                continue
+            print(f"Running job {job.id} ({job.service}) for user {job.user_id}, attempt {job.attempts}")
+            process(job)
+        except Exception as e:
+            # A locked queue or a failed completion must not end the thread; an unfinished job is claimed again once its lease expires
+            print(f"Agent worker failed: {e}")
+            stop.wait(JOB_POLL_INTERVAL)
+
+
+def maintenance():
+    """
+        Keep the leases of running jobs alive, give up jobs interrupted too often, and retry deliveries.
+        Runs until the process exits, so jobs finishing during shutdown keep their leases.
+    """
+
+    while True:
+        time.sleep(MAINTENANCE_INTERVAL)
+        try:
+            job_queue.heartbeat(WORKER_ID)
+            job_queue.fail_exhausted()
+            for job in job_queue.undelivered():
+                deliver(job)
+            job_queue.purge()
+        except Exception as e:
+            print(f"Job maintenance failed: {e}")
+
+
+def main():
+    if AGENT_PREWARM:
+        agent_registry.warm([[service] for service in SERVICE_TOOLS])
+
+    resumed = job_queue.release(WORKER_ID)
+    if resumed:
+        print(f"Requeued {resumed} jobs interrupted by the last shutdown of {WORKER_ID}.")
+
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+
+    threads = [threading.Thread(target=work, args=(stop,), name=f"agent-job-{index}") for index in range(AGENT_WORKERS)]
+    threads.append(threading.Thread(target=maintenance, name="job-maintenance", daemon=True))
+    for thread in threads:
+        thread.start()
+    print(f"Worker {WORKER_ID} running {AGENT_WORKERS} agent workers.")
+
+    # Running jobs are finished before exiting; a hard kill leaves them to be claimed again
+    stop.wait()
+    for thread in threads:
+        if not thread.daemon:
+            thread.join()
+    job_queue.close()
+
+
+if __name__ == "__main__":
+    main()